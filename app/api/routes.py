@@ -6,90 +6,366 @@ from __future__ import annotations
 
 import asyncio
 import logging
-import random
-from datetime import date
-from functools import partial
+import secrets
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from contextlib import AsyncExitStack, aclosing
+
+from fastapi import APIRouter, File, Header, HTTPException, Query, UploadFile
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic_core import to_json
 
 from app.core.config import settings
-from app.db.repository import fetch_all_claims, fetch_claim_result, save_claim_result
-from app.graph.workflow import pipeline
-from app.models.schema import ClaimListResponse, ProcessResponse
-from app.services.pdf import extract_pages
+from app.core.profiling import ARTIFACTS, artifact_path, profiled, stage
+from app.db.repository import ClaimFilter, enqueue_claim_job, fetch_all_claims, fetch_claim_json, fetch_claim_result, fetch_job_status
+from app.db.write_buffer import get_write_buffer, save_claim
+from app.graph.nodes.segregator import page_cache
+from app.llm.provider import rate_limiter
+from app.models.schema import ClaimListResponse, CountMode, JobStatus, JobStatusResponse, JobSubmitResponse, ProcessResponse
+from app.services.batch import collect_batch_files, process_batch
+from app.services.claim_cache import claim_cache
+from app.services.compaction import compaction_stats
+from app.services.jobs import get_job_workers
+from app.services.pdf import InvalidPdfError, get_extraction_engine
+from app.services.processing import generate_claim_id, open_document, run_pipeline
+from app.services.result_cache import result_cache, result_cache_key
+from app.services.streaming import cached_events, pipeline_events
+from app.services.upload import UploadTooLargeError, spool_upload
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["processing"])
 
-MAX_PDF_BYTES = settings.MAX_PDF_SIZE_MB * 1024 * 1024
+# Keep proxies from buffering the event stream.
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+class ModelResponse(Response):
+    """
+    JSON body written straight from a (validated) model by pydantic's serializer.
 
+    Returning a ``Response`` skips FastAPI's ``response_model`` pass — dump
+    to dict, re-validate, ``jsonable_encoder``, stdlib ``json`` — so a claim
+    with thousands of line items is serialized once.  ``response_model``
+    stays on the routes for the OpenAPI schema.
+    """
 
-def _generate_claim_id() -> str:
-    """Generate ``claim-YYYYMMDD-<6 random digits>``."""
-    today = date.today().strftime("%Y%m%d")
-    suffix = random.randint(100_000, 999_999)
-    return f"claim-{today}-{suffix}"
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return to_json(content)
 
 
 @router.post("/process", response_model=ProcessResponse)
-async def process_claim(file: UploadFile = File(...)) -> ProcessResponse:
-    """Accept a PDF claim, run the LangGraph segregation + extraction pipeline, return structured JSON."""
+async def process_claim(file: UploadFile = File(...), x_profile_token: str | None = Header(None)) -> ModelResponse:
+    """
+    Accept a PDF claim, run the LangGraph segregation + extraction pipeline, return structured JSON.
+
+    With an admin ``X-Profile-Token`` header the request bypasses the result
+    cache and is profiled; the response carries ``X-Profile-Id`` for
+    ``GET /api/profiles/{profile_id}``.
+    """
 
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Only PDF files are accepted.")
 
-    pdf_bytes = await file.read()
+    claim_id = generate_claim_id()
+    if x_profile_token is None:
+        return await _process_claim(file, claim_id)
 
-    if len(pdf_bytes) == 0:
-        raise HTTPException(status_code=400, detail="Uploaded PDF is empty.")
+    _require_profile_admin(x_profile_token)
+    # Save the profile whatever happens: a failing request is often the one worth looking at.
+    try:
+        with profiled(claim_id) as session:
+            try:
+                response = await _process_claim(file, claim_id, use_cache=False)
+            except HTTPException as exc:
+                exc.headers = {**(exc.headers or {}), "X-Profile-Id": session.id}
+                raise
+    finally:
+        try:
+            await asyncio.to_thread(session.save)
+            logger.info("Profiled claim_id=%s in %.0f ms — profile %s", claim_id, session.wall_seconds * 1000, session.id)
+        except Exception:
+            logger.exception("Could not save profile %s for claim_id=%s", session.id, claim_id)
 
-    if len(pdf_bytes) > MAX_PDF_BYTES:
-        raise HTTPException(
-            status_code=413,
-            detail=f"PDF exceeds the {settings.MAX_PDF_SIZE_MB} MB limit.",
-        )
+    response.headers["X-Profile-Id"] = session.id
+    return response
 
-    claim_id = _generate_claim_id()
 
+async def _process_claim(file: UploadFile, claim_id: str, use_cache: bool = True) -> ModelResponse:
     try:
-        loop = asyncio.get_running_loop()
-        pages = await loop.run_in_executor(None, partial(extract_pages, pdf_bytes))
+        async with spool_upload(file) as upload:
+            cache_key = result_cache_key(upload.sha256)
+            cached = await result_cache.get(cache_key) if use_cache else None
+            if cached is not None:
+                logger.info("Result cache hit for sha256=%s — returning claim_id=%s", upload.sha256, cached.claim_id)
+                return ModelResponse(cached)
+
+            try:
+                pages = await open_document(upload.path)
+            except InvalidPdfError as exc:
+                raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+            # Inside the spool block: in pipelined mode the pages are still being read from the file.
+            try:
+                response = await run_pipeline(claim_id, pages)
+            except InvalidPdfError as exc:
+                # A page that fails to parse mid-stream (pipelined mode) is still the upload's fault.
+                raise HTTPException(status_code=422, detail=str(exc)) from exc
+            except Exception as exc:
+                logger.exception("Pipeline failed for claim_id=%s", claim_id)
+                raise HTTPException(status_code=500, detail=f"Pipeline error: {exc}") from exc
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
     except ValueError as exc:
-        raise HTTPException(status_code=422, detail=str(exc)) from exc
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     try:
-        result = await asyncio.to_thread(
-            pipeline.invoke,
-            {"claim_id": claim_id, "pages": pages, "page_classifications": [], "extraction_results": {}, "final_output": {}},
-            {"recursion_limit": settings.LANGGRAPH_RECURSION_LIMIT},
-        )
+        with stage("db_save"):
+            await save_claim(response, cache_key=cache_key)
     except Exception as exc:
-        logger.exception("Pipeline failed for claim_id=%s", claim_id)
-        raise HTTPException(status_code=500, detail=f"Pipeline error: {exc}") from exc
+        logger.exception("Failed to persist claim_id=%s to DB", claim_id)
+        raise HTTPException(status_code=500, detail=f"Database error: {exc}") from exc
+
+    result_cache.put(cache_key, response)
+    return ModelResponse(response)
+
+
+def _require_profile_admin(token: str) -> None:
+    expected = settings.PROFILE_ADMIN_TOKEN.get_secret_value() if settings.PROFILE_ADMIN_TOKEN is not None else ""
+    if not expected:
+        raise HTTPException(status_code=404, detail="Profiling is disabled.")
+    if not secrets.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid profile token.")
+
+
+@router.post("/process/stream", response_class=StreamingResponse)
+async def process_claim_stream(file: UploadFile = File(...)) -> StreamingResponse:
+    """
+    Same as ``POST /process``, streamed as Server-Sent Events.
+
+    Emits ``segregation`` as soon as the pages are classified, then
+    ``identity`` / ``discharge_summary`` / ``itemized_bill`` as each agent
+    finishes, and ``result`` with the full ``ProcessResponse``.  Upload
+    and PDF errors are still plain HTTP errors; later failures arrive as an
+    ``error`` event.
+    """
+
+    if file.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="Only PDF files are accepted.")
+
+    claim_id = generate_claim_id()
+
+    # The spooled file must outlive this handler when pages are streamed from it.
+    stack = AsyncExitStack()
+    try:
+        upload = await stack.enter_async_context(spool_upload(file))
+        cache_key = result_cache_key(upload.sha256)
+        cached = await result_cache.get(cache_key)
+        if cached is not None:
+            await stack.aclose()
+            logger.info("Result cache hit for sha256=%s — streaming claim_id=%s", upload.sha256, cached.claim_id)
+            return StreamingResponse(cached_events(cached), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+        try:
+            pages = await open_document(upload.path)
+        except InvalidPdfError as exc:
+            raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except UploadTooLargeError as exc:
+        await stack.aclose()
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except ValueError as exc:
+        await stack.aclose()
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except BaseException:
+        await stack.aclose()
+        raise
+
+    async def events():
+        async with stack, aclosing(pipeline_events(claim_id, pages, cache_key)) as stream:
+            async for event in stream:
+                yield event
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+
+@router.post("/batch", response_class=StreamingResponse)
+async def process_claim_batch(files: list[UploadFile] = File(...)) -> StreamingResponse:
+    """
+    Process several PDF claims (or ZIP archives of PDFs) in one request.
+
+    Streams one ``BatchItemResult`` JSON line per PDF as it completes; a
+    failing file is reported on its own line and does not affect the rest.
+    """
+    stack = AsyncExitStack()
+    try:
+        items = await collect_batch_files(files, stack)
+    except ValueError as exc:
+        await stack.aclose()
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except BaseException:
+        await stack.aclose()
+        raise
+
+    logger.info("Batch of %d PDF(s) accepted (%d rejected up front)", len(items), sum(1 for i in items if i.upload is None))
+
+    async def lines():
+        async with stack:
+            async for result in process_batch(items):
+                yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
-    response = ProcessResponse(**result["final_output"])
+
+@router.post("/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_job(file: UploadFile = File(...)) -> JobSubmitResponse:
+    """Queue a PDF claim for background processing and return its job id straight away."""
+
+    if file.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="Only PDF files are accepted.")
+
+    claim_id = generate_claim_id()
 
     try:
-        await save_claim_result(response)
+        async with spool_upload(file) as upload:
+            cache_key = result_cache_key(upload.sha256)
+            cached = await result_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Result cache hit for sha256=%s — job resolves to claim_id=%s", upload.sha256, cached.claim_id)
+                return JobSubmitResponse(job_id=cached.claim_id, status=JobStatus.PROCESSED)
+            pdf = await asyncio.to_thread(upload.path.read_bytes)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    try:
+        await enqueue_claim_job(claim_id, pdf, max_attempts=settings.JOB_MAX_ATTEMPTS, cache_key=cache_key)
     except Exception as exc:
-        logger.exception("Failed to persist claim_id=%s to DB", claim_id)
+        logger.exception("Failed to queue claim_id=%s", claim_id)
         raise HTTPException(status_code=500, detail=f"Database error: {exc}") from exc
 
-    return response
+    return JobSubmitResponse(job_id=claim_id, status=JobStatus.QUEUED)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str) -> ModelResponse:
+    """Status of a queued job, with the full result once it is processed."""
+    status = await fetch_job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+
+    state, attempts, error = status
+    result = await fetch_claim_result(job_id) if state == JobStatus.PROCESSED else None
+    return ModelResponse(JobStatusResponse(job_id=job_id, status=JobStatus(state), attempts=attempts, error=error, result=result))
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    return value.replace(tzinfo=timezone.utc) if value is not None and value.tzinfo is None else value
 
 
 @router.get("/claims", response_model=ClaimListResponse)
-async def list_claims(limit: int = 20, offset: int = 0) -> ClaimListResponse:
-    """List all processed claims (paginated)."""
-    items, total = await fetch_all_claims(limit=limit, offset=offset)
-    return ClaimListResponse(total=total, limit=limit, offset=offset, items=items)
+async def list_claims(
+    limit: int = Query(20, ge=1, le=500),
+    cursor: str | None = None,
+    offset: int = Query(0, ge=0),
+    status: JobStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    count: CountMode = CountMode.ESTIMATE,
+) -> ModelResponse:
+    """
+    List claims, newest first.
+
+    Follow ``next_cursor`` (``?cursor=``) for further pages; ``offset`` is
+    kept for old clients but costs a scan of every skipped row.  Optional
+    filters: ``status`` and a ``created_from`` (inclusive) / ``created_to``
+    (exclusive) range, naive times meaning UTC.  ``total`` is a planner
+    estimate unless ``count=exact``; ``count=none`` skips it.
+    """
+    claim_filter = ClaimFilter(
+        status=status.value if status is not None else None,
+        created_from=_as_utc(created_from),
+        created_to=_as_utc(created_to),
+    )
+    try:
+        items, total, next_cursor = await fetch_all_claims(limit=limit, offset=offset, cursor=cursor, claim_filter=claim_filter, count=count)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return ModelResponse(
+        ClaimListResponse(
+            total=total,
+            total_exact=count == CountMode.EXACT,
+            limit=limit,
+            offset=offset,
+            next_cursor=next_cursor,
+            items=items,
+        )
+    )
 
 
 @router.get("/claims/{claim_id}", response_model=ProcessResponse)
-async def get_claim(claim_id: str) -> ProcessResponse:
-    """Fetch a previously processed claim by its ID."""
-    result = await fetch_claim_result(claim_id)
-    if result is None:
+async def get_claim(claim_id: str) -> Response:
+    """Fetch a previously processed claim by its ID — its stored JSON snapshot, from the claim cache when possible."""
+    body = await claim_cache.get(claim_id, fetch_claim_json)
+    if body is None:
         raise HTTPException(status_code=404, detail=f"Claim '{claim_id}' not found.")
-    return result
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_profile_token: str = Header(...)) -> FileResponse:
+    """Stage timeline and totals of a profiled request (admin only)."""
+    return _profile_artifact(profile_id, "json", x_profile_token)
+
+
+@router.get("/profiles/{profile_id}/stacks")
+async def get_profile_stacks(profile_id: str, x_profile_token: str = Header(...)) -> FileResponse:
+    """Sampled stacks of a profiled request in collapsed format, for flamegraph.pl or speedscope (admin only)."""
+    return _profile_artifact(profile_id, "folded", x_profile_token)
+
+
+def _profile_artifact(profile_id: str, kind: str, token: str) -> FileResponse:
+    _require_profile_admin(token)
+    path = artifact_path(profile_id, kind)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found.")
+    return FileResponse(path, media_type=ARTIFACTS[kind], filename=path.name)
+
+
+@router.get("/stats/cache")
+async def cache_stats() -> dict:
+    """Hit/miss counters (and, for the claim cache, memory use) of the caches."""
+    return {"result": result_cache.stats(), "page": page_cache.stats(), "claim": claim_cache.stats()}
+
+
+@router.get("/stats/extraction")
+async def extraction_stats() -> dict:
+    """Queue depth and per-page timing of the shared PDF extraction pool."""
+    return get_extraction_engine().stats()
+
+
+@router.get("/stats/llm")
+async def llm_stats() -> dict:
+    """Gauges of the adaptive LLM rate limiter: in-flight calls, queues per lane, budgets, throttles."""
+    return rate_limiter.stats()
+
+
+@router.get("/stats/tokens")
+async def token_stats() -> dict:
+    """Page-text tokens before and after prompt compaction, overall and per node."""
+    return compaction_stats.stats()
+
+
+@router.get("/stats/jobs")
+async def job_stats() -> dict:
+    """Outcome counters of this replica's job workers."""
+    return get_job_workers().stats()
+
+
+@router.get("/stats/writes")
+async def write_stats() -> dict:
+    """Flush counters of the claim write-behind buffer (``enabled: false`` when it is off)."""
+    buffer = get_write_buffer()
+    return {"enabled": False} if buffer is None else {"enabled": True, **buffer.stats()}
@@ -21,6 +21,10 @@ class Settings(BaseSettings):
     DB_NAME: str
     DB_ECHO: bool
     DATABASE_POOL_SIZE: int
+    # Write-behind: group claim writes into one transaction per N claims / M ms
+    DB_WRITE_BUFFER_ENABLED: bool = False
+    DB_WRITE_BUFFER_MAX_CLAIMS: int = 64
+    DB_WRITE_BUFFER_FLUSH_MS: int = 20
     DATABASE_MAX_OVERFLOW: int
     DATABASE_ECHO: bool
 
@@ -28,15 +32,77 @@ class Settings(BaseSettings):
     LLM_MODEL: str
     LLM_TEMPERATURE: float
     LLM_MAX_TOKENS: int
+    LLM_MAX_CONCURRENCY: int = 16
+    # Provider quotas for the adaptive rate limiter (0 = unlimited)
+    LLM_REQUESTS_PER_MINUTE: int = 500
+    LLM_TOKENS_PER_MINUTE: int = 200_000
+    LLM_MAX_RETRIES: int = 4
 
     OPENAI_API_KEY: SecretStr
     ANTHROPIC_API_KEY: SecretStr
     BASE_URL: str
 
     MAX_PDF_SIZE_MB: int
+    # Token budget of one segregator window
     PDF_CHUNK_SIZE: int
+    SEGREGATOR_WINDOW_MAX_PAGES: int = 25
+    PDF_EXTRACTION_WORKERS: int = 4
+    PDF_TRANSPORT: str = "shared_memory"
+    # Text extraction library: pypdfium2, pdfminer or pdfplumber (see benchmarks/bench_pdf_backends.py)
+    PDF_BACKEND: str = "pypdfium2"
+    # Stream pages into the segregator while the rest of the PDF is still being parsed
+    PDF_PIPELINED_EXTRACTION: bool = True
+    PDF_STREAM_RANGE_PAGES: int = 8
+    UPLOAD_SPOOL_DIR: str | None = None
+
+    RESULT_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    RESULT_CACHE_MAX_ENTRIES: int = 512
+
+    # GET /api/claims/{claim_id} response cache, invalidated via LISTEN/NOTIFY (0 disables)
+    CLAIM_CACHE_TTL_SECONDS: int = 300
+    CLAIM_CACHE_MAX_ENTRIES: int = 10_000
+    CLAIM_CACHE_MAX_MB: int = 64
+
+    PAGE_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    PAGE_CACHE_MAX_ENTRIES: int = 50_000
+    PAGE_CACHE_MAX_ROWS: int = 1_000_000
+    PAGE_CACHE_MIN_CONFIDENCE: float = 0.85
+    PAGE_CACHE_STORE_TEXT: bool = False
+
+    HEURISTIC_CLASSIFIER_ENABLED: bool = True
+    HEURISTIC_MIN_CONFIDENCE: float = 0.9
+    HEURISTIC_TFIDF_MODEL_PATH: str | None = None
+
+    # Prompt compaction and per-node token budgets for the page text of one LLM call
+    PROMPT_COMPACTION_ENABLED: bool = True
+    PROMPT_REPEATED_LINE_SHARE: float = 0.5
+    ID_AGENT_TOKEN_BUDGET: int = 8_000
+    DISCHARGE_AGENT_TOKEN_BUDGET: int = 16_000
+    BILL_AGENT_TOKEN_BUDGET: int = 24_000
+    # Bill pages per concurrent extraction call (map-reduce)
+    BILL_AGENT_CHUNK_PAGES: int = 1
 
     LANGGRAPH_RECURSION_LIMIT: int
+    PIPELINE_MAX_CONCURRENCY: int = 32
+
+    # Per-request profiling (POST /api/process with X-Profile-Token); unset token = disabled
+    PROFILE_ADMIN_TOKEN: SecretStr | None = None
+    PROFILE_DIR: str | None = None
+    PROFILE_SAMPLE_INTERVAL_MS: int = 5
+
+    # Batch ingestion (POST /api/batch)
+    BATCH_MAX_FILES: int = 100
+    BATCH_MAX_SIZE_MB: int = 500
+    BATCH_MAX_CONCURRENCY: int = 8
+    BATCH_PERSIST_GROUP_SIZE: int = 16
+
+    # Background job queue (POST /api/jobs); 0 workers disables processing in this replica
+    JOB_WORKER_CONCURRENCY: int = 2
+    JOB_LEASE_SECONDS: int = 300
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_SECONDS: float = 5.0
+    JOB_RETRY_MAX_SECONDS: float = 300.0
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: core/metrics.py
+# description: Prometheus metrics for the PDF, pipeline, LLM and database hot paths, served at GET /metrics.
+"""
+Prometheus metrics, exposed in the text format at ``GET /metrics``.
+
+One latency histogram per hot path — PDF extraction, graph nodes, LLM
+requests, repository functions — plus token counters, in-flight gauges
+and a single ``vantage_errors_total{stage}`` counter, so a p99 spike can
+be pinned to PDF parsing, a node, the provider or Postgres.
+
+Gauges that mirror state owned elsewhere (pool sizes, queue depths) are
+callbacks registered by their owners with ``set_function`` and read at
+scrape time.
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import ParamSpec, TypeVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from app.core.profiling import record_stage
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# 5 ms .. 2 min: DB queries at the low end, whole documents and LLM calls at the high end.
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+PDF_EXTRACT_SECONDS = Histogram(
+    "vantage_pdf_extract_seconds",
+    "Time to extract every page of a document on the process pool (mode: extract, stream).",
+    ["mode"],
+    buckets=_BUCKETS,
+)
+PDF_PAGE_SECONDS = Histogram(
+    "vantage_pdf_page_seconds",
+    "Text extraction time per page, measured in the worker.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+PDF_QUEUE_DEPTH = Gauge("vantage_pdf_queue_depth", "Extraction tasks submitted to the process pool and not finished.")
+
+NODE_SECONDS = Histogram("vantage_node_seconds", "Graph node latency.", ["node"], buckets=_BUCKETS)
+CLAIMS_IN_FLIGHT = Gauge("vantage_claims_in_flight", "Claims waiting for or holding a pipeline slot.", ["state"])
+
+LLM_SECONDS = Histogram(
+    "vantage_llm_request_seconds",
+    "One LLM request, excluding rate-limiter wait (outcome: ok, error).",
+    ["node", "outcome"],
+    buckets=_BUCKETS,
+)
+LLM_WAIT_SECONDS = Histogram("vantage_llm_wait_seconds", "Time spent waiting for a rate-limiter slot.", ["node"], buckets=_BUCKETS)
+LLM_TOKENS = Counter("vantage_llm_tokens_total", "Tokens reported by the provider (direction: input, output).", ["node", "direction"])
+
+DB_SECONDS = Histogram("vantage_db_seconds", "Repository function latency, pool acquire included.", ["function"], buckets=_BUCKETS)
+DB_POOL_CONNECTIONS = Gauge("vantage_db_pool_connections", "asyncpg pool connections (state: in_use, idle).", ["state"])
+
+ERRORS = Counter("vantage_errors_total", "Failures by stage (pdf, a graph node, llm, db).", ["stage"])
+
+# Graph node the current task works for; LLM metrics are labelled with it.
+current_node: ContextVar[str] = ContextVar("current_node", default="none")
+
+
+@contextmanager
+def timed(histogram: Histogram, stage: str) -> Iterator[None]:
+    """Observe the duration of the block on *histogram*; count an exception as an error of *stage*."""
+    began = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.labels(stage).inc()
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - began)
+
+
+@contextmanager
+def node_scope(node: str) -> Iterator[None]:
+    """Time the block as graph node *node* and attribute the LLM calls made inside it to that node."""
+    token = current_node.set(node)
+    began = time.perf_counter()
+    try:
+        with timed(NODE_SECONDS.labels(node), node):
+            yield
+    finally:
+        record_stage(node, began, time.perf_counter())
+        current_node.reset(token)
+
+
+def instrument_node(node: str, fn: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+    """Wrap an async graph node in :func:`node_scope`."""
+
+    @functools.wraps(fn)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        with node_scope(node):
+            return await fn(*args, **kwargs)
+
+    return wrapper
+
+
+def db_timed(fn: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+    """Decorator for repository functions: latency under the function's name, failures as ``db`` errors."""
+    histogram = DB_SECONDS.labels(fn.__name__)
+
+    @functools.wraps(fn)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        with timed(histogram, "db"):
+            return await fn(*args, **kwargs)
+
+    return wrapper
+
+
+def record_llm_tokens(usage: dict) -> None:
+    node = current_node.get()
+    LLM_TOKENS.labels(node, "input").inc(usage.get("input_tokens") or 0)
+    LLM_TOKENS.labels(node, "output").inc(usage.get("output_tokens") or 0)
+
+
+def render() -> tuple[bytes, str]:
+    """The current metrics and their content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: core/profiling.py
+# description: Opt-in per-request profiling — stack sampling of the API process and extraction workers plus a stage timeline.
+"""
+Opt-in profiling of a single request.
+
+A :func:`profiled` block (``POST /api/process`` with an admin
+``X-Profile-Token`` header) collects:
+
+- a sampling profile of the API process: a background thread reads every
+  thread's stack every ``PROFILE_SAMPLE_INTERVAL_MS``.  It sees the whole
+  process, so work for other requests running at the same time shows up
+  too;
+- a sampling profile of the extraction workers, for the tasks submitted
+  on behalf of this request only (see :func:`sampled_call`);
+- a wall-clock timeline of the stages: PDF parse, every graph node, every
+  LLM request and the DB save.
+
+Both are written to ``PROFILE_DIR`` as ``<id>.folded`` (collapsed stacks,
+for flamegraph.pl or speedscope) and ``<id>.json`` (timeline and totals).
+
+Outside such a block the hooks cost one ``ContextVar.get()`` each.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.core.config import settings
+
+_session: ContextVar[ProfileSession | None] = ContextVar("profile_session", default=None)
+
+ARTIFACTS = {"json": "application/json", "folded": "text/plain"}
+
+
+def profile_dir() -> Path:
+    return Path(settings.PROFILE_DIR or Path(tempfile.gettempdir()) / "vantage-profiles")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = Path(code.co_filename)
+    return f"{code.co_qualname} ({path.parent.name}/{path.name}:{code.co_firstlineno})"
+
+
+def _fold(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Counts the stacks of the threads of this process (or only *thread_ids*), sampled every *interval* seconds."""
+
+    def __init__(self, interval: float, thread_ids: set[int] | None = None) -> None:
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                self.stacks[f"{names.get(thread_id, thread_id)};{_fold(frame)}"] += 1
+
+
+def sampled_call(interval: float, fn: Callable, *args):
+    """Run ``fn(*args)`` in a pool worker while sampling its main thread; returns ``(result, stacks)``."""
+    sampler = StackSampler(interval, {threading.main_thread().ident})
+    sampler.start()
+    try:
+        result = fn(*args)
+    finally:
+        sampler.stop()
+    return result, dict(sampler.stacks)
+
+
+class ProfileSession:
+    """Everything recorded for one profiled request."""
+
+    def __init__(self, label: str, interval_ms: int) -> None:
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.interval = max(1, interval_ms) / 1000
+        self.started_at = datetime.now(timezone.utc)
+        self.began = time.perf_counter()
+        self.wall_seconds = 0.0
+        self.stages: list[tuple[str, float, float]] = []
+        self.worker_stacks: Counter[str] = Counter()
+        self.sampler = StackSampler(self.interval)
+
+    def add_stage(self, name: str, began: float, ended: float) -> None:
+        self.stages.append((name, began - self.began, ended - began))
+
+    def add_worker_stacks(self, stacks: dict[str, int]) -> None:
+        self.worker_stacks.update({f"extraction-worker;{stack}": n for stack, n in stacks.items()})
+
+    def summary(self) -> dict:
+        totals: dict[str, float] = {}
+        for name, _, seconds in self.stages:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return {
+            "profile_id": self.id,
+            "label": self.label,
+            "started_at": self.started_at.isoformat(),
+            "wall_ms": round(self.wall_seconds * 1000, 1),
+            "sample_interval_ms": round(self.interval * 1000, 1),
+            "samples": {"api": sum(self.sampler.stacks.values()), "workers": sum(self.worker_stacks.values())},
+            "stage_totals_ms": {name: round(seconds * 1000, 1) for name, seconds in totals.items()},
+            "stages": [
+                {"name": name, "start_ms": round(start * 1000, 1), "duration_ms": round(seconds * 1000, 1)}
+                for name, start, seconds in sorted(self.stages, key=lambda s: s[1])
+            ],
+        }
+
+    def save(self) -> None:
+        """Write ``<id>.json`` and ``<id>.folded`` to ``PROFILE_DIR``."""
+        directory = profile_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        stacks = self.sampler.stacks + self.worker_stacks
+        folded = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        (directory / f"{self.id}.folded").write_text(folded, encoding="utf-8")
+        (directory / f"{self.id}.json").write_text(json.dumps(self.summary(), indent=2), encoding="utf-8")
+
+
+@contextmanager
+def profiled(label: str) -> Iterator[ProfileSession]:
+    """Profile the block (call :meth:`ProfileSession.save` afterwards to keep the result)."""
+    session = ProfileSession(label, settings.PROFILE_SAMPLE_INTERVAL_MS)
+    token = _session.set(session)
+    session.sampler.start()
+    try:
+        yield session
+    finally:
+        session.sampler.stop()
+        session.wall_seconds = time.perf_counter() - session.began
+        _session.reset(token)
+
+
+def active_session() -> ProfileSession | None:
+    return _session.get()
+
+
+def record_stage(name: str, began: float, ended: float) -> None:
+    """Add a stage (``perf_counter`` bounds) to the timeline of the request being profiled, if any."""
+    session = _session.get()
+    if session is not None:
+        session.add_stage(name, began, ended)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the block as stage *name* of the request being profiled, if any."""
+    if _session.get() is None:
+        yield
+        return
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, began, time.perf_counter())
+
+
+def artifact_path(profile_id: str, kind: str) -> Path | None:
+    """Path of an existing artifact, or ``None`` (ids are 32 hex digits, so nothing outside ``PROFILE_DIR`` resolves)."""
+    if kind not in ARTIFACTS or len(profile_id) != 32 or any(c not in "0123456789abcdef" for c in profile_id):
+        return None
+    path = profile_dir() / f"{profile_id}.{kind}"
+    return path if path.is_file() else None
@@ -7,6 +7,7 @@ import logging
 import asyncpg
 
 from app.core.config import settings
+from app.core.metrics import DB_POOL_CONNECTIONS
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +38,16 @@ async def close_pool() -> None:
         logger.info("asyncpg pool closed")
 
 
+DB_POOL_CONNECTIONS.labels("idle").set_function(lambda: _pool.get_idle_size() if _pool is not None else 0)
+DB_POOL_CONNECTIONS.labels("in_use").set_function(lambda: _pool.get_size() - _pool.get_idle_size() if _pool is not None else 0)
+
+
 def get_pool() -> asyncpg.Pool:
     if _pool is None:
         raise RuntimeError("Database pool is not initialised. Call init_pool() first.")
     return _pool
+
+
+async def connect() -> asyncpg.Connection:
+    """A dedicated connection outside the pool, for LISTEN (which holds its connection for good)."""
+    return await asyncpg.connect(dsn=_dsn())
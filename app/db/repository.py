@@ -2,96 +2,178 @@
 
 from __future__ import annotations
 
+import base64
 import json
 import logging
+from dataclasses import dataclass
+from datetime import datetime
 
+from app.core.metrics import db_timed
 from app.db.connection import get_pool
-from app.models.schema import (
-    BillLineItem,
-    ClaimSummary,
-    DischargeSummaryInfo,
-    DocumentType,
-    IdentityInfo,
-    ItemizedBillInfo,
-    PageClassification,
-    ProcessResponse,
-)
+from app.models.schema import ClaimSummary, CountMode, ProcessResponse
 
 logger = logging.getLogger(__name__)
 
 
 # Write
-async def save_claim_result(response: ProcessResponse) -> int:
-    """Insert the full pipeline output into Postgres in a single transaction."""
+# Identity values reserved up front, so parent and child rows can be written in
+# bulk: the row order of INSERT ... RETURNING is not guaranteed to match the input.
+_NEXT_IDS_SQL = "SELECT array(SELECT nextval(pg_get_serial_sequence($1, 'id')) FROM generate_series(1, $2))"
+
+_INSERT_CLAIMS_SQL = """
+INSERT INTO claims (id, claim_id, cache_key) OVERRIDING SYSTEM VALUE
+SELECT * FROM unnest($1::bigint[], $2::text[], $3::text[])
+"""
+
+_INSERT_BILLS_SQL = """
+INSERT INTO itemized_bills (id, claim_fk, total_amount) OVERRIDING SYSTEM VALUE
+SELECT * FROM unnest($1::bigint[], $2::bigint[], $3::numeric[])
+"""
+
+
+async def _next_ids(conn, table: str, count: int) -> list[int]:
+    return list(await conn.fetchval(_NEXT_IDS_SQL, table, count))
+
+
+async def _insert_claim_children(conn, claims: list[tuple[int, ProcessResponse]]) -> None:
+    """
+    Insert the per-claim extraction rows of every ``(claim_pk, response)`` (caller owns the transaction).
+
+    One ``COPY`` per child table, whatever the number of claims, pages or
+    line items; bills are inserted with reserved ids so their line items
+    can be copied straight after.
+    """
+    classifications = [(pk, c.page_number, c.document_type.value, c.confidence) for pk, r in claims for c in r.segregation]
+    if classifications:
+        await conn.copy_records_to_table(
+            "page_classifications",
+            records=classifications,
+            columns=("claim_fk", "page_number", "document_type", "confidence"),
+        )
+
+    identities = [
+        (pk, i.patient_name, i.date_of_birth, json.dumps(i.id_numbers), i.policy_number, json.dumps(i.policy_details))
+        for pk, r in claims
+        if (i := r.identity)
+    ]
+    if identities:
+        await conn.copy_records_to_table(
+            "identity_extractions",
+            records=identities,
+            columns=("claim_fk", "patient_name", "date_of_birth", "id_numbers", "policy_number", "policy_details"),
+        )
+
+    summaries = [
+        (pk, json.dumps(d.diagnosis), d.admission_date, d.discharge_date, d.physician_name, json.dumps(d.physician_details), d.summary)
+        for pk, r in claims
+        if (d := r.discharge_summary)
+    ]
+    if summaries:
+        await conn.copy_records_to_table(
+            "discharge_summaries",
+            records=summaries,
+            columns=("claim_fk", "diagnosis", "admission_date", "discharge_date", "physician_name", "physician_details", "summary"),
+        )
+
+    bills = [(pk, r.itemized_bill) for pk, r in claims if r.itemized_bill]
+    if bills:
+        bill_pks = await _next_ids(conn, "itemized_bills", len(bills))
+        await conn.execute(_INSERT_BILLS_SQL, bill_pks, [pk for pk, _ in bills], [bill.total_amount for _, bill in bills])
+        items = [
+            (bill_pk, it.description, it.quantity, it.unit_price, it.amount)
+            for bill_pk, (_, bill) in zip(bill_pks, bills)
+            for it in bill.items
+        ]
+        if items:
+            await conn.copy_records_to_table(
+                "bill_line_items",
+                records=items,
+                columns=("bill_fk", "description", "quantity", "unit_price", "amount"),
+            )
+
+
+async def save_claim_result(response: ProcessResponse, cache_key: str | None = None) -> int:
+    """
+    Insert the full pipeline output into Postgres in a single transaction.
+
+    *cache_key* identifies the source document (see ``app.services.result_cache``)
+    so identical resubmissions can be answered from this row.
+    """
+    (claim_pk,) = await save_claim_results([(response, cache_key)])
+    return claim_pk
+
+
+@db_timed
+async def save_claim_results(results: list[tuple[ProcessResponse, str | None]]) -> list[int]:
+    """
+    Insert several ``(response, cache_key)`` pipeline outputs in one transaction; returns their claim pks.
+
+    The round trips are fixed — reserve ids, insert the claims, one bulk
+    write per child table, then the result snapshots — however many claims,
+    pages and line items the batch holds.
+    """
+    if not results:
+        return []
     pool = get_pool()
 
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            claim_pks = await _next_ids(conn, "claims", len(results))
+            await conn.execute(
+                _INSERT_CLAIMS_SQL,
+                claim_pks,
+                [response.claim_id for response, _ in results],
+                [cache_key for _, cache_key in results],
+            )
+            await _insert_claim_children(conn, [(claim_pk, response) for claim_pk, (response, _) in zip(claim_pks, results)])
+            await conn.execute(_MARK_PROCESSED_SQL, claim_pks)
+
+    for claim_pk, (response, _) in zip(claim_pks, results):
+        logger.info("Saved claim result pk=%d for claim_id=%s", claim_pk, response.claim_id)
+    return claim_pks
+
+
+# Incremental writes (streaming endpoint): the claim row goes in with its
+# segregation, the extraction parts follow as the agents finish.
+@db_timed
+async def start_claim(response: ProcessResponse, cache_key: str | None = None) -> int:
+    """Insert a ``running`` claim with whatever parts *response* already holds; returns its pk."""
+    pool = get_pool()
     async with pool.acquire() as conn:
         async with conn.transaction():
             claim_pk: int = await conn.fetchval(
-                "INSERT INTO claims (claim_id) VALUES ($1) RETURNING id",
+                "INSERT INTO claims (claim_id, cache_key, status) VALUES ($1, $2, 'running') RETURNING id",
                 response.claim_id,
+                cache_key,
             )
-
-            if response.segregation:
-                await conn.executemany(
-                    """INSERT INTO page_classifications (claim_fk, page_number, document_type, confidence)
-                       VALUES ($1, $2, $3, $4)""",
-                    [(claim_pk, c.page_number, c.document_type.value, c.confidence) for c in response.segregation],
-                )
-
-            if response.identity:
-                ident = response.identity
-                await conn.execute(
-                    """INSERT INTO identity_extractions
-                       (claim_fk, patient_name, date_of_birth, id_numbers, policy_number, policy_details)
-                       VALUES ($1, $2, $3, $4::jsonb, $5, $6::jsonb)""",
-                    claim_pk,
-                    ident.patient_name,
-                    ident.date_of_birth,
-                    json.dumps(ident.id_numbers),
-                    ident.policy_number,
-                    json.dumps(ident.policy_details),
-                )
-
-            if response.discharge_summary:
-                ds = response.discharge_summary
-                await conn.execute(
-                    """INSERT INTO discharge_summaries
-                       (claim_fk, diagnosis, admission_date, discharge_date,
-                        physician_name, physician_details, summary)
-                       VALUES ($1, $2::jsonb, $3, $4, $5, $6::jsonb, $7)""",
-                    claim_pk,
-                    json.dumps(ds.diagnosis),
-                    ds.admission_date,
-                    ds.discharge_date,
-                    ds.physician_name,
-                    json.dumps(ds.physician_details),
-                    ds.summary,
-                )
-
-            if response.itemized_bill:
-                bill = response.itemized_bill
-                bill_pk: int = await conn.fetchval(
-                    """INSERT INTO itemized_bills (claim_fk, total_amount)
-                       VALUES ($1, $2) RETURNING id""",
-                    claim_pk,
-                    bill.total_amount,
-                )
-                if bill.items:
-                    await conn.executemany(
-                        """INSERT INTO bill_line_items
-                           (bill_fk, description, quantity, unit_price, amount)
-                           VALUES ($1, $2, $3, $4, $5)""",
-                        [(bill_pk, it.description, it.quantity, it.unit_price, it.amount) for it in bill.items],
-                    )
-
-    logger.info("Saved claim result pk=%d for claim_id=%s", claim_pk, response.claim_id)
+            await _insert_claim_children(conn, [(claim_pk, response)])
     return claim_pk
 
 
-# Single-query fetch (1 round-trip)
+@db_timed
+async def save_claim_parts(claim_pk: int, response: ProcessResponse) -> None:
+    """Insert the parts set on *response* (identity, discharge summary, bill) under an existing claim."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await _insert_claim_children(conn, [(claim_pk, response)])
+
+
+@db_timed
+async def set_claim_status(claim_pk: int, status: str) -> None:
+    """Set the status of a claim; ``processed`` also writes its result snapshot."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        if status == "processed":
+            await conn.execute(_MARK_PROCESSED_SQL, [claim_pk])
+        else:
+            await conn.execute("UPDATE claims SET status = $2 WHERE id = $1", claim_pk, status)
+
+
+# Read
+# The response as the child tables hold it; ProcessResponse's field names and shape.
 
-_FETCH_ONE_SQL = """
+_FETCH_SELECT_SQL = """
 SELECT
     c.claim_id,
     COALESCE(
@@ -130,79 +212,471 @@ SELECT
     ) FROM itemized_bills ib WHERE ib.claim_fk = c.id) AS itemized_bill
 
 FROM claims c
-WHERE c.claim_id = $1
-ORDER BY c.created_at DESC
-LIMIT 1;
 """
 
+def _snapshot_of(claim_pk_sql: str) -> str:
+    """A scalar subquery: the ``ProcessResponse`` JSON of the claim with pk *claim_pk_sql*, built from the child tables."""
+    return f"(SELECT to_jsonb(s) FROM ({_FETCH_SELECT_SQL}WHERE c.id = {claim_pk_sql}) s)"
 
-def _parse_row(row) -> ProcessResponse:
-    """Hydrate a ProcessResponse from a single aggregated DB row."""
-    seg_raw = row["segregation"] if isinstance(row["segregation"], list) else json.loads(row["segregation"])
-    segregation = [
-        PageClassification(page_number=s["page_number"], document_type=DocumentType(s["document_type"]), confidence=float(s["confidence"]))
-        for s in seg_raw
-    ]
 
-    id_raw = row["identity"]
-    if id_raw and isinstance(id_raw, str):
-        id_raw = json.loads(id_raw)
-    identity = IdentityInfo(**id_raw) if id_raw else None
-
-    ds_raw = row["discharge_summary"]
-    if ds_raw and isinstance(ds_raw, str):
-        ds_raw = json.loads(ds_raw)
-    discharge_summary = DischargeSummaryInfo(**ds_raw) if ds_raw else None
-
-    bill_raw = row["itemized_bill"]
-    if bill_raw and isinstance(bill_raw, str):
-        bill_raw = json.loads(bill_raw)
-    itemized_bill = None
-    if bill_raw:
-        itemized_bill = ItemizedBillInfo(
-            total_amount=float(bill_raw["total_amount"]) if bill_raw["total_amount"] is not None else None,
-            items=[BillLineItem(**it) for it in bill_raw.get("items", [])],
+# Claims are immutable once processed, so the response is built once, when the
+# claim is completed, and kept in claims.result_snapshot (migration 008).
+_MARK_PROCESSED_SQL = f"""
+UPDATE claims u
+SET status = 'processed', result_snapshot = {_snapshot_of("u.id")}
+WHERE u.id = ANY($1::bigint[])
+"""
+
+# Rows without a snapshot (completed before migration 008 by a replica that did
+# not write one) are aggregated on the fly, in the same shape.
+_FETCH_JSON_SQL = f"""
+SELECT COALESCE(o.result_snapshot, {_snapshot_of("o.id")})::text
+FROM claims o
+WHERE o.claim_id = $1
+  AND o.status = 'processed'
+ORDER BY o.created_at DESC
+LIMIT 1
+"""
+
+_FETCH_JSON_BY_CACHE_KEY_SQL = f"""
+SELECT COALESCE(o.result_snapshot, {_snapshot_of("o.id")})::text
+FROM claims o
+WHERE o.cache_key = $1
+  AND o.status = 'processed'
+  AND o.created_at >= now() - make_interval(secs => $2)
+ORDER BY o.created_at DESC
+LIMIT 1
+"""
+
+
+@db_timed
+async def fetch_claim_json(claim_id: str) -> bytes | None:
+    """The newest processed claim *claim_id* as ``ProcessResponse`` JSON, read from its snapshot in one index lookup."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        body: str | None = await conn.fetchval(_FETCH_JSON_SQL, claim_id)
+    return body.encode() if body is not None else None
+
+
+async def fetch_claim_result(claim_id: str) -> ProcessResponse | None:
+    """Like :func:`fetch_claim_json`, as a model."""
+    body = await fetch_claim_json(claim_id)
+    return ProcessResponse.model_validate_json(body) if body is not None else None
+
+
+@db_timed
+async def fetch_result_by_cache_key(cache_key: str, max_age_seconds: float) -> ProcessResponse | None:
+    """Fetch the newest claim stored under *cache_key* that is at most *max_age_seconds* old."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        body: str | None = await conn.fetchval(_FETCH_JSON_BY_CACHE_KEY_SQL, cache_key, float(max_age_seconds))
+    return ProcessResponse.model_validate_json(body) if body is not None else None
+
+
+# Page classification cache
+@db_timed
+async def fetch_page_cache_entries(fingerprints: list[str], max_age_seconds: float) -> list[tuple[str, str, float]]:
+    """Return ``(fingerprint, document_type, confidence)`` for fresh entries, marking them as used."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """UPDATE page_classification_cache
+               SET last_hit_at = now()
+               WHERE fingerprint = ANY($1::text[])
+                 AND created_at >= now() - make_interval(secs => $2)
+               RETURNING fingerprint, document_type, confidence""",
+            fingerprints,
+            float(max_age_seconds),
+        )
+    return [(r["fingerprint"], r["document_type"], float(r["confidence"])) for r in rows]
+
+
+@db_timed
+async def save_page_cache_entries(entries: list[tuple[str, str, float, str | None]]) -> None:
+    """Upsert ``(fingerprint, document_type, confidence, sample_text)`` rows."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        await conn.executemany(
+            """INSERT INTO page_classification_cache (fingerprint, document_type, confidence, sample_text)
+               VALUES ($1, $2, $3, $4)
+               ON CONFLICT (fingerprint) DO UPDATE
+               SET document_type = EXCLUDED.document_type,
+                   confidence    = EXCLUDED.confidence,
+                   sample_text   = COALESCE(EXCLUDED.sample_text, page_classification_cache.sample_text),
+                   created_at    = now(),
+                   last_hit_at   = now()""",
+            entries,
+        )
+
+
+@db_timed
+async def fetch_labelled_pages(limit: int) -> list[tuple[str, str, float]]:
+    """``(sample_text, document_type, confidence)`` of LLM-labelled pages that kept a text sample."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """SELECT sample_text, document_type, confidence
+               FROM page_classification_cache
+               WHERE sample_text IS NOT NULL
+               ORDER BY fingerprint
+               LIMIT $1""",
+            limit,
         )
+    return [(r["sample_text"], r["document_type"], float(r["confidence"])) for r in rows]
+
+
+@db_timed
+async def prune_page_cache(max_age_seconds: float, max_rows: int) -> int:
+    """Delete expired entries, then the least recently used ones beyond *max_rows*."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        expired = await conn.execute(
+            "DELETE FROM page_classification_cache WHERE created_at < now() - make_interval(secs => $1)",
+            float(max_age_seconds),
+        )
+        overflow = await conn.execute(
+            """DELETE FROM page_classification_cache
+               WHERE fingerprint IN (
+                   SELECT fingerprint FROM page_classification_cache
+                   ORDER BY last_hit_at DESC
+                   OFFSET $1
+               )""",
+            max_rows,
+        )
+    return int(expired.split()[-1]) + int(overflow.split()[-1])
+
+
+# Job queue (POST /api/jobs); lifecycle lives in claims.status
+@dataclass(frozen=True)
+class ClaimJob:
+    job_pk: int
+    claim_pk: int
+    claim_id: str
+    cache_key: str | None
+    pdf: bytes
+    attempts: int
+    max_attempts: int
+
+
+_CLAIM_JOB_SQL = """
+WITH next_job AS (
+    SELECT id
+    FROM claim_jobs
+    WHERE finished_at IS NULL
+      AND run_after <= now()
+      AND (lease_expires_at IS NULL OR lease_expires_at < now())
+      AND attempts < max_attempts
+    ORDER BY run_after
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE claim_jobs j
+SET attempts = j.attempts + 1,
+    lease_expires_at = now() + make_interval(secs => $1),
+    updated_at = now()
+FROM next_job
+WHERE j.id = next_job.id
+RETURNING j.id, j.claim_fk, j.pdf, j.attempts, j.max_attempts;
+"""
+
+
+@db_timed
+async def enqueue_claim_job(claim_id: str, pdf: bytes, max_attempts: int, cache_key: str | None = None) -> int:
+    """Create a ``queued`` claim and its job row; returns the claim pk."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            claim_pk: int = await conn.fetchval(
+                "INSERT INTO claims (claim_id, cache_key, status) VALUES ($1, $2, 'queued') RETURNING id",
+                claim_id,
+                cache_key,
+            )
+            await conn.execute(
+                "INSERT INTO claim_jobs (claim_fk, pdf, max_attempts) VALUES ($1, $2, $3)",
+                claim_pk,
+                pdf,
+                max_attempts,
+            )
+    logger.info("Queued job for claim_id=%s (%d bytes)", claim_id, len(pdf))
+    return claim_pk
+
 
-    return ProcessResponse(
-        claim_id=row["claim_id"],
-        segregation=segregation,
-        identity=identity,
-        discharge_summary=discharge_summary,
-        itemized_bill=itemized_bill,
+@db_timed
+async def claim_next_job(lease_seconds: float) -> ClaimJob | None:
+    """Lease the oldest runnable job (``FOR UPDATE SKIP LOCKED``) and mark its claim ``running``."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            job = await conn.fetchrow(_CLAIM_JOB_SQL, float(lease_seconds))
+            if job is None:
+                return None
+            claim = await conn.fetchrow(
+                "UPDATE claims SET status = 'running' WHERE id = $1 RETURNING claim_id, cache_key",
+                job["claim_fk"],
+            )
+    return ClaimJob(
+        job_pk=job["id"],
+        claim_pk=job["claim_fk"],
+        claim_id=claim["claim_id"],
+        cache_key=claim["cache_key"],
+        pdf=bytes(job["pdf"]),
+        attempts=job["attempts"],
+        max_attempts=job["max_attempts"],
     )
 
 
-async def fetch_claim_result(claim_id: str) -> ProcessResponse | None:
-    """Fetch a full claim in a single DB round-trip."""
+@db_timed
+async def renew_job_lease(job: ClaimJob, lease_seconds: float) -> bool:
+    """Extend the lease of *job*; ``False`` if this attempt no longer owns it."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        renewed = await conn.fetchval(
+            """UPDATE claim_jobs
+               SET lease_expires_at = now() + make_interval(secs => $3), updated_at = now()
+               WHERE id = $1 AND attempts = $2 AND finished_at IS NULL
+               RETURNING id""",
+            job.job_pk,
+            job.attempts,
+            float(lease_seconds),
+        )
+    return renewed is not None
+
+
+@db_timed
+async def complete_claim_job(job: ClaimJob, response: ProcessResponse) -> bool:
+    """
+    Store the result of *job* and mark its claim ``processed`` in one transaction.
+
+    Returns ``False`` (and writes nothing) if the lease was lost to another
+    worker in the meantime.
+    """
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            owned = await conn.fetchval(
+                """UPDATE claim_jobs
+                   SET finished_at = now(), pdf = NULL, lease_expires_at = NULL, last_error = NULL, updated_at = now()
+                   WHERE id = $1 AND attempts = $2 AND finished_at IS NULL
+                   RETURNING id""",
+                job.job_pk,
+                job.attempts,
+            )
+            if owned is None:
+                return False
+            await _insert_claim_children(conn, [(job.claim_pk, response)])
+            await conn.execute(_MARK_PROCESSED_SQL, [job.claim_pk])
+    logger.info("Completed job for claim_id=%s on attempt %d", job.claim_id, job.attempts)
+    return True
+
+
+@db_timed
+async def retry_claim_job(job: ClaimJob, error: str, delay_seconds: float) -> None:
+    """Put *job* back in the queue to run again after *delay_seconds*."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            updated = await conn.fetchval(
+                """UPDATE claim_jobs
+                   SET run_after = now() + make_interval(secs => $3), lease_expires_at = NULL,
+                       last_error = $4, updated_at = now()
+                   WHERE id = $1 AND attempts = $2 AND finished_at IS NULL
+                   RETURNING id""",
+                job.job_pk,
+                job.attempts,
+                float(delay_seconds),
+                error,
+            )
+            if updated is not None:
+                await conn.execute("UPDATE claims SET status = 'queued' WHERE id = $1", job.claim_pk)
+
+
+@db_timed
+async def release_claim_job(job: ClaimJob) -> None:
+    """Hand *job* back without spending an attempt (worker shutdown)."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            updated = await conn.fetchval(
+                """UPDATE claim_jobs
+                   SET attempts = attempts - 1, lease_expires_at = NULL, updated_at = now()
+                   WHERE id = $1 AND attempts = $2 AND finished_at IS NULL
+                   RETURNING id""",
+                job.job_pk,
+                job.attempts,
+            )
+            if updated is not None:
+                await conn.execute("UPDATE claims SET status = 'queued' WHERE id = $1", job.claim_pk)
+
+
+@db_timed
+async def fail_claim_job(job: ClaimJob, error: str) -> None:
+    """Give up on *job* and mark its claim ``failed``."""
     pool = get_pool()
     async with pool.acquire() as conn:
-        row = await conn.fetchrow(_FETCH_ONE_SQL, claim_id)
+        async with conn.transaction():
+            updated = await conn.fetchval(
+                """UPDATE claim_jobs
+                   SET finished_at = now(), pdf = NULL, lease_expires_at = NULL, last_error = $3, updated_at = now()
+                   WHERE id = $1 AND attempts = $2 AND finished_at IS NULL
+                   RETURNING id""",
+                job.job_pk,
+                job.attempts,
+                error,
+            )
+            if updated is not None:
+                await conn.execute("UPDATE claims SET status = 'failed' WHERE id = $1", job.claim_pk)
+    logger.warning("Job for claim_id=%s failed after %d attempt(s): %s", job.claim_id, job.attempts, error)
+
+
+@db_timed
+async def fail_abandoned_jobs() -> int:
+    """Fail jobs whose last allowed attempt lost its lease (worker crashed mid-run)."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            claim_pks = await conn.fetch(
+                """UPDATE claim_jobs
+                   SET finished_at = now(), pdf = NULL, lease_expires_at = NULL,
+                       last_error = COALESCE(last_error, 'lease expired'), updated_at = now()
+                   WHERE finished_at IS NULL
+                     AND attempts >= max_attempts
+                     AND lease_expires_at < now()
+                   RETURNING claim_fk"""
+            )
+            if claim_pks:
+                await conn.execute("UPDATE claims SET status = 'failed' WHERE id = ANY($1::bigint[])", [r["claim_fk"] for r in claim_pks])
+    return len(claim_pks)
+
+
+@db_timed
+async def fetch_job_status(claim_id: str) -> tuple[str, int, str | None] | None:
+    """``(status, attempts, last_error)`` of the newest claim with *claim_id*."""
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(
+            """SELECT c.status, COALESCE(j.attempts, 0) AS attempts, j.last_error
+               FROM claims c
+               LEFT JOIN claim_jobs j ON j.claim_fk = c.id
+               WHERE c.claim_id = $1
+               ORDER BY c.created_at DESC
+               LIMIT 1""",
+            claim_id,
+        )
     if row is None:
         return None
-    return _parse_row(row)
+    return row["status"], row["attempts"], row["last_error"]
 
 
 # List all claims
-_LIST_SQL = """
-SELECT claim_id, status, created_at
+@dataclass(frozen=True)
+class ClaimFilter:
+    """Filters of ``GET /api/claims``; every combination is served by an index from migration 006."""
+
+    status: str | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+    def where(self, first_param: int = 1) -> tuple[list[str], list]:
+        """SQL conditions (numbered from ``$first_param``) and their arguments."""
+        conditions, args = [], []
+        for sql, value in (("status = ${}", self.status), ("created_at >= ${}", self.created_from), ("created_at < ${}", self.created_to)):
+            if value is not None:
+                args.append(value)
+                conditions.append(sql.format(first_param + len(args) - 1))
+        return conditions, args
+
+    def literal_where(self) -> str:
+        """The same conditions with inlined literals, for EXPLAIN (values are a validated status and datetimes)."""
+        conditions = []
+        if self.status is not None:
+            status = self.status.replace("'", "''")
+            conditions.append(f"status = '{status}'")
+        if self.created_from is not None:
+            conditions.append(f"created_at >= '{self.created_from.isoformat()}'::timestamptz")
+        if self.created_to is not None:
+            conditions.append(f"created_at < '{self.created_to.isoformat()}'::timestamptz")
+        return " AND ".join(conditions)
+
+
+def encode_cursor(created_at: datetime, claim_pk: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{claim_pk}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of :func:`encode_cursor`; ``ValueError`` for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, claim_pk = raw.split("|")
+        parsed = datetime.fromisoformat(created_at)
+        if parsed.tzinfo is None:
+            raise ValueError("naive timestamp")
+        return parsed, int(claim_pk)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor.") from exc
+
+
+async def _count_claims(conn, claim_filter: ClaimFilter, mode: CountMode) -> int | None:
+    conditions, args = claim_filter.where()
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    if mode == CountMode.EXACT:
+        return await conn.fetchval(f"SELECT count(*) FROM claims{where}", *args)
+
+    if conditions:
+        plan = await conn.fetchval(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM claims WHERE {claim_filter.literal_where()}")
+        return int((json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]["Plan Rows"])
+
+    # reltuples is -1 until the table is first vacuumed/analyzed; it is small then, so count it.
+    estimate = await conn.fetchval("SELECT reltuples::bigint FROM pg_class WHERE oid = 'claims'::regclass")
+    if estimate is None or estimate < 0:
+        return await conn.fetchval("SELECT count(*) FROM claims")
+    return estimate
+
+
+@db_timed
+async def fetch_all_claims(
+    limit: int = 20,
+    offset: int = 0,
+    cursor: str | None = None,
+    claim_filter: ClaimFilter = ClaimFilter(),
+    count: CountMode = CountMode.ESTIMATE,
+) -> tuple[list[ClaimSummary], int | None, str | None]:
+    """
+    One page of claim summaries, newest first, with the total and the next page's cursor.
+
+    Pages are addressed by keyset on ``(created_at, id)``: pass the
+    returned cursor to get the next page at the same index-range cost
+    however deep it is.  *offset* is still honoured for old clients.
+    The total is a planner estimate by default (``count=exact`` for a real
+    count, ``count=none`` to skip it).
+
+    Raises:
+        ValueError: If *cursor* is malformed.
+    """
+    conditions, args = claim_filter.where()
+    if cursor is not None:
+        created_at, claim_pk = decode_cursor(cursor)
+        args += [created_at, claim_pk]
+        conditions.append(f"(created_at, id) < (${len(args) - 1}, ${len(args)})")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    args += [limit + 1, offset]
+    sql = f"""
+SELECT id, claim_id, status, created_at
 FROM claims
-ORDER BY created_at DESC
-LIMIT $1 OFFSET $2;
+{where}
+ORDER BY created_at DESC, id DESC
+LIMIT ${len(args) - 1} OFFSET ${len(args)}
 """
 
-_COUNT_SQL = "SELECT count(*) FROM claims;"
-
-
-async def fetch_all_claims(limit: int = 20, offset: int = 0) -> tuple[list[ClaimSummary], int]:
-    """Return paginated claim summaries and total count."""
     pool = get_pool()
     async with pool.acquire() as conn:
-        total: int = await conn.fetchval(_COUNT_SQL)
-        rows = await conn.fetch(_LIST_SQL, limit, offset)
+        rows = await conn.fetch(sql, *args)
+        total = None if count == CountMode.NONE else await _count_claims(conn, claim_filter, count)
 
+    more = len(rows) > limit
+    rows = rows[:limit]
     items = [
         ClaimSummary(claim_id=r["claim_id"], status=r["status"], created_at=r["created_at"])
         for r in rows
     ]
-    return items, total
+    next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"]) if more and rows else None
+    return items, total, next_cursor
@@ -0,0 +1,184 @@
+"""
+Write-behind buffer for claim results.
+
+Under high ingest rates most of the cost of ``save_claim_result`` is the
+per-claim transaction: connection hold time and one commit (WAL flush) per
+claim.  The buffer collects results from concurrent requests and writes
+them with one ``save_claim_results`` call — a single transaction — when
+``DB_WRITE_BUFFER_MAX_CLAIMS`` are waiting or ``DB_WRITE_BUFFER_FLUSH_MS``
+after the first of them arrived, whichever comes first.
+
+Semantics:
+
+- **Durability.** :meth:`ClaimWriteBuffer.save` returns only after the
+  transaction holding the claim has committed, so a caller that got a
+  claim pk back may acknowledge the request as before.  Claims still in
+  the buffer when the process dies are lost, but none of them has been
+  acknowledged to anyone.
+- **Errors.** When a group transaction fails, every claim of the group is
+  retried once on its own; only the claims that fail alone raise (the
+  original database error) from :meth:`save`.  A bad row never fails its
+  neighbours.
+- **Cancellation.** A caller that is cancelled while waiting does not
+  withdraw its claim: the write still happens.
+- **Shutdown.** :meth:`close` stops accepting claims (``RuntimeError``),
+  flushes everything already buffered and waits for it to commit.
+
+The buffer adds up to ``DB_WRITE_BUFFER_FLUSH_MS`` of latency to a lone
+request; it is off unless ``DB_WRITE_BUFFER_ENABLED`` is set.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.db.repository import save_claim_result, save_claim_results
+from app.models.schema import ProcessResponse
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingWrite:
+    response: ProcessResponse
+    cache_key: str | None
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class ClaimWriteBuffer:
+    """Groups claim writes from concurrent callers into one transaction per flush."""
+
+    def __init__(self, max_claims: int = settings.DB_WRITE_BUFFER_MAX_CLAIMS, flush_ms: int = settings.DB_WRITE_BUFFER_FLUSH_MS) -> None:
+        self.max_claims = max(1, max_claims)
+        self.flush_seconds = max(0, flush_ms) / 1000
+        self._pending: list[_PendingWrite] = []
+        self._has_pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self._flushes = 0
+        self._claims_written = 0
+        self._fallbacks = 0
+        self._failed_claims = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="claim-write-buffer")
+
+    async def close(self) -> None:
+        """Stop accepting claims and flush what is buffered."""
+        self._closing = True
+        self._has_pending.set()
+        self._full.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def save(self, response: ProcessResponse, cache_key: str | None = None) -> int:
+        """Buffer one claim result and wait until it is committed; returns its claim pk."""
+        if self._closing or self._task is None:
+            raise RuntimeError("Claim write buffer is not running.")
+        write = _PendingWrite(response, cache_key)
+        self._pending.append(write)
+        self._has_pending.set()
+        if len(self._pending) >= self.max_claims:
+            self._full.set()
+        return await asyncio.shield(write.future)
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_pending.wait()
+            if len(self._pending) < self.max_claims and not self._closing:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_seconds)
+                except TimeoutError:
+                    pass
+
+            group, self._pending = self._pending[: self.max_claims], self._pending[self.max_claims :]
+            if group:
+                await self._flush(group)
+
+            # Claims may have arrived during the flush.
+            if not self._pending:
+                if self._closing:
+                    return
+                self._has_pending.clear()
+            if len(self._pending) < self.max_claims and not self._closing:
+                self._full.clear()
+
+    async def _flush(self, group: list[_PendingWrite]) -> None:
+        self._flushes += 1
+        try:
+            claim_pks = await save_claim_results([(w.response, w.cache_key) for w in group])
+        except Exception as exc:
+            logger.warning("Buffered write of %d claim(s) failed (%s) — retrying them one by one", len(group), exc)
+            self._fallbacks += 1
+            for write in group:
+                await self._flush_one(write)
+            return
+
+        self._claims_written += len(group)
+        for write, claim_pk in zip(group, claim_pks):
+            if not write.future.done():
+                write.future.set_result(claim_pk)
+
+    async def _flush_one(self, write: _PendingWrite) -> None:
+        try:
+            claim_pk = await save_claim_results([(write.response, write.cache_key)])
+        except Exception as exc:
+            logger.exception("Buffered write of claim_id=%s failed", write.response.claim_id)
+            self._failed_claims += 1
+            if not write.future.done():
+                write.future.set_exception(exc)
+            return
+        self._claims_written += 1
+        if not write.future.done():
+            write.future.set_result(claim_pk[0])
+
+    def stats(self) -> dict:
+        return {
+            "max_claims": self.max_claims,
+            "flush_ms": round(self.flush_seconds * 1000),
+            "pending": len(self._pending),
+            "flushes": self._flushes,
+            "claims_written": self._claims_written,
+            "claims_per_flush": round(self._claims_written / self._flushes, 2) if self._flushes else 0.0,
+            "fallback_flushes": self._fallbacks,
+            "failed_claims": self._failed_claims,
+        }
+
+
+_buffer: ClaimWriteBuffer | None = None
+
+
+def init_write_buffer() -> None:
+    """Start the process-wide buffer if ``DB_WRITE_BUFFER_ENABLED``; call from a running event loop."""
+    global _buffer
+    if _buffer is not None or not settings.DB_WRITE_BUFFER_ENABLED:
+        return
+    _buffer = ClaimWriteBuffer()
+    _buffer.start()
+    logger.info("Claim write buffer started (max %d claims / %d ms)", _buffer.max_claims, settings.DB_WRITE_BUFFER_FLUSH_MS)
+
+
+async def close_write_buffer() -> None:
+    global _buffer
+    if _buffer is not None:
+        await _buffer.close()
+        _buffer = None
+        logger.info("Claim write buffer flushed and stopped")
+
+
+def get_write_buffer() -> ClaimWriteBuffer | None:
+    """The running buffer, or ``None`` when write-behind is disabled."""
+    return _buffer
+
+
+async def save_claim(response: ProcessResponse, cache_key: str | None = None) -> int:
+    """Persist one claim result — through the write-behind buffer when enabled, directly otherwise."""
+    if _buffer is None:
+        return await save_claim_result(response, cache_key=cache_key)
+    return await _buffer.save(response, cache_key)
@@ -8,27 +8,28 @@ from __future__ import annotations
 import logging
 
 from app.graph.state import PipelineState
-from app.models.schema import DischargeSummaryInfo, IdentityInfo, ItemizedBillInfo, PageClassification
+from app.models.schema import PageClassification, ProcessResponse
 
 logger = logging.getLogger(__name__)
 
 
-def aggregator_node(state: PipelineState) -> dict:
-    """Combine segregation + extraction results into ``final_output``."""
+async def aggregator_node(state: PipelineState) -> dict:
+    """
+    Combine segregation + extraction results into ``final_output``.
+
+    The agents hand over validated models, so they are assembled as they
+    are — no dump, no re-validation.
+    """
     results = state.get("extraction_results", {})
     classifications: list[PageClassification] = state.get("page_classifications", [])
 
-    identity_raw = results.get("identity")
-    discharge_raw = results.get("discharge_summary")
-    bill_raw = results.get("itemized_bill")
-
-    final: dict = {
-        "claim_id": state["claim_id"],
-        "segregation": [c.model_dump() for c in classifications],
-        "identity": IdentityInfo(**identity_raw).model_dump() if identity_raw else None,
-        "discharge_summary": DischargeSummaryInfo(**discharge_raw).model_dump() if discharge_raw else None,
-        "itemized_bill": ItemizedBillInfo(**bill_raw).model_dump() if bill_raw else None,
-    }
+    final = ProcessResponse.model_construct(
+        claim_id=state["claim_id"],
+        segregation=classifications,
+        identity=results.get("identity"),
+        discharge_summary=results.get("discharge_summary"),
+        itemized_bill=results.get("itemized_bill"),
+    )
 
     logger.info("Aggregator built final output for claim_id=%s", state["claim_id"])
     return {"final_output": final}
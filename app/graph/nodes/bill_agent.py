@@ -1,43 +1,181 @@
 """
 Itemized Bill Agent — extracts line-item charges and computes the total
 from pages classified as ``itemized_bill``.
+
+Map-reduce: the bill pages are split into chunks of
+``BILL_AGENT_CHUNK_PAGES`` pages, every chunk is extracted concurrently,
+and the per-chunk rows are merged deterministically:
+
+- rows are ordered by page, then by their position in the chunk's answer;
+- carried/brought-forward rows are dropped (running balances, not charges);
+- a row reprinted across a page break (last row of one page, first row of
+  the next, marked "contd." / "continued") is kept once; identical rows
+  without that marker are separate charges and all kept;
+- subtotal and total rows are kept out of ``items``; tax and discount rows
+  stay in as charges, discounts negative;
+- the sum of the items is reconciled against the bill's stated total.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import re
+from enum import Enum
+
+from pydantic import BaseModel, Field
 
+from app.core.config import settings
 from app.graph.state import PipelineState
-from app.llm.provider import get_llm
-from app.models.schema import DocumentType, ItemizedBillInfo
+from app.llm.provider import ainvoke_structured
+from app.models.schema import BillLineItem, DocumentType, ItemizedBillInfo, PageData
+from app.services.compaction import PromptBlock, page_block, token_usage
 from app.services.pdf import get_page_subset
 
 logger = logging.getLogger(__name__)
 
 SYSTEM_PROMPT = """\
 You are a medical-claim itemized-bill extraction specialist.
-You will receive the text of one or more pages from a hospital itemized bill.
-
-Extract every line item and the overall total:
-- items: list of objects, each with:
-    - description (name of service / product)
-    - quantity (number of units, null if not stated)
-    - unit_price (per-unit cost, null if not stated)
-    - amount (total charge for that line item)
-- total_amount: the grand total of the bill.  If the document states a
-  total, use that value.  Otherwise sum the individual item amounts.
+You will receive the text of one or more consecutive pages from a hospital
+itemized bill; other pages of the same bill are handled separately.
+
+Extract every row that carries an amount, in the order it appears:
+- page_number (the PAGE the row is printed on)
+- description (name of service / product)
+- quantity (number of units, null if not stated)
+- unit_price (per-unit cost, null if not stated)
+- amount (total charge for that row)
+- kind, one of:
+    - item       — a charge for a service or product
+    - tax        — GST / CGST / SGST / service tax or similar
+    - discount   — discount, concession or deduction
+    - subtotal   — section, category or page total
+    - total      — grand total / net payable of the whole bill
+    - carry_over — balance brought forward / carried forward
+Also return stated_total: the grand total / net payable printed on these
+pages, or null if these pages do not state one.
 
 Rules:
-- Capture ALL line items even if some fields are missing.
+- Capture ALL rows even if some fields are missing.
 - Monetary values should be plain numbers (no currency symbols).
-- If a page contains subtotals or tax rows, include them as separate items.
+- Do not invent rows and do not add totals yourself.
+- If a row is reprinted at the top of a page as a continuation of the
+  previous page, keep its "contd." / "continued" marker in the description.
 """
 
+_CARRY_OVER = re.compile(r"\b(brought|carried)\s+(forward|fwd|over)\b|\b[bc]/f\b|balance\s+(b/?f|forward)", re.IGNORECASE)
+_SUBTOTAL = re.compile(r"^\s*(sub\s*-?\s*total|page\s+total|total|grand\s+total|net\s+(amount|payable)|total\s+amount)\b\W*$", re.IGNORECASE)
+_CONTINUED = re.compile(r"[(\[]?\b(contd|cont'd|continued)\b\.?[)\]]?", re.IGNORECASE)
+
+
+class BillRowKind(str, Enum):
+    ITEM = "item"
+    TAX = "tax"
+    DISCOUNT = "discount"
+    SUBTOTAL = "subtotal"
+    TOTAL = "total"
+    CARRY_OVER = "carry_over"
+
+
+class BillChunkRow(BillLineItem):
+    page_number: int
+    kind: BillRowKind = BillRowKind.ITEM
+
+
+class BillChunkOutput(BaseModel):
+    rows: list[BillChunkRow] = Field(default_factory=list)
+    stated_total: float | None = None
+
+
+def _chunks(pages: list[PageData], pages_per_chunk: int) -> list[list[PageData]]:
+    size = max(1, pages_per_chunk)
+    return [pages[i : i + size] for i in range(0, len(pages), size)]
 
-def bill_agent_node(state: PipelineState) -> dict:
-    """Extract bill items and write to ``extraction_results["itemized_bill"]``."""
+
+async def _extract_chunk(chunk: list[PageData], raw_tokens: dict[int, int]) -> tuple[BillChunkOutput, PromptBlock]:
+    block = page_block(chunk, settings.BILL_AGENT_TOKEN_BUDGET, raw_tokens, settings.PROMPT_REPEATED_LINE_SHARE)
+    if block.truncated:
+        logger.warning(
+            "Bill Agent: pages %d-%d cut to the %d token budget",
+            chunk[0].page_number,
+            chunk[-1].page_number,
+            settings.BILL_AGENT_TOKEN_BUDGET,
+        )
+
+    result: BillChunkOutput = await ainvoke_structured(
+        BillChunkOutput,
+        [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Extract all bill rows from the following pages:\n\n{block.text}"},
+        ],
+    )
+    # Rows attributed to a page outside the chunk are pinned to the chunk's last page.
+    wanted = {p.page_number for p in chunk}
+    for row in result.rows:
+        if row.page_number not in wanted:
+            row.page_number = chunk[-1].page_number
+    return result, block
+
+
+def _row_key(row: BillLineItem) -> tuple:
+    description = _CONTINUED.sub(" ", row.description)
+    return (" ".join(description.lower().split()), row.quantity, row.unit_price, round(row.amount, 2))
+
+
+def merge_chunks(outputs: list[BillChunkOutput]) -> tuple[ItemizedBillInfo, float | None]:
+    """
+    Merge per-chunk rows into one bill, deterministically.
+
+    Returns the bill and the total stated on the document (if any); the
+    bill's ``total_amount`` is the stated total when there is one,
+    otherwise the sum of the items.
+    """
+    indexed = [(row.page_number, chunk_no, row_no, row) for chunk_no, out in enumerate(outputs) for row_no, row in enumerate(out.rows)]
+    rows = [row for *_, row in sorted(indexed, key=lambda r: r[:3])]
+
+    # The grand total / net payable is printed last: prefer the last chunk that states one, then the last total row.
+    stated_totals = [out.stated_total for out in outputs if out.stated_total is not None]
+    stated_totals = stated_totals or [row.amount for row in rows if row.kind == BillRowKind.TOTAL]
+
+    items: list[BillLineItem] = []
+    last_key_by_page: dict[int, tuple] = {}
+    first_on_page: set[int] = set()
+    for row in rows:
+        if row.kind in (BillRowKind.CARRY_OVER, BillRowKind.SUBTOTAL, BillRowKind.TOTAL):
+            continue
+        if _CARRY_OVER.search(row.description) or _SUBTOTAL.match(row.description):
+            continue
+
+        key = _row_key(row)
+        is_first = row.page_number not in first_on_page
+        first_on_page.add(row.page_number)
+        # Continuation of the previous page's last row, reprinted after the page break.  Without the
+        # marker an identical row is a genuine repeat charge (same service on consecutive lines).
+        if is_first and _CONTINUED.search(row.description) and last_key_by_page.get(row.page_number - 1) == key:
+            continue
+        last_key_by_page[row.page_number] = key
+
+        amount = -abs(row.amount) if row.kind == BillRowKind.DISCOUNT else row.amount
+        items.append(BillLineItem(description=row.description, quantity=row.quantity, unit_price=row.unit_price, amount=amount))
+
+    stated = stated_totals[-1] if stated_totals else None
+    computed = round(sum(item.amount for item in items), 2)
+    return ItemizedBillInfo(items=items, total_amount=stated if stated is not None else (computed if items else None)), stated
+
+
+def _reconcile(bill: ItemizedBillInfo, stated: float | None) -> None:
+    if stated is None or not bill.items:
+        return
+    computed = sum(item.amount for item in bill.items)
+    tolerance = max(1.0, abs(stated) * 0.005)
+    if abs(computed - stated) > tolerance:
+        logger.warning("Bill Agent: line items sum to %.2f but the bill states %.2f (difference %.2f)", computed, stated, stated - computed)
+
+
+async def bill_agent_node(state: PipelineState) -> dict:
+    """Extract bill items chunk by chunk and write to ``extraction_results["itemized_bill"]``."""
     classifications = state["page_classifications"]
-    pages = state["pages"]
+    pages = state["prompt_pages"]
 
     target_page_nums = [c.page_number for c in classifications if c.document_type == DocumentType.ITEMIZED_BILL]
 
@@ -46,20 +184,11 @@ def bill_agent_node(state: PipelineState) -> dict:
         return {"extraction_results": {"itemized_bill": None}}
 
     subset = get_page_subset(pages, target_page_nums)
-    page_block = "\n\n".join(f"--- PAGE {p.page_number} ---\n{p.text}" for p in subset)
-
-    llm = get_llm()
-    structured_llm = llm.with_structured_output(ItemizedBillInfo)
-
-    result: ItemizedBillInfo = structured_llm.invoke(
-        [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": f"Extract all bill line items from the following pages:\n\n{page_block}"},
-        ]
-    )
+    chunks = _chunks(subset, settings.BILL_AGENT_CHUNK_PAGES)
+    results = await asyncio.gather(*(_extract_chunk(chunk, state["raw_page_tokens"]) for chunk in chunks))
 
-    if result.total_amount is None and result.items:
-        result.total_amount = sum(item.amount for item in result.items)
+    result, stated = merge_chunks([output for output, _ in results])
+    _reconcile(result, stated)
 
-    logger.info("Bill Agent extracted %d item(s), total=%.2f", len(result.items), result.total_amount or 0)
-    return {"extraction_results": {"itemized_bill": result.model_dump()}}
+    logger.info("Bill Agent extracted %d item(s) from %d chunk(s), total=%.2f", len(result.items), len(chunks), result.total_amount or 0)
+    return {"extraction_results": {"itemized_bill": result}, "token_usage": token_usage("bill_agent", *(block for _, block in results))}
@@ -7,9 +7,11 @@ from __future__ import annotations
 
 import logging
 
+from app.core.config import settings
 from app.graph.state import PipelineState
-from app.llm.provider import get_llm
+from app.llm.provider import ainvoke_structured
 from app.models.schema import DischargeSummaryInfo, DocumentType
+from app.services.compaction import page_block, token_usage
 from app.services.pdf import get_page_subset
 
 logger = logging.getLogger(__name__)
@@ -28,10 +30,10 @@ Extract the following fields. Return null for any field you cannot find:
 """
 
 
-def discharge_agent_node(state: PipelineState) -> dict:
+async def discharge_agent_node(state: PipelineState) -> dict:
     """Extract discharge info and write to ``extraction_results["discharge_summary"]``."""
     classifications = state["page_classifications"]
-    pages = state["pages"]
+    pages = state["prompt_pages"]
 
     target_page_nums = [c.page_number for c in classifications if c.document_type == DocumentType.DISCHARGE_SUMMARY]
 
@@ -40,17 +42,17 @@ def discharge_agent_node(state: PipelineState) -> dict:
         return {"extraction_results": {"discharge_summary": None}}
 
     subset = get_page_subset(pages, target_page_nums)
-    page_block = "\n\n".join(f"--- PAGE {p.page_number} ---\n{p.text}" for p in subset)
+    block = page_block(subset, settings.DISCHARGE_AGENT_TOKEN_BUDGET, state["raw_page_tokens"], settings.PROMPT_REPEATED_LINE_SHARE)
+    if block.truncated:
+        logger.warning("Discharge Agent: page text cut to the %d token budget", settings.DISCHARGE_AGENT_TOKEN_BUDGET)
 
-    llm = get_llm()
-    structured_llm = llm.with_structured_output(DischargeSummaryInfo)
-
-    result: DischargeSummaryInfo = structured_llm.invoke(
+    result: DischargeSummaryInfo = await ainvoke_structured(
+        DischargeSummaryInfo,
         [
             {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": f"Extract discharge summary details from the following pages:\n\n{page_block}"},
+            {"role": "user", "content": f"Extract discharge summary details from the following pages:\n\n{block.text}"},
         ]
     )
 
     logger.info("Discharge Agent extracted: diagnosis=%s, admit=%s, discharge=%s", result.diagnosis, result.admission_date, result.discharge_date)
-    return {"extraction_results": {"discharge_summary": result.model_dump()}}
+    return {"extraction_results": {"discharge_summary": result}, "token_usage": token_usage("discharge_agent", block)}
@@ -7,9 +7,11 @@ from __future__ import annotations
 
 import logging
 
+from app.core.config import settings
 from app.graph.state import PipelineState
-from app.llm.provider import get_llm
+from app.llm.provider import ainvoke_structured
 from app.models.schema import DocumentType, IdentityInfo
+from app.services.compaction import page_block, token_usage
 from app.services.pdf import get_page_subset
 
 logger = logging.getLogger(__name__)
@@ -28,10 +30,10 @@ Extract the following fields. Return null for any field you cannot find:
 """
 
 
-def id_agent_node(state: PipelineState) -> dict:
+async def id_agent_node(state: PipelineState) -> dict:
     """Extract identity info and write to ``extraction_results["identity"]``."""
     classifications = state["page_classifications"]
-    pages = state["pages"]
+    pages = state["prompt_pages"]
 
     target_page_nums = [c.page_number for c in classifications if c.document_type == DocumentType.IDENTITY]
 
@@ -40,17 +42,17 @@ def id_agent_node(state: PipelineState) -> dict:
         return {"extraction_results": {"identity": None}}
 
     subset = get_page_subset(pages, target_page_nums)
-    page_block = "\n\n".join(f"--- PAGE {p.page_number} ---\n{p.text}" for p in subset)
+    block = page_block(subset, settings.ID_AGENT_TOKEN_BUDGET, state["raw_page_tokens"], settings.PROMPT_REPEATED_LINE_SHARE)
+    if block.truncated:
+        logger.warning("ID Agent: page text cut to the %d token budget", settings.ID_AGENT_TOKEN_BUDGET)
 
-    llm = get_llm()
-    structured_llm = llm.with_structured_output(IdentityInfo)
-
-    result: IdentityInfo = structured_llm.invoke(
+    result: IdentityInfo = await ainvoke_structured(
+        IdentityInfo,
         [
             {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": f"Extract identity information from the following pages:\n\n{page_block}"},
+            {"role": "user", "content": f"Extract identity information from the following pages:\n\n{block.text}"},
         ]
     )
 
     logger.info("ID Agent extracted: patient=%s, ids=%s", result.patient_name, result.id_numbers)
-    return {"extraction_results": {"identity": result.model_dump()}}
+    return {"extraction_results": {"identity": result}, "token_usage": token_usage("id_agent", block)}
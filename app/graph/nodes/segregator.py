@@ -4,13 +4,20 @@
 # description: Segregator agent — classifies every PDF page into one of 9 document types.
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections.abc import AsyncIterator
 
 from pydantic import BaseModel, Field
 
+from app.core.config import settings
 from app.graph.state import PipelineState
-from app.llm.provider import get_llm
-from app.models.schema import DocumentType, PageClassification
+from app.llm.provider import LLMPriority, ainvoke_structured
+from app.llm.tokens import count_tokens
+from app.models.schema import DocumentType, PageClassification, PageData
+from app.services.classifier import build_pre_classifier
+from app.services.compaction import PromptBlock, page_block, prepare_prompt_pages, token_usage
+from app.services.page_cache import build_page_cache
 
 logger = logging.getLogger(__name__)
 
@@ -43,32 +50,229 @@ class SegregatorOutput(BaseModel):
     )
 
 
-def segregator_node(state: PipelineState) -> dict:
-    """Classify every page and write ``page_classifications`` to state."""
-    pages = state["pages"]
-    if not pages:
-        logger.warning("Segregator received zero pages — nothing to classify.")
-        return {"page_classifications": []}
+# Template pages seen before are classified from here, without the LLM.
+page_cache = build_page_cache(SYSTEM_PROMPT)
 
-    page_block = "\n\n".join(
-        f"--- PAGE {p.page_number} ---\n{p.text if p.text.strip() else '[EMPTY / NO TEXT]'}"
-        for p in pages
-    )
+# Obvious pages (keyword/regex evidence) are classified locally, without the LLM.
+pre_classifier = build_pre_classifier()
 
-    llm = get_llm()
-    structured_llm = llm.with_structured_output(SegregatorOutput)
 
-    result: SegregatorOutput = structured_llm.invoke(
+def _page_block(pages: list[PageData], raw_tokens: dict[int, int]) -> PromptBlock:
+    # Only lines shared by every page of the window are folded: they cannot tell pages apart.
+    return page_block(pages, settings.PDF_CHUNK_SIZE, raw_tokens, repeat_share=1.0, empty_marker="[EMPTY / NO TEXT]")
+
+
+def _windows(pages: list[PageData], token_budget: int, max_pages: int) -> list[list[PageData]]:
+    """Split *pages* into contiguous windows of at most *token_budget* tokens and *max_pages* pages."""
+    windows: list[list[PageData]] = []
+    current: list[PageData] = []
+    used = 0
+    for page in pages:
+        cost = count_tokens(page.text) + 8  # page delimiter
+        if current and (used + cost > token_budget or len(current) >= max_pages):
+            windows.append(current)
+            current, used = [], 0
+        current.append(page)
+        used += cost
+    if current:
+        windows.append(current)
+    return windows
+
+
+async def _classify_window(window: list[PageData], raw_tokens: dict[int, int]) -> tuple[dict[int, PageClassification], PromptBlock]:
+    """One LLM call; keeps only the first answer for each page that was actually asked about."""
+    block = _page_block(window, raw_tokens)
+    result: SegregatorOutput = await ainvoke_structured(
+        SegregatorOutput,
         [
             {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": f"Classify each page below:\n\n{page_block}"},
-        ]
+            {"role": "user", "content": f"Classify each page below:\n\n{block.text}"},
+        ],
+        priority=LLMPriority.HIGH,
     )
+    wanted = {p.page_number for p in window}
+    by_page: dict[int, PageClassification] = {}
+    for c in result.classifications:
+        if c.page_number in wanted and c.page_number not in by_page:
+            by_page[c.page_number] = c
+    return by_page, block
+
+
+async def _classify_windowed(
+    pages: list[PageData],
+    raw_tokens: dict[int, int],
+    started: list[tuple[list[PageData], asyncio.Future]] | None = None,
+) -> tuple[list[PageClassification], list[PromptBlock]]:
+    """
+    Classify *pages* in token-budgeted windows, concurrently.
+
+    Results are merged so every page is covered exactly once.  Pages a
+    window dropped (or whose window call failed) are re-asked once in
+    fresh windows; anything still missing falls back to ``other`` with
+    zero confidence.  Only when no window succeeded at all does the last
+    error propagate.  Also returns the prompt blocks that were sent.
+
+    *started* holds window calls already in flight (pipelined mode); they
+    stand in for the first attempt.
+    """
+    budget, max_pages = settings.PDF_CHUNK_SIZE, settings.SEGREGATOR_WINDOW_MAX_PAGES
+    classified: dict[int, PageClassification] = {}
+    blocks: list[PromptBlock] = []
+
+    pending = pages
+    for attempt in range(2):
+        if attempt == 0 and started is not None:
+            windows = [window for window, _ in started]
+            calls = [call for _, call in started]
+        else:
+            windows = _windows(pending, budget, max_pages)
+            calls = [_classify_window(w, raw_tokens) for w in windows]
+        if len(windows) > 1 or attempt:
+            logger.info("Segregator classifying %d page(s) in %d window(s) (attempt %d)", len(pending), len(windows), attempt + 1)
+        results = await asyncio.gather(*calls, return_exceptions=True)
+
+        failed: list[Exception] = []
+        for window, result in zip(windows, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result
+                failed.append(result)
+                logger.warning("Segregator window of pages %d-%d failed: %s", window[0].page_number, window[-1].page_number, result)
+                continue
+            classified.update(result[0])
+            blocks.append(result[1])
+
+        # Nothing to salvage (e.g. the LLM is down): fail the claim rather than return every page as ``other``.
+        if attempt and not classified and len(failed) == len(windows):
+            raise failed[-1]
+
+        pending = [p for p in pages if p.page_number not in classified]
+        if not pending:
+            break
+        logger.warning("Segregator missed page(s) %s", [p.page_number for p in pending])
+
+    for page in pending:
+        classified[page.page_number] = PageClassification(page_number=page.page_number, document_type=DocumentType.OTHER, confidence=0.0)
+
+    return [classified[p.page_number] for p in pages], blocks
+
+
+async def _classify_locally(pages: list[PageData]) -> tuple[dict[int, PageClassification], dict[int, PageClassification]]:
+    """Pages answered by the page cache, and (of the rest) by the pre-classifier."""
+    await page_cache.warm(pages)
+    cached = page_cache.lookup(pages)
+    uncached = [p for p in pages if p.page_number not in cached]
+    local = pre_classifier.classify(uncached) if pre_classifier else {}
+    return cached, local
 
+
+def _log_result(classifications: list[PageClassification], cached: int, local: int, llm: int) -> None:
     logger.info(
-        "Segregator classified %d page(s): %s",
-        len(result.classifications),
-        {c.document_type.value: c.page_number for c in result.classifications},
+        "Segregator classified %d page(s) (%d from page cache, %d local, %d by LLM): %s",
+        len(classifications),
+        cached,
+        local,
+        llm,
+        {c.document_type.value: c.page_number for c in classifications},
     )
 
-    return {"page_classifications": result.classifications}
+
+async def segregate_stream(batches: AsyncIterator[list[PageData]], compact: bool = True) -> dict:
+    """
+    Classify pages as they come out of the extraction pool.
+
+    Each batch is compacted and run past the page cache and pre-classifier
+    on arrival; the ambiguous pages are packed into windows exactly as
+    :func:`_windows` would, and every window is sent to the LLM as soon as
+    it is full, while later pages are still being parsed.
+
+    Returns the pipeline's input fields — ``pages``, ``prompt_pages``,
+    ``raw_page_tokens``, ``page_classifications`` and ``token_usage`` — so
+    ``segregator_node`` has nothing left to do.
+    """
+    budget, max_pages = settings.PDF_CHUNK_SIZE, settings.SEGREGATOR_WINDOW_MAX_PAGES
+    pages: list[PageData] = []
+    prompt_pages: list[PageData] = []
+    raw_tokens: dict[int, int] = {}
+    cached: dict[int, PageClassification] = {}
+    local: dict[int, PageClassification] = {}
+    ambiguous: list[PageData] = []
+    started: list[tuple[list[PageData], asyncio.Future]] = []
+    window: list[PageData] = []
+    used = 0
+
+    def send(window: list[PageData]) -> None:
+        started.append((window, asyncio.ensure_future(_classify_window(window, raw_tokens))))
+
+    try:
+        async for batch in batches:
+            prompt_batch, batch_tokens = await asyncio.to_thread(prepare_prompt_pages, batch, compact)
+            pages.extend(batch)
+            prompt_pages.extend(prompt_batch)
+            raw_tokens.update(batch_tokens)
+
+            batch_cached, batch_local = await _classify_locally(batch)
+            cached.update(batch_cached)
+            local.update(batch_local)
+            for page, prompt_page in zip(batch, prompt_batch):
+                if page.page_number in batch_cached or page.page_number in batch_local:
+                    continue
+                ambiguous.append(page)
+                cost = count_tokens(prompt_page.text) + 8  # page delimiter
+                if window and (used + cost > budget or len(window) >= max_pages):
+                    send(window)
+                    window, used = [], 0
+                window.append(prompt_page)
+                used += cost
+        if window:
+            send(window)
+
+        prompt_by_page = {p.page_number: p for p in prompt_pages}
+        classified, blocks = await _classify_windowed([prompt_by_page[p.page_number] for p in ambiguous], raw_tokens, started)
+    except BaseException:
+        for _, call in started:
+            call.cancel()
+        await asyncio.gather(*(call for _, call in started), return_exceptions=True)
+        raise
+
+    if ambiguous:
+        page_cache.remember(ambiguous, classified)
+        await page_cache.flush()
+
+    classifications = sorted([*cached.values(), *local.values(), *classified], key=lambda c: c.page_number)
+    _log_result(classifications, len(cached), len(local), len(classified))
+    return {
+        "pages": pages,
+        "prompt_pages": prompt_pages,
+        "raw_page_tokens": raw_tokens,
+        "page_classifications": classifications,
+        "token_usage": token_usage("segregator", *blocks) if blocks else {},
+    }
+
+
+async def segregator_node(state: PipelineState) -> dict:
+    """Classify every page and write ``page_classifications`` to state."""
+    pages = state["pages"]
+    if not pages:
+        logger.warning("Segregator received zero pages — nothing to classify.")
+        return {"page_classifications": []}
+
+    if state["page_classifications"]:
+        # Already classified while the PDF was being extracted (see segregate_stream).
+        return {"page_classifications": state["page_classifications"]}
+
+    cached, local = await _classify_locally(pages)
+    ambiguous = [p for p in pages if p.page_number not in cached and p.page_number not in local]
+    classified: list[PageClassification] = []
+    blocks: list[PromptBlock] = []
+
+    if ambiguous:
+        prompt_pages = {p.page_number: p for p in state["prompt_pages"]}
+        classified, blocks = await _classify_windowed([prompt_pages[p.page_number] for p in ambiguous], state["raw_page_tokens"])
+        page_cache.remember(ambiguous, classified)
+        await page_cache.flush()
+
+    classifications = sorted([*cached.values(), *local.values(), *classified], key=lambda c: c.page_number)
+    _log_result(classifications, len(cached), len(local), len(classified))
+
+    return {"page_classifications": classifications, "token_usage": token_usage("segregator", *blocks) if blocks else {}}
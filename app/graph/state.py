@@ -8,7 +8,7 @@ from typing import Annotated, Any
 
 from typing_extensions import TypedDict
 
-from app.models.schema import PageClassification, PageData
+from app.models.schema import DischargeSummaryInfo, IdentityInfo, ItemizedBillInfo, PageClassification, PageData, ProcessResponse
 
 
 def _merge_dicts(current: dict[str, Any], update: dict[str, Any]) -> dict[str, Any]:
@@ -18,9 +18,25 @@ def _merge_dicts(current: dict[str, Any], update: dict[str, Any]) -> dict[str, A
     return merged
 
 
+def _sum_token_usage(current: dict[str, dict[str, int]], update: dict[str, dict[str, int]]) -> dict[str, dict[str, int]]:
+    """Reducer: add per-node token counters (nodes may report more than once)."""
+    merged = {node: counters.copy() for node, counters in current.items()}
+    for node, counters in update.items():
+        totals = merged.setdefault(node, {})
+        for key, value in counters.items():
+            totals[key] = totals.get(key, 0) + value
+    return merged
+
+
 class PipelineState(TypedDict):
     claim_id: str
+    # Raw extracted text — used by the page cache and the local pre-classifier
     pages: list[PageData]
+    # Compacted copies of ``pages`` for LLM prompts (see app.services.compaction)
+    prompt_pages: list[PageData]
+    raw_page_tokens: dict[int, int]
     page_classifications: list[PageClassification]
-    extraction_results: Annotated[dict[str, Any], _merge_dicts]
-    final_output: dict[str, Any]
+    # Agent outputs as validated models, None when the agent found no pages to read
+    extraction_results: Annotated[dict[str, IdentityInfo | DischargeSummaryInfo | ItemizedBillInfo | None], _merge_dicts]
+    final_output: ProcessResponse | None
+    token_usage: Annotated[dict[str, dict[str, int]], _sum_token_usage]
@@ -4,11 +4,16 @@
 # description: LangGraph workflow — wires the full claim-processing pipeline.
 from __future__ import annotations
 
+import hashlib
 import logging
+from pathlib import Path
 
 from langgraph.graph import END, START, StateGraph
 from langgraph.types import Send
 
+from app.core.config import settings
+from app.core.metrics import instrument_node
+from app.graph.nodes import bill_agent, discharge_agent, id_agent, segregator
 from app.graph.nodes.aggregator import aggregator_node
 from app.graph.nodes.bill_agent import bill_agent_node
 from app.graph.nodes.discharge_agent import discharge_agent_node
@@ -16,6 +21,7 @@ from app.graph.nodes.id_agent import id_agent_node
 from app.graph.nodes.segregator import segregator_node
 from app.graph.state import PipelineState
 from app.models.schema import DocumentType
+from app.services.classifier import RULES
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +33,49 @@ AGENT_FOR_DOC_TYPE: dict[DocumentType, str] = {
 }
 
 
+# Settings that change what the pipeline answers for the same PDF: the text
+# backend, what the prompts see (compaction, budgets, windows, bill chunks)
+# and which pages skip the segregator (pre-classifier).
+_OUTPUT_SETTINGS = (
+    "PDF_BACKEND",
+    "PDF_CHUNK_SIZE",
+    "PROMPT_COMPACTION_ENABLED",
+    "PROMPT_REPEATED_LINE_SHARE",
+    "ID_AGENT_TOKEN_BUDGET",
+    "DISCHARGE_AGENT_TOKEN_BUDGET",
+    "BILL_AGENT_TOKEN_BUDGET",
+    "BILL_AGENT_CHUNK_PAGES",
+    "HEURISTIC_CLASSIFIER_ENABLED",
+    "HEURISTIC_MIN_CONFIDENCE",
+    "HEURISTIC_TFIDF_MODEL_PATH",
+)
+
+
+def _prompt_version() -> str:
+    """
+    Short fingerprint of everything besides the model that shapes a result.
+
+    Covers every system prompt, the output-affecting settings above, the
+    pre-classifier rules and the TF-IDF model file, so editing any of them
+    invalidates cached results.
+    """
+    parts = [segregator.SYSTEM_PROMPT, id_agent.SYSTEM_PROMPT, discharge_agent.SYSTEM_PROMPT, bill_agent.SYSTEM_PROMPT]
+    parts += [f"{name}={getattr(settings, name)!r}" for name in _OUTPUT_SETTINGS]
+    if settings.HEURISTIC_CLASSIFIER_ENABLED:
+        parts += [
+            f"{doc_type.value}:{rule.pattern.pattern}:{rule.pattern.flags}:{rule.weight}"
+            for doc_type, rules in RULES.items()
+            for rule in rules
+        ]
+        model_path = Path(settings.HEURISTIC_TFIDF_MODEL_PATH) if settings.HEURISTIC_TFIDF_MODEL_PATH else None
+        if model_path is not None and model_path.is_file():
+            parts.append(hashlib.sha256(model_path.read_bytes()).hexdigest())
+    return hashlib.sha256("\x00".join(parts).encode()).hexdigest()[:12]
+
+
+PROMPT_VERSION = _prompt_version()
+
+
 def _route_to_agents(state: PipelineState) -> list[Send]:
     """Fan-out: send state to each extraction agent that has matching pages."""
     classifications = state.get("page_classifications", [])
@@ -48,11 +97,11 @@ def _route_to_agents(state: PipelineState) -> list[Send]:
 def build_workflow() -> StateGraph:
     graph = StateGraph(PipelineState)
 
-    graph.add_node("segregator", segregator_node)
-    graph.add_node("id_agent", id_agent_node)
-    graph.add_node("discharge_agent", discharge_agent_node)
-    graph.add_node("bill_agent", bill_agent_node)
-    graph.add_node("aggregator", aggregator_node)
+    graph.add_node("segregator", instrument_node("segregator", segregator_node))
+    graph.add_node("id_agent", instrument_node("id_agent", id_agent_node))
+    graph.add_node("discharge_agent", instrument_node("discharge_agent", discharge_agent_node))
+    graph.add_node("bill_agent", instrument_node("bill_agent", bill_agent_node))
+    graph.add_node("aggregator", instrument_node("aggregator", aggregator_node))
 
     graph.add_edge(START, "segregator")
     graph.add_conditional_edges("segregator", _route_to_agents)
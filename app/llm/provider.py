@@ -5,15 +5,31 @@
 
 from __future__ import annotations
 
+import asyncio
+import heapq
+import itertools
 import logging
-from typing import Optional
+import random
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Optional, TypeVar
+
+import anthropic
+import openai
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 
 from app.core.config import settings
+from app.core.metrics import ERRORS, LLM_SECONDS, LLM_WAIT_SECONDS, current_node, record_llm_tokens
+from app.core.profiling import record_stage
+from app.llm.tokens import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class LLMProvider:
     """
@@ -76,7 +92,7 @@ class LLMProvider:
             temperature=float(self.temperature),
             max_completion_tokens=int(self.max_tokens),
             timeout=30,
-            max_retries=2,
+            max_retries=0,  # retries go through the rate limiter (ainvoke_structured)
         )
 
     def _init_anthropic(self):
@@ -90,6 +106,7 @@ class LLMProvider:
             temperature=float(self.temperature),
             max_tokens_to_sample=int(self.max_tokens),
             timeout=30,
+            max_retries=0,  # retries go through the rate limiter (ainvoke_structured)
             stop=[""],  # TODO: configure this parameter correctly
         )
 
@@ -121,4 +138,279 @@ def get_llm_info() -> dict:
         Dictionary with LLM configuration
     """
     provider = LLMProvider()
-    return provider.get_model_info()
\ No newline at end of file
+    return provider.get_model_info()
+
+
+# Rate limiting
+class LLMPriority(IntEnum):
+    """Admission lanes; a lower value is served first."""
+
+    HIGH = 0  # segregation — the first call of a fresh claim
+    NORMAL = 1  # extraction agents
+
+
+class _TokenBucket:
+    """Continuously refilled budget of *per_minute* units; ``per_minute <= 0`` means unlimited."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.per_minute = float(per_minute)
+        self.level = self.per_minute
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0
+
+    def refill(self, now: float, factor: float) -> None:
+        if self.enabled:
+            self.level = min(self.per_minute, self.level + (now - self._updated) * self.per_minute * factor / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float, factor: float) -> float:
+        """Seconds until *amount* can be taken (a request larger than the bucket waits for a full bucket)."""
+        if not self.enabled:
+            return 0.0
+        missing = min(amount, self.per_minute) - self.level
+        return 0.0 if missing <= 0 else missing * 60 / (self.per_minute * factor)
+
+    def take(self, amount: float) -> None:
+        # May go negative (usage reconciled after the call); later requests then wait longer.
+        if self.enabled:
+            self.level -= amount
+
+
+class LLMRateLimiter:
+    """
+    Process-wide admission control for LLM calls.
+
+    A request waits until (a) one of the concurrency slots is free, (b) the
+    requests-per-minute and tokens-per-minute buckets can cover it and (c)
+    no 429 cool-down is in effect.  Waiters are served strictly by
+    :class:`LLMPriority`, then first come, first served.
+
+    Limits adapt AIMD-style: a 429 halves the concurrency limit and the
+    refill rate and pauses admissions for ``Retry-After`` seconds (or an
+    exponential back-off); every success grows them back gradually.
+    Event-loop only — not thread-safe.
+    """
+
+    # Floor of the adaptive refill rate, as a share of the configured one.
+    _MIN_RATE_FACTOR = 0.1
+    # Refill rate regained per successful call after a throttle.
+    _RATE_RECOVERY = 0.02
+    # Cool-down when a 429 carries no Retry-After, doubled per consecutive throttle.
+    _DEFAULT_BACKOFF_SECONDS = 1.0
+    _MAX_BACKOFF_SECONDS = 60.0
+
+    def __init__(self, max_concurrency: int, requests_per_minute: float, tokens_per_minute: float) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency_limit = self.max_concurrency
+        self.rate_factor = 1.0
+        self.in_flight = 0
+        self._requests = _TokenBucket(requests_per_minute)
+        self._tokens = _TokenBucket(tokens_per_minute)
+        self._waiters: list[tuple[int, int, asyncio.Future, int]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self._cooldown_until = 0.0
+        self._consecutive_throttles = 0
+        self._growth_credit = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.tokens_used = 0
+
+    @asynccontextmanager
+    async def slot(self, priority: LLMPriority, tokens: int) -> AsyncIterator[None]:
+        """Hold one admission for a call expected to consume *tokens*."""
+        await self._acquire(priority, tokens)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._dispatch()
+
+    async def _acquire(self, priority: LLMPriority, tokens: int) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), future, tokens))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just before being cancelled: hand the slot back.
+                self.in_flight -= 1
+                self._dispatch()
+            raise
+
+    def _dispatch(self) -> None:
+        """Admit waiters from the head of the queue while every limit allows it."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = time.monotonic()
+        self._requests.refill(now, self.rate_factor)
+        self._tokens.refill(now, self.rate_factor)
+        while self._waiters:
+            _, _, future, tokens = self._waiters[0]
+            if future.done():  # cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight >= self.concurrency_limit:
+                return  # the next release dispatches again
+            delay = max(
+                self._cooldown_until - now,
+                self._requests.wait_time(1, self.rate_factor),
+                self._tokens.wait_time(tokens, self.rate_factor),
+            )
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self._requests.take(1)
+            self._tokens.take(tokens)
+            self.in_flight += 1
+            self.requests += 1
+            future.set_result(None)
+
+    def record_success(self, reserved_tokens: int, used_tokens: int | None) -> None:
+        """Reconcile the token bucket with actual usage and grow the limits back."""
+        if used_tokens:
+            self._tokens.take(used_tokens - reserved_tokens)
+            self.tokens_used += used_tokens
+        self._consecutive_throttles = 0
+        self.rate_factor = min(1.0, self.rate_factor + self._RATE_RECOVERY)
+        if self.concurrency_limit < self.max_concurrency:
+            self._growth_credit += 1 / self.concurrency_limit
+            if self._growth_credit >= 1:
+                self._growth_credit = 0.0
+                self.concurrency_limit += 1
+
+    def record_throttle(self, retry_after: float | None) -> None:
+        """React to a 429: back off once per cool-down window, however many calls were hit."""
+        self.throttled += 1
+        now = time.monotonic()
+        if now >= self._cooldown_until:
+            self._consecutive_throttles += 1
+            self.concurrency_limit = max(1, self.concurrency_limit // 2)
+            self.rate_factor = max(self._MIN_RATE_FACTOR, self.rate_factor / 2)
+            self._growth_credit = 0.0
+        if retry_after is None:
+            retry_after = min(self._MAX_BACKOFF_SECONDS, self._DEFAULT_BACKOFF_SECONDS * 2 ** (self._consecutive_throttles - 1))
+        self._cooldown_until = max(self._cooldown_until, now + retry_after)
+        logger.warning(
+            "LLM rate limited — pausing %.1fs, concurrency limit %d, rate factor %.2f",
+            retry_after,
+            self.concurrency_limit,
+            self.rate_factor,
+        )
+        self._dispatch()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        self._requests.refill(now, self.rate_factor)
+        self._tokens.refill(now, self.rate_factor)
+        queued = {lane.name.lower(): 0 for lane in LLMPriority}
+        for priority, _, future, _ in self._waiters:
+            if not future.done():
+                queued[LLMPriority(priority).name.lower()] += 1
+        return {
+            "in_flight": self.in_flight,
+            "concurrency_limit": self.concurrency_limit,
+            "max_concurrency": self.max_concurrency,
+            "queued": queued,
+            "rate_factor": round(self.rate_factor, 3),
+            "cooldown_seconds": round(max(0.0, self._cooldown_until - now), 2),
+            "requests_per_minute": self._requests.per_minute or None,
+            "request_budget": round(self._requests.level, 1) if self._requests.enabled else None,
+            "tokens_per_minute": self._tokens.per_minute or None,
+            "token_budget": round(self._tokens.level) if self._tokens.enabled else None,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "tokens_used": self.tokens_used,
+        }
+
+
+rate_limiter = LLMRateLimiter(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+)
+
+_CONNECTION_ERRORS = (openai.APIConnectionError, anthropic.APIConnectionError)
+
+
+def _status_code(exc: BaseException) -> int | None:
+    status = getattr(exc, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    """Seconds from the ``retry-after-ms`` / ``retry-after`` headers of a provider error, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None  # HTTP-date form; fall back to the limiter's back-off
+    return None
+
+
+def _is_retryable(exc: BaseException, status: int | None) -> bool:
+    return isinstance(exc, _CONNECTION_ERRORS) or status in (408, 409, 429) or (status is not None and status >= 500)
+
+
+async def ainvoke_structured(schema: type[T], messages: list[dict], priority: LLMPriority = LLMPriority.NORMAL) -> T:
+    """
+    Call the LLM asynchronously and parse the reply into *schema*.
+
+    Admission goes through :data:`rate_limiter` in the given *priority*
+    lane.  429s, timeouts, connection errors and 5xx responses are retried
+    up to ``LLM_MAX_RETRIES`` times; 429s also slow the limiter down for
+    every caller.
+    """
+    structured_llm = get_llm().with_structured_output(schema, include_raw=True)
+    reserved = sum(estimate_tokens(str(m.get("content", ""))) for m in messages)
+
+    node = current_node.get()
+    attempt = 0
+    while True:
+        queued = time.perf_counter()
+        async with rate_limiter.slot(priority, reserved):
+            began = time.perf_counter()
+            LLM_WAIT_SECONDS.labels(node).observe(began - queued)
+            try:
+                output = await structured_llm.ainvoke(messages)
+            except Exception as exc:
+                LLM_SECONDS.labels(node, "error").observe(time.perf_counter() - began)
+                record_stage(f"llm:{node}", began, time.perf_counter())
+                ERRORS.labels("llm").inc()
+                status = _status_code(exc)
+                if status == 429:
+                    rate_limiter.record_throttle(_retry_after(exc))
+                if attempt >= settings.LLM_MAX_RETRIES or not _is_retryable(exc, status):
+                    raise
+                error = exc
+            else:
+                LLM_SECONDS.labels(node, "ok").observe(time.perf_counter() - began)
+                record_stage(f"llm:{node}", began, time.perf_counter())
+                usage = getattr(output["raw"], "usage_metadata", None) or {}
+                record_llm_tokens(usage)
+                rate_limiter.record_success(reserved, usage.get("total_tokens"))
+                if output.get("parsing_error") is not None:
+                    ERRORS.labels("llm").inc()
+                    raise output["parsing_error"]
+                return output["parsed"]
+
+        attempt += 1
+        rate_limiter.retries += 1
+        logger.warning("LLM call failed (%s) — retry %d/%d", error.__class__.__name__, attempt, settings.LLM_MAX_RETRIES)
+        if status != 429:  # throttles wait out the limiter's cool-down instead
+            await asyncio.sleep(min(30.0, 0.5 * 2**attempt) * random.uniform(0.5, 1.0))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: llm/tokens.py
+# description: Prompt-size counting used for batching and budgeting.
+"""
+Prompt-size counting.
+
+:func:`count_tokens` uses the configured model's tiktoken encoding when
+tiktoken is installed and its encoding files are available (``o200k_base``
+for unknown models — a close stand-in for Anthropic models too), and
+falls back to :func:`estimate_tokens` otherwise.  :func:`init_tokenizer`
+loads the encoding up front so a first-use download never happens on the
+event loop.
+"""
+
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+
+from app.core.config import settings
+
+try:
+    import tiktoken
+except ImportError:  # optional — the character heuristic is used instead
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# English-ish text averages roughly four characters per token for the
+# OpenAI and Anthropic tokenizers; good enough to size prompt windows.
+_CHARS_PER_TOKEN = 4
+
+_FALLBACK_ENCODING = "o200k_base"
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of *text* (never less than 1 for non-empty text)."""
+    if not text:
+        return 0
+    return max(1, -(-len(text) // _CHARS_PER_TOKEN))
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(settings.LLM_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding(_FALLBACK_ENCODING)
+    except Exception as exc:  # encoding files are fetched on first use and may be unreachable
+        logger.warning("tiktoken encoding unavailable (%s) — using the %d chars/token estimate", exc, _CHARS_PER_TOKEN)
+        return None
+
+
+def init_tokenizer() -> str:
+    """Load the tokenizer now; returns its name (``"estimate"`` when falling back)."""
+    encoding = _encoding()
+    return encoding.name if encoding is not None else "estimate"
+
+
+def count_tokens(text: str) -> int:
+    """Token count of *text* under the model's tokenizer, or the estimate without one."""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of *text* that fits in *max_tokens*."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding()
+    if encoding is None:
+        return text[: max_tokens * _CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
@@ -4,25 +4,46 @@
 # description: Main application file
 from __future__ import annotations
 
+import asyncio
 from contextlib import asynccontextmanager
 from collections.abc import AsyncIterator
 
 import warnings
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.middleware import BodySizeLimitMiddleware
 from app.api.routes import router as process_router
+from app.core import metrics
 from app.db.connection import close_pool, init_pool
+from app.db.write_buffer import close_write_buffer, init_write_buffer
+from app.llm.tokens import init_tokenizer
+from app.services.claim_cache import claim_cache
+from app.services.jobs import close_job_workers, init_job_workers
+from app.services.pdf import close_extraction_engine, init_extraction_engine
+from app.services.upload import MAX_BATCH_BYTES, MAX_PDF_BYTES
 
 # LangChain's AIMessage.parsed field triggers a harmless Pydantic v2
 # serialization warning when with_structured_output() is used.
 warnings.filterwarnings("ignore", message="Pydantic serializer warnings")
 
+# Allowance for the multipart envelope around the PDF part.
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
     await init_pool()
+    init_write_buffer()
+    await claim_cache.start()
+    await asyncio.to_thread(init_tokenizer)
+    init_extraction_engine()
+    init_job_workers()
     yield
+    await close_job_workers()
+    close_extraction_engine()
+    await close_write_buffer()
+    await claim_cache.stop()
     await close_pool()
 
 
@@ -41,6 +62,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        "/api/process": MAX_PDF_BYTES + _MULTIPART_OVERHEAD_BYTES,
+        "/api/process/stream": MAX_PDF_BYTES + _MULTIPART_OVERHEAD_BYTES,
+        "/api/jobs": MAX_PDF_BYTES + _MULTIPART_OVERHEAD_BYTES,
+        "/api/batch": MAX_BATCH_BYTES + _MULTIPART_OVERHEAD_BYTES,
+    },
+)
+
 app.include_router(process_router)
 
 
@@ -49,11 +80,26 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics() -> Response:
+    """Prometheus scrape endpoint."""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/")
 def root():
     """Root endpoint."""
     return {
         "service": "Claim Processing Pipeline",
         "version": "1.0.0",
-        "endpoints": {"process": "POST /api/process", "health": "GET /api/health", "docs": "/docs"},
+        "endpoints": {
+            "process": "POST /api/process",
+            "stream": "POST /api/process/stream",
+            "batch": "POST /api/batch",
+            "jobs": "POST /api/jobs",
+            "health": "GET /api/health",
+            "metrics": "GET /metrics",
+            "docs": "/docs",
+        },
     }
@@ -87,8 +87,50 @@ class ClaimSummary(BaseModel):
     created_at: datetime
 
 
+class CountMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+
+
 class ClaimListResponse(BaseModel):
-    total: int
+    # None when count=none; a planner estimate unless total_exact
+    total: int | None = None
+    total_exact: bool = False
     limit: int
-    offset: int
+    offset: int = 0
+    # Pass as ?cursor= to fetch the next page; None on the last page
+    next_cursor: str | None = None
     items: list[ClaimSummary]
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    PROCESSED = "processed"
+    FAILED = "failed"
+
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: JobStatus
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: JobStatus
+    attempts: int = 0
+    error: str | None = None
+    result: ProcessResponse | None = None
+
+
+class BatchItemResult(BaseModel):
+    """One NDJSON line of ``POST /api/batch``."""
+
+    index: int
+    filename: str
+    status: JobStatus
+    claim_id: str | None = None
+    cached: bool = False
+    error: str | None = None
+    result: ProcessResponse | None = None
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: services/batch.py
+# description: Multi-file / ZIP batch ingestion with bounded concurrency and grouped persistence.
+"""
+Batch ingestion for ``POST /api/batch``.
+
+All PDFs of a request — uploaded side by side or packed in ZIP archives —
+are spooled to disk up front, then run through the same extraction pool,
+pipeline semaphore and LLM concurrency budget as single uploads, at most
+``BATCH_MAX_CONCURRENCY`` claims at a time.
+
+Results are yielded as claims finish.  Whatever has completed by the time
+the previous group was written is persisted together in one
+``save_claim_results`` transaction (up to ``BATCH_PERSIST_GROUP_SIZE``
+claims), so a burst of completions costs one round of commits while a
+trickle is still reported without delay.  A failure — bad PDF, pipeline
+error, DB error — only affects the claim(s) it belongs to.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.db.repository import save_claim_results
+from app.models.schema import BatchItemResult, JobStatus, ProcessResponse
+from app.services.pdf import InvalidPdfError
+from app.services.processing import generate_claim_id, open_document, run_pipeline
+from app.services.result_cache import result_cache, result_cache_key
+from app.services.upload import MAX_BATCH_BYTES, SpooledUpload, expand_zip, is_zip_upload, spool_upload
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BatchFile:
+    """One PDF of a batch: spooled, or rejected with an error before processing."""
+
+    index: int
+    filename: str
+    upload: SpooledUpload | None = None
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class _Outcome:
+    file: BatchFile
+    claim_id: str
+    cache_key: str | None = None
+    response: ProcessResponse | None = None
+    cached: bool = False
+    error: str | None = None
+
+
+async def collect_batch_files(files: list[UploadFile], stack: AsyncExitStack, max_files: int = settings.BATCH_MAX_FILES) -> list[BatchFile]:
+    """
+    Spool every PDF of the request, expanding ZIP archives.
+
+    Spool files are registered on *stack* and deleted when it closes.
+    Unreadable entries become :class:`BatchFile` errors rather than failing
+    the request.
+
+    Raises:
+        ValueError: If the request holds more than *max_files* PDFs.
+    """
+    items: list[BatchFile] = []
+
+    def add(filename: str, upload: SpooledUpload | None = None, error: str | None = None) -> None:
+        if len(items) >= max_files:
+            raise ValueError(f"A batch may contain at most {max_files} PDFs.")
+        items.append(BatchFile(index=len(items), filename=filename, upload=upload, error=error))
+
+    for position, file in enumerate(files, start=1):
+        name = file.filename or f"file-{position}"
+        if is_zip_upload(file):
+            try:
+                async with spool_upload(file, max_bytes=MAX_BATCH_BYTES) as archive:
+                    members = await stack.enter_async_context(expand_zip(archive.path, max_members=max_files))
+            except ValueError as exc:
+                add(name, error=str(exc))
+                continue
+            for member_name, member in members:
+                if isinstance(member, SpooledUpload):
+                    add(f"{name}/{member_name}", upload=member)
+                else:
+                    add(f"{name}/{member_name}", error=str(member))
+        elif file.content_type == "application/pdf":
+            try:
+                upload = await stack.enter_async_context(spool_upload(file))
+            except ValueError as exc:
+                add(name, error=str(exc))
+                continue
+            add(name, upload=upload)
+        else:
+            add(name, error="Only PDF files and ZIP archives are accepted.")
+    return items
+
+
+async def _process(file: BatchFile) -> _Outcome:
+    """Run one spooled PDF through the pipeline; never raises."""
+    claim_id = generate_claim_id()
+    cache_key = result_cache_key(file.upload.sha256)
+
+    cached = await result_cache.get(cache_key)
+    if cached is not None:
+        return _Outcome(file, cached.claim_id, cache_key, cached, cached=True)
+
+    try:
+        pages = await open_document(file.upload.path)
+    except InvalidPdfError as exc:
+        return _Outcome(file, claim_id, error=f"Invalid PDF: {exc}")
+    except Exception as exc:
+        logger.exception("Extraction failed for batch file %s", file.filename)
+        return _Outcome(file, claim_id, error=f"Extraction error: {exc}")
+
+    try:
+        response = await run_pipeline(claim_id, pages)
+    except InvalidPdfError as exc:
+        return _Outcome(file, claim_id, error=f"Invalid PDF: {exc}")
+    except Exception as exc:
+        logger.exception("Pipeline failed for claim_id=%s (batch file %s)", claim_id, file.filename)
+        return _Outcome(file, claim_id, error=f"Pipeline error: {exc}")
+    return _Outcome(file, claim_id, cache_key, response)
+
+
+async def _persist(group: list[_Outcome]) -> list[BatchItemResult]:
+    """Save the fresh results of *group* in one transaction and turn every outcome into a result line."""
+    fresh = [o for o in group if o.response is not None and not o.cached]
+    fresh_ids = {id(o) for o in fresh}
+    db_error: str | None = None
+    if fresh:
+        try:
+            await save_claim_results([(o.response, o.cache_key) for o in fresh])
+        except Exception as exc:
+            logger.exception("Failed to persist a batch group of %d claim(s)", len(fresh))
+            db_error = f"Database error: {exc}"
+        else:
+            for o in fresh:
+                result_cache.put(o.cache_key, o.response)
+
+    results = []
+    for o in group:
+        error = o.error or (db_error if id(o) in fresh_ids else None)
+        results.append(
+            BatchItemResult(
+                index=o.file.index,
+                filename=o.file.filename,
+                status=JobStatus.FAILED if error else JobStatus.PROCESSED,
+                claim_id=o.claim_id,
+                cached=o.cached,
+                error=error,
+                result=None if error else o.response,
+            )
+        )
+    return results
+
+
+async def process_batch(
+    files: list[BatchFile],
+    max_concurrency: int = settings.BATCH_MAX_CONCURRENCY,
+    group_size: int = settings.BATCH_PERSIST_GROUP_SIZE,
+) -> AsyncIterator[BatchItemResult]:
+    """Process *files* concurrently, yielding one result per file in completion order."""
+    for file in files:
+        if file.upload is None:
+            yield BatchItemResult(index=file.index, filename=file.filename, status=JobStatus.FAILED, error=file.error)
+
+    slots = asyncio.Semaphore(max(1, max_concurrency))
+    done: asyncio.Queue[_Outcome] = asyncio.Queue()
+
+    async def run(file: BatchFile) -> None:
+        async with slots:
+            done.put_nowait(await _process(file))
+
+    tasks = [asyncio.create_task(run(file)) for file in files if file.upload is not None]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            group = [await done.get()]
+            while len(group) < group_size and not done.empty():
+                group.append(done.get_nowait())
+            remaining -= len(group)
+            for result in await _persist(group):
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
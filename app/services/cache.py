@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: services/cache.py
+# description: Small in-process LRU cache with per-entry TTL and hit/miss counters.
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """
+    Least-recently-used cache bounded by entry count and entry age.
+
+    Not thread-safe; intended for use from the event loop.  A ``ttl_seconds``
+    of 0 or less disables expiry.  With *size_of*, the cache also keeps the
+    total size of its values under *max_bytes* (0 = unbounded).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_bytes: int = 0, size_of: Callable[[V], int] | None = None) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes if size_of is not None else 0
+        self._size_of = size_of
+        self._entries: OrderedDict[str, tuple[float, V]] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _size(self, value: V) -> int:
+        return self._size_of(value) if self._size_of is not None else 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        """Presence check that neither refreshes recency nor touches the counters."""
+        entry = self._entries.get(key)
+        return entry is not None and (self.ttl_seconds <= 0 or time.monotonic() - entry[0] <= self.ttl_seconds)
+
+    def get(self, key: str) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, value = entry
+        if self.ttl_seconds > 0 and time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.bytes -= self._size(value)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: V) -> None:
+        self.pop(key)
+        self._entries[key] = (time.monotonic(), value)
+        self.bytes += self._size(value)
+        while len(self._entries) > self.max_entries or (self.max_bytes and self.bytes > self.max_bytes):
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= self._size(evicted)
+
+    def pop(self, key: str) -> V | None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.bytes -= self._size(entry[1])
+        return entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            **({"bytes": self.bytes, "max_bytes": self.max_bytes} if self._size_of is not None else {}),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
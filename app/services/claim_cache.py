@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: services/claim_cache.py
+# description: Read-through cache of serialized GET /api/claims/{claim_id} responses, invalidated via LISTEN/NOTIFY.
+"""
+Read-through cache for ``GET /api/claims/{claim_id}``.
+
+Dashboards poll the same claims over and over; each miss costs a pool
+connection and a round trip for the claim's stored snapshot.  This cache
+keeps the *serialized* JSON body per claim id in an LRU bounded by entry
+count, total size (``CLAIM_CACHE_MAX_MB``) and age (``CLAIM_CACHE_TTL_SECONDS``).
+
+Invalidation works across replicas: a trigger on ``claims`` (migration
+007) sends ``NOTIFY claim_changed, '<claim_id>'`` whenever a claim row is
+inserted, updated or deleted, and every replica LISTENs on a dedicated
+connection and drops that entry.  Correctness rules:
+
+- the cache is bypassed (no reads, no fills) whenever the listener is not
+  connected, and emptied when it reconnects — notifications sent in
+  between are lost;
+- concurrent misses for one claim share a single fetch, and a fill whose
+  claim was invalidated while it was loading is discarded, so a stale
+  read can never outlive the notification that made it stale;
+- only processed claims are cached; misses (404) are not.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+from app.core.config import settings
+from app.db.connection import connect
+from app.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "claim_changed"
+
+# Backoff between attempts to (re)establish the LISTEN connection.
+_RECONNECT_SECONDS = (1, 2, 5, 10, 30)
+
+
+class ClaimResponseCache:
+    """Claim id → JSON bytes, kept coherent with Postgres by LISTEN/NOTIFY."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int, max_bytes: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._memory: TTLCache[bytes] = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds, max_bytes=max_bytes, size_of=len)
+        self._loading: dict[str, asyncio.Future] = {}
+        self._stale: set[str] = set()
+        self._listening = False
+        self._task: asyncio.Task | None = None
+        self._connected_once = False
+        self.bypassed = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.reconnects = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and self._listening
+
+    async def get(self, claim_id: str, load: Callable[[str], Awaitable[bytes | None]]) -> bytes | None:
+        """The cached body for *claim_id*, or ``load(claim_id)`` — cached unless ``None`` or invalidated meanwhile."""
+        if not self.available:
+            self.bypassed += 1
+            return await load(claim_id)
+
+        body = self._memory.get(claim_id)
+        if body is not None:
+            return body
+
+        pending = self._loading.get(claim_id)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The request doing the load was cancelled, not this one.
+                return await load(claim_id)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[claim_id] = future
+        try:
+            body = await load(claim_id)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved: waiters re-raise it, and there may be none
+            raise
+        finally:
+            del self._loading[claim_id]
+            stale = claim_id in self._stale
+            self._stale.discard(claim_id)
+
+        if body is not None and not stale and self.available:
+            self._memory.set(claim_id, body)
+        future.set_result(body)
+        return body
+
+    def invalidate(self, claim_id: str) -> None:
+        self.invalidations += 1
+        self._memory.pop(claim_id)
+        if claim_id in self._loading:
+            self._stale.add(claim_id)
+
+    # LISTEN connection
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._listen(), name="claim-cache-listener")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._listening = False
+        self._memory.clear()
+
+    def _on_notify(self, _conn, _pid: int, _channel: str, claim_id: str) -> None:
+        self.invalidate(claim_id)
+
+    async def _listen(self) -> None:
+        attempt = 0
+        while True:
+            lost = asyncio.Event()
+            try:
+                conn = await connect()
+            except Exception as exc:
+                delay = _RECONNECT_SECONDS[min(attempt, len(_RECONNECT_SECONDS) - 1)]
+                logger.warning("Claim cache listener cannot connect (%s) — cache bypassed, retrying in %ds", exc, delay)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            try:
+                conn.add_termination_listener(lambda _conn: lost.set())
+                await conn.add_listener(CHANNEL, self._on_notify)
+                # Anything cached before this point may have missed notifications.
+                self._memory.clear()
+                self._listening = True
+                if self._connected_once:
+                    self.reconnects += 1
+                self._connected_once = True
+                attempt = 0
+                logger.info("Claim cache listening on %s", CHANNEL)
+                await lost.wait()
+                logger.warning("Claim cache listener connection lost — cache bypassed until it reconnects")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Claim cache listener failed", exc_info=True)
+                attempt += 1
+            finally:
+                self._listening = False
+                if not conn.is_closed():
+                    await asyncio.shield(conn.close(timeout=5))
+
+            await asyncio.sleep(_RECONNECT_SECONDS[min(attempt, len(_RECONNECT_SECONDS) - 1)])
+
+    def stats(self) -> dict:
+        memory = self._memory.stats()
+        return {
+            "enabled": self.enabled,
+            "listening": self._listening,
+            **memory,
+            "coalesced": self.coalesced,
+            "bypassed": self.bypassed,
+            "invalidations": self.invalidations,
+            "reconnects": self.reconnects,
+        }
+
+
+claim_cache = ClaimResponseCache(
+    ttl_seconds=settings.CLAIM_CACHE_TTL_SECONDS,
+    max_entries=settings.CLAIM_CACHE_MAX_ENTRIES,
+    max_bytes=settings.CLAIM_CACHE_MAX_MB * 1024 * 1024,
+)
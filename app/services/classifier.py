@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: services/classifier.py
+# description: Local page pre-classifier — keyword/regex scorer plus an optional TF-IDF model.
+"""
+Local page pre-classifier.
+
+Runs in front of the segregator LLM.  Obvious pages — a "DISCHARGE
+SUMMARY" header, an Aadhaar or PAN number, "IFSC" next to an account
+number — are classified here in microseconds and never reach the LLM.
+Anything below ``HEURISTIC_MIN_CONFIDENCE`` stays ambiguous and is left
+to the segregator.
+
+Scoring
+-------
+Each document type has weighted regex rules; a type's score is the sum
+of the weights of the rules that match.  The confidence of the best type
+is ``(1 - e^-best) * best / (best + runner_up)`` — strong evidence for a
+single type gives ~0.95, mixed evidence is discounted.
+
+Optionally a small TF-IDF nearest-centroid model, trained from stored LLM
+labels (see ``benchmarks/classifier_report.py``), is combined with the
+rules: agreement raises confidence (noisy-OR), disagreement lowers it.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.schema import DocumentType, PageClassification, PageData
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _Rule:
+    pattern: re.Pattern[str]
+    weight: float
+
+
+def _rules(*specs: tuple[str, float], flags: int = re.IGNORECASE) -> list[_Rule]:
+    return [_Rule(re.compile(pattern, flags), weight) for pattern, weight in specs]
+
+
+RULES: dict[DocumentType, list[_Rule]] = {
+    DocumentType.DISCHARGE_SUMMARY: _rules(
+        (r"discharge\s+(summary|certificate)", 3.0),
+        (r"date\s+of\s+(admission|discharge)|(admission|discharge)\s+date", 1.5),
+        (r"course\s+in\s+(the\s+)?hospital|hospital\s+course", 1.0),
+        (r"discharge\s+(advice|medications?|instructions)", 1.0),
+        (r"final\s+diagnosis|provisional\s+diagnosis", 0.8),
+    ),
+    DocumentType.IDENTITY: [
+        *_rules(
+            (r"aadhaa?r|unique\s+identification\s+authority", 2.0),
+            (r"income\s+tax\s+department|permanent\s+account\s+number", 2.0),
+            (r"driving\s+licen[cs]e|passport\s+no", 2.0),
+            (r"\b\d{4}\s\d{4}\s\d{4}\b", 1.5),
+            (r"date\s+of\s+birth|\bdob\b", 0.5),
+        ),
+        *_rules((r"\b[A-Z]{5}\d{4}[A-Z]\b", 1.5), flags=0),  # PAN
+    ],
+    DocumentType.CHEQUE_OR_BANK: [
+        *_rules(
+            (r"\bifsc\b", 1.5),
+            (r"\bmicr\b", 1.5),
+            (r"cancell?ed\s+cheque|\bcheque\b", 1.5),
+            (r"\ba/?c\.?\s*no\b|account\s+(no|number)", 1.0),
+            (r"pay\s+.{0,40}or\s+bearer|branch", 0.5),
+        ),
+        *_rules((r"\b[A-Z]{4}0[A-Z0-9]{6}\b", 1.5), flags=0),  # IFSC code
+    ],
+    DocumentType.ITEMIZED_BILL: _rules(
+        (r"itemi[sz]ed\s+bill|detailed\s+bill|final\s+bill|bill\s+of\s+supply", 2.5),
+        (r"\bqty\b|quantity", 0.7),
+        (r"unit\s+(price|rate)|\brate\b", 0.5),
+        (r"grand\s+total|net\s+(payable|amount)|total\s+amount", 1.0),
+        (r"room\s+(rent|charges)|consumables|pharmacy\s+charges", 0.8),
+        (r"bill\s+(no|number|date)", 0.5),
+    ),
+    DocumentType.CLAIM_FORM: _rules(
+        (r"claim\s+form", 3.0),
+        (r"\bcashless\b|\breimbursement\b", 1.0),
+        (r"to\s+be\s+filled\s+(in\s+)?by\s+(the\s+)?(insured|hospital|claimant)", 2.0),
+        (r"\bpart\s+[ab]\b", 0.8),
+        (r"declaration\s+by\s+(the\s+)?(insured|hospital|patient)", 1.0),
+        (r"\btpa\b|third\s+party\s+administrator", 0.5),
+    ),
+    DocumentType.PRESCRIPTION: _rules(
+        (r"\bprescription\b", 2.0),
+        (r"\brx\b|℞", 1.5),
+        (r"\b(tab|cap|syp|inj)\.?\s+[a-z]", 1.0),
+        # BD/TDS/HS/SOS alone are bill words (TDS = tax deducted at source) or initials: only count them after a dose on the same line.
+        (r"\b(once|twice|thrice)\s+(a\s+)?daily\b|(\b(tab|cap|syp|inj)\b|\d\s*(mg|mcg|ml)\b)[^\n]{0,60}?\b(bd|tds|qid|hs|sos)\b", 1.0),
+    ),
+    DocumentType.INVESTIGATION_REPORT: _rules(
+        (r"(biological\s+)?reference\s+(range|interval)|normal\s+range", 2.0),
+        (r"laboratory|pathology|radiology|lab\s+report", 1.5),
+        (r"specimen|sample\s+(collected|received)", 1.0),
+        (r"ha?emoglobin|platelet|\bwbc\b|creatinine|bilirubin", 0.8),
+        (r"\bimpression\b|x-?ray|ct\s+scan|\bmri\b|ultrasound|\busg\b", 0.8),
+    ),
+    DocumentType.CASH_RECEIPT: _rules(
+        (r"cash\s+memo|money\s+receipt", 2.5),
+        (r"received\s+with\s+thanks|received\s+from", 2.0),
+        (r"\breceipt\b", 1.0),
+        (r"(mode\s+of\s+payment|payment\s+mode)", 1.0),
+        (r"rupees\s+.{0,80}\bonly\b", 1.0),
+    ),
+}
+
+
+def score_page(text: str) -> dict[DocumentType, float]:
+    """Sum of matching rule weights per document type (types with no match are omitted)."""
+    scores: dict[DocumentType, float] = {}
+    for doc_type, rules in RULES.items():
+        score = sum(rule.weight for rule in rules if rule.pattern.search(text))
+        if score:
+            scores[doc_type] = score
+    return scores
+
+
+def _rule_prediction(text: str) -> tuple[DocumentType, float] | None:
+    scores = score_page(text)
+    if not scores:
+        return None
+    ranked = sorted(scores.values(), reverse=True)
+    best, runner_up = ranked[0], (ranked[1] if len(ranked) > 1 else 0.0)
+    doc_type = max(scores, key=scores.__getitem__)
+    return doc_type, (1 - math.exp(-best)) * best / (best + runner_up)
+
+
+# TF-IDF nearest-centroid model
+_TOKEN = re.compile(r"[a-z][a-z/]+")
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class TfidfCentroidModel:
+    """Unigram TF-IDF vectors, one L2-normalised centroid per document type, cosine scoring."""
+
+    def __init__(self, vocabulary: dict[str, int], idf: np.ndarray, centroids: np.ndarray, labels: list[DocumentType]) -> None:
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.centroids = centroids
+        self.labels = labels
+
+    @classmethod
+    def fit(cls, texts: list[str], labels: list[DocumentType], max_features: int = 20_000, min_df: int = 2) -> TfidfCentroidModel:
+        docs = [set(_tokens(t)) for t in texts]
+        df: dict[str, int] = {}
+        for doc in docs:
+            for token in doc:
+                df[token] = df.get(token, 0) + 1
+        kept = sorted((t for t, n in df.items() if n >= min_df), key=lambda t: -df[t])[:max_features]
+        vocabulary = {t: i for i, t in enumerate(sorted(kept))}
+        idf = np.array([math.log((1 + len(texts)) / (1 + df[t])) + 1 for t in sorted(kept)], dtype=np.float32)
+
+        model = cls(vocabulary, idf, np.zeros((0, len(vocabulary)), dtype=np.float32), [])
+        matrix = model._vectorize(texts)
+        classes = sorted(set(labels), key=lambda d: d.value)
+        label_array = np.array([d.value for d in labels])
+        centroids = np.stack([matrix[label_array == d.value].mean(axis=0) for d in classes])
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-9
+        model.centroids, model.labels = centroids.astype(np.float32), classes
+        return model
+
+    def _vectorize(self, texts: list[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in _tokens(text):
+                col = self.vocabulary.get(token)
+                if col is not None:
+                    matrix[row, col] += 1
+        matrix = np.log1p(matrix) * self.idf
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-9
+        return matrix
+
+    def predict(self, texts: list[str]) -> list[tuple[DocumentType, float]]:
+        """Best type and a softmax-calibrated probability for each text."""
+        similarity = self._vectorize(texts) @ self.centroids.T
+        logits = similarity * 10.0
+        probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs /= probs.sum(axis=1, keepdims=True)
+        best = probs.argmax(axis=1)
+        return [(self.labels[i], float(probs[row, i])) for row, i in enumerate(best)]
+
+    def save(self, path: str | Path) -> None:
+        words = sorted(self.vocabulary, key=self.vocabulary.__getitem__)
+        np.savez_compressed(path, words=np.array(words), idf=self.idf, centroids=self.centroids, labels=np.array([d.value for d in self.labels]))
+
+    @classmethod
+    def load(cls, path: str | Path) -> TfidfCentroidModel:
+        data = np.load(path, allow_pickle=False)
+        vocabulary = {str(w): i for i, w in enumerate(data["words"])}
+        return cls(vocabulary, data["idf"], data["centroids"], [DocumentType(str(v)) for v in data["labels"]])
+
+
+class PagePreClassifier:
+    """Rules, optionally combined with a TF-IDF model; returns only confident classifications."""
+
+    def __init__(self, min_confidence: float, model: TfidfCentroidModel | None = None) -> None:
+        self.min_confidence = min_confidence
+        self.model = model
+
+    def predict(self, pages: list[PageData]) -> list[tuple[DocumentType, float] | None]:
+        """Best guess and confidence per page, regardless of threshold."""
+        rule_preds = [_rule_prediction(p.text) if p.text.strip() else None for p in pages]
+        if self.model is None:
+            return rule_preds
+
+        model_preds = self.model.predict([p.text for p in pages])
+        combined: list[tuple[DocumentType, float] | None] = []
+        for rule, (model_type, model_conf) in zip(rule_preds, model_preds):
+            if rule is None:
+                combined.append((model_type, model_conf))
+            elif rule[0] == model_type:
+                combined.append((model_type, 1 - (1 - rule[1]) * (1 - model_conf)))
+            else:
+                winner = rule if rule[1] >= model_conf else (model_type, model_conf)
+                combined.append((winner[0], abs(rule[1] - model_conf)))
+        return combined
+
+    def classify(self, pages: list[PageData]) -> dict[int, PageClassification]:
+        """Confident classifications keyed by page number; ambiguous pages are omitted."""
+        out: dict[int, PageClassification] = {}
+        for page, prediction in zip(pages, self.predict(pages)):
+            if prediction is not None and prediction[1] >= self.min_confidence:
+                out[page.page_number] = PageClassification(
+                    page_number=page.page_number, document_type=prediction[0], confidence=round(prediction[1], 3)
+                )
+        return out
+
+
+def build_pre_classifier() -> PagePreClassifier | None:
+    """Pre-classifier configured from settings, or ``None`` when disabled."""
+    if not settings.HEURISTIC_CLASSIFIER_ENABLED:
+        return None
+    model = None
+    if settings.HEURISTIC_TFIDF_MODEL_PATH:
+        model = TfidfCentroidModel.load(settings.HEURISTIC_TFIDF_MODEL_PATH)
+        logger.info("Loaded TF-IDF page model with %d terms and %d classes", len(model.vocabulary), len(model.labels))
+    return PagePreClassifier(min_confidence=settings.HEURISTIC_MIN_CONFIDENCE, model=model)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: services/compaction.py
+# description: Prompt compaction — page-text cleanup, repeated-line removal and per-node token budgets.
+"""
+Prompt compaction for page text.
+
+Extracted page text carries a lot that costs tokens but tells the model
+nothing: runs of spaces, dotted and dashed leaders, "Page 3 of 12"
+furniture, blank lines, and the hospital letterhead and footer repeated on
+every page.  Compaction happens in two places:
+
+- :func:`prepare_prompt_pages` runs once per claim, before the graph.  It
+  cleans each page on its own and records each raw page's token count,
+  so savings can be reported.  The raw pages stay in the state for the
+  page cache and the local pre-classifier.
+- :func:`page_block` builds the page section of one prompt.  Header and
+  footer lines that repeat on at least ``repeat_share`` of *that prompt's*
+  pages are shown once at the top instead of on every page.  The section is then cut to
+  fit the node's token budget.  Working per prompt keeps each LLM call
+  self-contained.  It also means the segregator only folds lines shared
+  by every page of its window (``repeat_share=1.0``), so a document
+  title that tells pages apart is never folded.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+
+from app.llm.tokens import count_tokens, truncate_to_tokens
+from app.models.schema import PageData
+
+# Dotted / dashed leaders and horizontal rules: "Room rent ........ 1500", "-----".
+_LEADER = re.compile(r"(?:[.·…_=~*-]\s?){4,}")
+_ODD_SPACE = re.compile(r"[\t\u00a0\u2000-\u200b\u3000]")
+# Runs of spaces become two spaces, which still mark a column boundary.
+_SPACES = re.compile(r" {3,}")
+_PAGE_FURNITURE = re.compile(r"^(?:page\s*\d+(?:\s*(?:of|/)\s*\d+)?|\d+\s*(?:of|/)\s*\d+|-\s*\d+\s*-)$", re.IGNORECASE)
+
+# Only the top and bottom lines of a page (letterhead, footer) are folded, never
+# lines that look like money rows: an identical charge on two bill pages is two charges.
+_EDGE_LINES = 5
+_MAX_REPEATED_LINE_CHARS = 200
+_AMOUNT = re.compile(r"\d\.\d{2}\b")
+
+_TRUNCATED = "[… truncated to fit the token budget]"
+
+
+def compact_text(text: str) -> str:
+    """Collapse whitespace and leaders and drop blank lines and page-number furniture."""
+    lines = []
+    for raw in text.splitlines():
+        line = _SPACES.sub("  ", _ODD_SPACE.sub(" ", _LEADER.sub("  ", raw))).strip()
+        if line and not _PAGE_FURNITURE.match(line):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def prepare_prompt_pages(pages: list[PageData], enabled: bool = True) -> tuple[list[PageData], dict[int, int]]:
+    """Compacted copies of *pages* for prompts, and the raw token count of every page."""
+    raw_tokens = {p.page_number: count_tokens(p.text) for p in pages}
+    if not enabled:
+        return pages, raw_tokens
+    return [PageData(page_number=p.page_number, text=compact_text(p.text)) for p in pages], raw_tokens
+
+
+def _edge_lines(text: str) -> list[str]:
+    lines = text.splitlines()
+    if len(lines) > 2 * _EDGE_LINES:
+        lines = lines[:_EDGE_LINES] + lines[-_EDGE_LINES:]
+    return [line for line in dict.fromkeys(lines) if len(line) <= _MAX_REPEATED_LINE_CHARS and not _AMOUNT.search(line)]
+
+
+def repeated_lines(pages: list[PageData], min_share: float) -> list[str]:
+    """Header/footer lines found on at least *min_share* of *pages* (and on two or more), in first-seen order."""
+    if len(pages) < 2:
+        return []
+    threshold = max(2, math.ceil(min_share * len(pages)))
+    counts: dict[str, int] = {}
+    found: list[str] = []
+    for page in pages:
+        for line in _edge_lines(page.text):
+            counts[line] = counts.get(line, 0) + 1
+            if counts[line] == threshold:
+                found.append(line)
+    return found
+
+
+def _fold(text: str, folded: set[str]) -> str:
+    """Drop *folded* lines from the header/footer zones of *text*, keeping the middle untouched."""
+    lines = text.splitlines()
+    edge = len(lines) if len(lines) <= 2 * _EDGE_LINES else _EDGE_LINES
+    head = [line for line in lines[:edge] if line not in folded]
+    if edge == len(lines):
+        return "\n".join(head)
+    tail = [line for line in lines[-_EDGE_LINES:] if line not in folded]
+    return "\n".join([*head, *lines[_EDGE_LINES:-_EDGE_LINES], *tail])
+
+
+@dataclass(frozen=True)
+class PromptBlock:
+    text: str
+    tokens: int
+    raw_tokens: int
+    truncated: bool
+
+
+def page_block(
+    pages: list[PageData],
+    token_budget: int,
+    raw_tokens: dict[int, int] | None = None,
+    repeat_share: float = 0.5,
+    empty_marker: str = "",
+) -> PromptBlock:
+    """
+    ``--- PAGE n ---`` sections for *pages*, with repeated lines folded and at most *token_budget* tokens.
+
+    *raw_tokens* (from :func:`prepare_prompt_pages`) lets the block report
+    what the same pages would have cost uncompacted.  When the pages do
+    not fit, every page is cut proportionally to its size.
+    """
+    common = repeated_lines(pages, repeat_share)
+    folded = set(common)
+    header = ""
+    if common:
+        header = "--- LINES REPEATED ACROSS THESE PAGES (shown once, removed from each page) ---\n" + "\n".join(common)
+
+    bodies = []
+    for page in pages:
+        body = _fold(page.text, folded) if folded else page.text
+        bodies.append(body if body.strip() else empty_marker)
+
+    sections = [f"--- PAGE {p.page_number} ---\n{body}" for p, body in zip(pages, bodies)]
+    text = "\n\n".join([header, *sections] if header else sections)
+    tokens = count_tokens(text)
+    truncated = tokens > token_budget > 0
+
+    if truncated:
+        fixed = count_tokens(header) + sum(count_tokens(f"--- PAGE {p.page_number} ---\n\n\n{_TRUNCATED}") for p in pages)
+        body_tokens = [count_tokens(b) for b in bodies]
+        scale = max(0.0, token_budget - fixed) / max(1, sum(body_tokens))
+        sections = []
+        for page, body, n in zip(pages, bodies, body_tokens):
+            keep = int(n * scale)
+            if keep < n:
+                body = f"{truncate_to_tokens(body, keep)}\n{_TRUNCATED}"
+            sections.append(f"--- PAGE {page.page_number} ---\n{body}")
+        text = "\n\n".join([header, *sections] if header else sections)
+        tokens = count_tokens(text)
+
+    raw = sum(raw_tokens.get(p.page_number, 0) for p in pages) if raw_tokens else tokens
+    return PromptBlock(text=text, tokens=tokens, raw_tokens=raw, truncated=truncated)
+
+
+def token_usage(node: str, *blocks: PromptBlock) -> dict[str, dict[str, int]]:
+    """State update for ``PipelineState.token_usage`` covering the prompts a node sent."""
+    return {node: {"raw_tokens": sum(b.raw_tokens for b in blocks), "prompt_tokens": sum(b.tokens for b in blocks), "prompts": len(blocks)}}
+
+
+class CompactionStats:
+    """Process-wide totals of page-text tokens before and after compaction."""
+
+    def __init__(self) -> None:
+        self.claims = 0
+        self.raw_tokens = 0
+        self.prompt_tokens = 0
+        self.by_node: dict[str, dict[str, int]] = {}
+
+    def record(self, usage: dict[str, dict[str, int]]) -> tuple[int, int]:
+        """Add one claim's ``token_usage``; returns its ``(raw, prompt)`` totals."""
+        raw = sum(u["raw_tokens"] for u in usage.values())
+        sent = sum(u["prompt_tokens"] for u in usage.values())
+        self.claims += 1
+        self.raw_tokens += raw
+        self.prompt_tokens += sent
+        for node, u in usage.items():
+            totals = self.by_node.setdefault(node, {"raw_tokens": 0, "prompt_tokens": 0, "prompts": 0})
+            for key, value in u.items():
+                totals[key] += value
+        return raw, sent
+
+    def stats(self) -> dict:
+        saved = self.raw_tokens - self.prompt_tokens
+        return {
+            "claims": self.claims,
+            "raw_tokens": self.raw_tokens,
+            "prompt_tokens": self.prompt_tokens,
+            "tokens_saved": saved,
+            "saved_ratio": round(saved / self.raw_tokens, 4) if self.raw_tokens else 0.0,
+            "by_node": self.by_node,
+        }
+
+
+compaction_stats = CompactionStats()
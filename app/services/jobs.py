@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: services/jobs.py
+# description: Background workers draining the Postgres claim job queue.
+"""
+Background workers for ``POST /api/jobs``.
+
+Submitted PDFs are stored in ``claim_jobs`` and their claim row starts
+out ``queued``.  Each worker task polls the table, leases one job at a
+time with ``FOR UPDATE SKIP LOCKED`` (so any number of replicas can share
+the queue), and keeps the lease alive with a heartbeat while the
+pipeline runs.  If a worker dies, its lease expires and another worker
+picks the job up again.
+
+Outcomes:
+
+- success — results are written and the claim becomes ``processed``;
+- unreadable PDF (``InvalidPdfError``) — the claim is ``failed`` at once;
+- anything else — the job is re-queued with exponential backoff until
+  ``max_attempts`` is spent, then the claim is ``failed``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Awaitable
+
+from app.core.config import settings
+from app.db.repository import (
+    ClaimJob,
+    claim_next_job,
+    complete_claim_job,
+    fail_abandoned_jobs,
+    fail_claim_job,
+    release_claim_job,
+    renew_job_lease,
+    retry_claim_job,
+)
+from app.services.pdf import InvalidPdfError
+from app.services.processing import process_document
+from app.services.result_cache import result_cache
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the stored error message.
+_MAX_ERROR_CHARS = 2000
+
+
+def retry_delay(attempt: int, base_seconds: float, max_seconds: float) -> float:
+    """Exponential backoff: *base_seconds* after the first attempt, doubling up to *max_seconds*."""
+    return min(max_seconds, base_seconds * 2 ** max(0, attempt - 1))
+
+
+class JobWorkerPool:
+    """A fixed number of asyncio tasks, each processing one job at a time."""
+
+    def __init__(
+        self,
+        concurrency: int,
+        lease_seconds: float,
+        poll_interval_seconds: float,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+    ) -> None:
+        self.concurrency = max(0, concurrency)
+        self.lease_seconds = lease_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._tasks: list[asyncio.Task] = []
+        self._last_sweep = 0.0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker(n), name=f"claim-job-worker-{n}") for n in range(self.concurrency)]
+        logger.info("Started %d claim job worker(s)", len(self._tasks))
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if tasks:
+            logger.info("Stopped %d claim job worker(s)", len(tasks))
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            try:
+                await self._sweep()
+                job = await claim_next_job(self.lease_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Job worker %d could not poll the queue", n, exc_info=True)
+                job = None
+            if job is None:
+                await asyncio.sleep(self.poll_interval_seconds)
+                continue
+            await self._run(job)
+
+    async def _sweep(self) -> None:
+        """Fail jobs abandoned on their last attempt; at most once per lease period."""
+        if time.monotonic() - self._last_sweep < self.lease_seconds:
+            return
+        self._last_sweep = time.monotonic()
+        failed = await fail_abandoned_jobs()
+        if failed:
+            logger.warning("Failed %d abandoned claim job(s)", failed)
+
+    async def _heartbeat(self, job: ClaimJob) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await renew_job_lease(job, self.lease_seconds)
+            except Exception:
+                # A DB hiccup must not end the heartbeat: the lease still has two thirds left to renew in.
+                logger.warning("Could not renew lease on claim_id=%s attempt %d", job.claim_id, job.attempts, exc_info=True)
+                continue
+            if not renewed:
+                logger.warning("Lost lease on claim_id=%s attempt %d", job.claim_id, job.attempts)
+                return
+
+    async def _run(self, job: ClaimJob) -> None:
+        logger.info("Processing claim_id=%s (attempt %d/%d)", job.claim_id, job.attempts, job.max_attempts)
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            response = await process_document(job.claim_id, job.pdf)
+        except asyncio.CancelledError:
+            with contextlib.suppress(Exception):
+                await release_claim_job(job)
+            raise
+        except InvalidPdfError as exc:
+            self.failed += 1
+            await self._settle(fail_claim_job(job, f"Invalid PDF: {exc}"[:_MAX_ERROR_CHARS]))
+            return
+        except Exception as exc:
+            logger.exception("Job for claim_id=%s raised on attempt %d", job.claim_id, job.attempts)
+            error = f"Pipeline error: {exc}"[:_MAX_ERROR_CHARS]
+            if job.attempts >= job.max_attempts:
+                self.failed += 1
+                await self._settle(fail_claim_job(job, error))
+            else:
+                self.retried += 1
+                delay = retry_delay(job.attempts, self.retry_base_seconds, self.retry_max_seconds)
+                await self._settle(retry_claim_job(job, error, delay))
+            return
+        finally:
+            heartbeat.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await heartbeat
+
+        if await self._settle(complete_claim_job(job, response)):
+            self.completed += 1
+            if job.cache_key:
+                result_cache.put(job.cache_key, response)
+
+    @staticmethod
+    async def _settle(write: Awaitable[bool | None]) -> bool | None:
+        """Record a job outcome; on DB errors the lease simply expires and the job is retried."""
+        try:
+            return await write
+        except Exception:
+            logger.exception("Could not record job outcome")
+            return None
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "lease_seconds": self.lease_seconds,
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+# Module-level worker pool, owned by the FastAPI lifespan
+_workers: JobWorkerPool | None = None
+
+
+def init_job_workers() -> None:
+    global _workers
+    if _workers is not None:
+        return
+    _workers = JobWorkerPool(
+        concurrency=settings.JOB_WORKER_CONCURRENCY,
+        lease_seconds=settings.JOB_LEASE_SECONDS,
+        poll_interval_seconds=settings.JOB_POLL_INTERVAL_SECONDS,
+        retry_base_seconds=settings.JOB_RETRY_BASE_SECONDS,
+        retry_max_seconds=settings.JOB_RETRY_MAX_SECONDS,
+    )
+    _workers.start()
+
+
+async def close_job_workers() -> None:
+    global _workers
+    if _workers is not None:
+        await _workers.stop()
+        _workers = None
+
+
+def get_job_workers() -> JobWorkerPool:
+    if _workers is None:
+        raise RuntimeError("Job workers are not initialised. Call init_job_workers() first.")
+    return _workers
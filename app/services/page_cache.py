@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: services/page_cache.py
+# description: Page-fingerprint cache of segregator classifications.
+"""
+Page-level classification cache.
+
+Claims are full of near-identical template pages (insurer claim forms,
+cancelled cheques, hospital cover sheets).  Each page's text is
+normalised — lower-cased, digit runs masked, whitespace collapsed — and
+hashed together with a namespace (model + segregator prompt version).  A
+confident classification for that fingerprint is reused instead of
+asking the LLM again.
+
+Two tiers:
+
+- an in-process LRU bounded by size and age, consulted by the segregator;
+- a Postgres table shared by all replicas.  The segregator calls
+  ``warm()`` to bulk-load the fingerprints of an incoming claim into
+  memory and ``flush()`` to write back what it learned.  Old rows are
+  pruned by age and the table is capped at a maximum row count.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import time
+
+from app.core.config import settings
+from app.db.repository import fetch_page_cache_entries, prune_page_cache, save_page_cache_entries
+from app.models.schema import DocumentType, PageClassification, PageData
+from app.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_DIGITS = re.compile(r"\d+")
+_WHITESPACE = re.compile(r"\s+")
+
+# Minimum seconds between two prune passes over the Postgres table.
+_PRUNE_INTERVAL_SECONDS = 600
+
+# Length of the page text kept with each row when PAGE_CACHE_STORE_TEXT is on.
+_SAMPLE_TEXT_CHARS = 4000
+
+
+def normalize_page_text(text: str) -> str:
+    """Lower-case, mask digit runs and collapse whitespace so template pages hash alike."""
+    return _WHITESPACE.sub(" ", _DIGITS.sub("#", text.lower())).strip()
+
+
+class PageClassificationCache:
+    """Fingerprint → (document type, confidence), in memory and in Postgres."""
+
+    def __init__(
+        self, namespace: str, max_entries: int, ttl_seconds: int, max_rows: int, min_confidence: float, store_text: bool = False
+    ) -> None:
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.min_confidence = min_confidence
+        # Keep a text sample with each row so the local pre-classifier can be trained and evaluated.
+        self.store_text = store_text
+        self._memory: TTLCache[tuple[DocumentType, float]] = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._pending: dict[str, tuple[DocumentType, float, str | None]] = {}
+        self._last_prune = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def fingerprint(self, text: str) -> str | None:
+        """Hash of the normalised page text, or ``None`` for blank pages (never cached)."""
+        normalized = normalize_page_text(text)
+        if not normalized:
+            return None
+        return hashlib.sha256(f"{self.namespace}\x00{normalized}".encode()).hexdigest()
+
+    def lookup(self, pages: list[PageData]) -> dict[int, PageClassification]:
+        """Return cached classifications keyed by page number (memory tier only)."""
+        if not self.enabled:
+            return {}
+        hits: dict[int, PageClassification] = {}
+        for page in pages:
+            fp = self.fingerprint(page.text)
+            entry = self._memory.get(fp) if fp else None
+            if entry is not None:
+                hits[page.page_number] = PageClassification(page_number=page.page_number, document_type=entry[0], confidence=entry[1])
+        return hits
+
+    def remember(self, pages: list[PageData], classifications: list[PageClassification]) -> None:
+        """Cache confident LLM classifications and queue them for :meth:`flush`."""
+        if not self.enabled:
+            return
+        by_number = {p.page_number: p for p in pages}
+        for c in classifications:
+            page = by_number.get(c.page_number)
+            fp = self.fingerprint(page.text) if page else None
+            if fp is None or c.confidence < self.min_confidence:
+                continue
+            self._memory.set(fp, (c.document_type, c.confidence))
+            self._pending[fp] = (c.document_type, c.confidence, page.text[:_SAMPLE_TEXT_CHARS] if self.store_text else None)
+
+    async def warm(self, pages: list[PageData]) -> int:
+        """Load the Postgres entries for *pages* into memory; returns how many were found."""
+        if not self.enabled:
+            return 0
+        wanted = {fp for fp in (self.fingerprint(p.text) for p in pages) if fp and fp not in self._memory}
+        if not wanted:
+            return 0
+        try:
+            rows = await fetch_page_cache_entries(sorted(wanted), self.ttl_seconds)
+        except Exception:
+            logger.warning("Page cache DB lookup failed — continuing with memory tier only", exc_info=True)
+            return 0
+        for fp, doc_type, confidence in rows:
+            self._memory.set(fp, (DocumentType(doc_type), confidence))
+        return len(rows)
+
+    async def flush(self) -> int:
+        """Write queued classifications to Postgres and prune the table now and then."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            await save_page_cache_entries([(fp, doc_type.value, confidence, text) for fp, (doc_type, confidence, text) in pending.items()])
+            if time.monotonic() - self._last_prune > _PRUNE_INTERVAL_SECONDS:
+                self._last_prune = time.monotonic()
+                removed = await prune_page_cache(self.ttl_seconds, self.max_rows)
+                if removed:
+                    logger.info("Pruned %d page cache row(s)", removed)
+        except Exception:
+            logger.warning("Page cache DB write failed — %d entries kept in memory only", len(pending), exc_info=True)
+            return 0
+        return len(pending)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "pending_writes": len(self._pending), **self._memory.stats()}
+
+
+def build_page_cache(system_prompt: str) -> PageClassificationCache:
+    """Cache namespaced by provider/model and the given classifier prompt, sized from settings."""
+    prompt_version = hashlib.sha256(system_prompt.encode()).hexdigest()[:12]
+    return PageClassificationCache(
+        namespace=f"{settings.LLM_PROVIDER}/{settings.LLM_MODEL}:{prompt_version}",
+        max_entries=settings.PAGE_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.PAGE_CACHE_TTL_SECONDS,
+        max_rows=settings.PAGE_CACHE_MAX_ROWS,
+        min_confidence=settings.PAGE_CACHE_MIN_CONFIDENCE,
+        store_text=settings.PAGE_CACHE_STORE_TEXT,
+    )
@@ -5,70 +5,595 @@
 """
 PDF processing utilities — memory-efficient, parallel text extraction.
 
-Uses pdfplumber for text extraction and ProcessPoolExecutor so that
-CPU-bound per-page work runs across cores without blocking the async
-event loop.  Each page is opened independently inside the worker so
-only the raw bytes (shared once via fork) and the resulting text string
-cross the process boundary — never a heavy pdfplumber/PDF object.
+Text is extracted by a pluggable backend (``PDF_BACKEND``: pypdfium2 by
+default, pdfminer or pdfplumber — see :data:`BACKENDS`) in a long-lived
+ProcessPoolExecutor so that CPU-bound page parsing runs across cores
+without blocking the async event loop.  The pool is owned by the FastAPI ``lifespan`` and
+reused across uploads, so worker start-up is paid once per process.
+
+Each document is split into contiguous page ranges, one per worker, and
+every worker opens the PDF exactly once for its whole range.  Uploads
+spooled to disk are handed over by path; in-memory bytes are copied once
+into ``multiprocessing.shared_memory`` and workers receive only the
+segment name plus their page range.  Either way the PDF bytes never
+travel through the pool's pipes.  Only the resulting text strings cross
+back — never a heavy PDF object.
+
+:meth:`PdfExtractionEngine.stream` yields the pages in order, a few at a
+time, as the workers finish them, so the segregator can classify the
+first pages of a long PDF while the rest is still being parsed.
 """
 
 from __future__ import annotations
 
+import asyncio
 import io
 import logging
-from concurrent.futures import ProcessPoolExecutor
-from functools import partial
+import multiprocessing
+import statistics
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from contextlib import ExitStack, closing, contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, BinaryIO, ContextManager
 
 import pdfplumber
+import pypdfium2 as pdfium
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.layout import LAParams, LTTextContainer
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
 
+from app.core.config import settings
+from app.core.metrics import ERRORS, PDF_EXTRACT_SECONDS, PDF_PAGE_SECONDS, PDF_QUEUE_DEPTH
+from app.core.profiling import active_session, record_stage, sampled_call
 from app.models.schema import PageData
 
 logger = logging.getLogger(__name__)
 
-# Cap workers to avoid over-subscribing on large machines; 4 is plenty for
-# a 10–20 page PDF where each page takes ~5–20 ms of CPU time.
-_MAX_WORKERS = 4
+# Pool size from PDF_EXTRACTION_WORKERS (default 4: enough for a 10–20 page PDF
+# at ~5–20 ms of CPU per page without over-subscribing a shared host).
+# Raise it on dedicated machines with more cores.
+_MAX_WORKERS = settings.PDF_EXTRACTION_WORKERS
 
+# Number of recent per-page timings kept for the stats window.
+_TIMING_WINDOW = 1000
 
-# Worker function (runs in a child process)
-def _extract_single_page(pdf_bytes: bytes, page_index: int) -> PageData:
-    """Open the PDF in this process, extract text for *one* page, close it."""
-    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-        page = pdf.pages[page_index]
-        text = page.extract_text() or ""
-    return PageData(page_number=page_index + 1, text=text)
+# How in-memory PDF bytes reach the workers: "shared_memory" (one copy,
+# handle only over the pipe) or "pickle" (bytes pickled into every task).
+# Files on disk are always passed by path.
+TRANSPORTS = ("shared_memory", "pickle")
 
 
-# Public API
-def extract_pages(pdf_bytes: bytes) -> list[PageData]:
-    """
-    Extract text from every page of a PDF in parallel.
+class InvalidPdfError(ValueError):
+    """The upload is not a readable PDF: empty, unparseable, without pages or with a page that fails to parse."""
 
-    Args:
-        pdf_bytes: Raw bytes of the uploaded PDF file.
 
-    Returns:
-        Ordered list of ``PageData`` (1-indexed page numbers).
+# Backends
+class PdfBackend(ABC):
+    """
+    Page-text extraction library used inside the workers.
 
-    Raises:
-        ValueError: If the PDF has zero pages or cannot be parsed.
+    Workers receive the backend by name (see :data:`BACKENDS`) and open
+    each PDF once per page range, so implementations only need to open a
+    document from a path or a seekable binary stream, count its pages and
+    return one page's text.
     """
-    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-        total_pages = len(pdf.pages)
 
-    if total_pages == 0:
-        raise ValueError("PDF contains no pages.")
+    name = ""
+
+    @abstractmethod
+    def open(self, source: str | BinaryIO) -> ContextManager[Any]:
+        """Open a document; the context manager closes it."""
+
+    @abstractmethod
+    def page_count(self, document: Any) -> int:
+        """Number of pages of an open document."""
+
+    @abstractmethod
+    def page_text(self, document: Any, index: int) -> str:
+        """Text of the 0-based page *index*."""
+
+
+class PdfplumberBackend(PdfBackend):
+    """pdfplumber's ``extract_text``: character-level layout analysis in pure Python."""
+
+    name = "pdfplumber"
+
+    def open(self, source: str | BinaryIO) -> ContextManager[pdfplumber.PDF]:
+        return pdfplumber.open(source)
+
+    def page_count(self, document: pdfplumber.PDF) -> int:
+        return len(document.pages)
+
+    def page_text(self, document: pdfplumber.PDF, index: int) -> str:
+        page = document.pages[index]
+        try:
+            return page.extract_text() or ""
+        finally:
+            page.close()
+
+
+@dataclass
+class _PdfminerDocument:
+    pages: list[PDFPage]
+    interpreter: PDFPageInterpreter
+    device: PDFPageAggregator
+
+
+class PdfminerBackend(PdfBackend):
+    """pdfminer.six driven directly: its layout analysis, without pdfplumber's per-character objects."""
+
+    name = "pdfminer"
+
+    @contextmanager
+    def open(self, source: str | BinaryIO) -> Iterator[_PdfminerDocument]:
+        with ExitStack() as stack:
+            stream = stack.enter_context(open(source, "rb")) if isinstance(source, str) else source
+            resources = PDFResourceManager(caching=True)
+            device = stack.enter_context(closing(PDFPageAggregator(resources, laparams=LAParams())))
+            pages = list(PDFPage.create_pages(PDFDocument(PDFParser(stream))))
+            yield _PdfminerDocument(pages, PDFPageInterpreter(resources, device), device)
+
+    def page_count(self, document: _PdfminerDocument) -> int:
+        return len(document.pages)
+
+    def page_text(self, document: _PdfminerDocument, index: int) -> str:
+        document.interpreter.process_page(document.pages[index])
+        layout = document.device.get_result()
+        return "".join(item.get_text() for item in layout if isinstance(item, LTTextContainer)).strip()
+
+
+class PypdfiumBackend(PdfBackend):
+    """PDFium's text layer through pypdfium2: native code, text in content-stream order."""
+
+    name = "pypdfium2"
+
+    @contextmanager
+    def open(self, source: str | BinaryIO) -> Iterator[pdfium.PdfDocument]:
+        document = pdfium.PdfDocument(source)
+        try:
+            yield document
+        finally:
+            document.close()
+
+    def page_count(self, document: pdfium.PdfDocument) -> int:
+        return len(document)
+
+    def page_text(self, document: pdfium.PdfDocument, index: int) -> str:
+        page = document[index]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range().replace("\r\n", "\n").replace("\r", "\n").strip()
+        finally:
+            textpage.close()
+            page.close()
+
+
+BACKENDS: dict[str, type[PdfBackend]] = {backend.name: backend for backend in (PdfplumberBackend, PdfminerBackend, PypdfiumBackend)}
+
+
+# Transport
+@dataclass(frozen=True)
+class _SharedPdfHandle:
+    """Picklable reference to a PDF held in ``multiprocessing.shared_memory``."""
+
+    name: str
+    size: int
+
+
+# What a worker task receives: raw bytes, a shared-memory handle or a file path.
+PdfSource = bytes | str | _SharedPdfHandle
+
+
+class _MemoryViewReader(io.RawIOBase):
+    """Read-only, seekable file object over a memoryview — no up-front copy of the buffer."""
+
+    def __init__(self, view: memoryview) -> None:
+        super().__init__()
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(len(self._view), self._pos + size)
+        data = bytes(self._view[self._pos : end])
+        self._pos = max(self._pos, end)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment without registering it for cleanup in this process."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Spawned workers share the parent's resource tracker, so the parent's
+    # unlink() still removes the single registration.
+    return shared_memory.SharedMemory(name=name)
+
+
+@contextmanager
+def _open_pdf(source: PdfSource, backend: PdfBackend) -> Iterator[Any]:
+    """Open a PDF from raw bytes, a file path or a shared-memory handle with *backend*."""
+    if isinstance(source, str):
+        with backend.open(source) as document:
+            yield document
+        return
+
+    if isinstance(source, bytes):
+        with backend.open(io.BytesIO(source)) as document:
+            yield document
+        return
+
+    shm = _attach_shared_memory(source.name)
+    view = shm.buf[: source.size]
+    try:
+        with backend.open(_MemoryViewReader(view)) as document:
+            yield document
+    finally:
+        view.release()
+        shm.close()
+
+
+@contextmanager
+def _shared_pdf(pdf_bytes: bytes) -> Iterator[_SharedPdfHandle]:
+    """Copy *pdf_bytes* into a fresh shared-memory segment for the duration of the block."""
+    shm = shared_memory.SharedMemory(create=True, size=len(pdf_bytes))
+    try:
+        shm.buf[: len(pdf_bytes)] = pdf_bytes
+        yield _SharedPdfHandle(name=shm.name, size=len(pdf_bytes))
+    finally:
+        shm.close()
+        shm.unlink()
+
 
-    logger.info("Extracting text from %d page(s) using up to %d workers", total_pages, min(_MAX_WORKERS, total_pages))
+# Worker functions (run in a child process)
+def _warm_up() -> None:
+    """No-op task used to spawn every worker up front."""
 
-    worker = partial(_extract_single_page, pdf_bytes)
 
-    with ProcessPoolExecutor(max_workers=min(_MAX_WORKERS, total_pages)) as pool:
-        results = list(pool.map(worker, range(total_pages)))
+def _count_pages(source: PdfSource, backend_name: str) -> int:
+    """Open the PDF once and return its page count."""
+    backend = BACKENDS[backend_name]()
+    with _open_pdf(source, backend) as document:
+        return backend.page_count(document)
 
+
+def _extract_page_range(source: PdfSource, start: int, stop: int, backend_name: str) -> list[tuple[PageData, float]]:
+    """Open the PDF once and extract text for pages ``[start, stop)``, timing each page."""
+    backend = BACKENDS[backend_name]()
+    results: list[tuple[PageData, float]] = []
+    with _open_pdf(source, backend) as document:
+        for index in range(start, stop):
+            began = time.perf_counter()
+            text = backend.page_text(document, index)
+            results.append((PageData(page_number=index + 1, text=text), time.perf_counter() - began))
     return results
 
 
+def _page_ranges(total_pages: int, parts: int) -> list[tuple[int, int]]:
+    """Split ``[0, total_pages)`` into at most *parts* contiguous, near-equal ranges."""
+    parts = max(1, min(parts, total_pages))
+    size, remainder = divmod(total_pages, parts)
+    ranges: list[tuple[int, int]] = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < remainder else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+class PdfExtractionEngine:
+    """
+    Persistent process pool for page-text extraction.
+
+    Create once, ``start()`` it, and share it across requests.  Every call
+    to :meth:`extract` fans a document out as contiguous page ranges and
+    records queue depth and per-page timings for :meth:`stats`.
+    """
+
+    def __init__(self, max_workers: int = _MAX_WORKERS, transport: str = settings.PDF_TRANSPORT, backend: str = settings.PDF_BACKEND) -> None:
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown PDF transport {transport!r}; expected one of {TRANSPORTS}")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown PDF backend {backend!r}; expected one of {tuple(BACKENDS)}")
+        self.max_workers = max(1, max_workers)
+        self.transport = transport
+        self.backend = backend
+        self._pool: ProcessPoolExecutor | None = None
+        self._queued_tasks = 0
+        self._in_flight_documents = 0
+        self._documents = 0
+        self._pages = 0
+        self._page_seconds: deque[float] = deque(maxlen=_TIMING_WINDOW)
+
+    def start(self) -> None:
+        if self._pool is not None:
+            return
+        # "spawn" keeps workers independent of the server's threads and event loop.
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        for future in [self._pool.submit(_warm_up) for _ in range(self.max_workers)]:
+            future.result()
+        logger.info("PDF extraction pool started with %d worker(s)", self.max_workers)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+            logger.info("PDF extraction pool stopped")
+
+    def __enter__(self) -> PdfExtractionEngine:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.shutdown()
+
+    async def _run(self, fn, *args):
+        """Submit one task to the pool and await it, tracking queue depth."""
+        if self._pool is None:
+            raise RuntimeError("PDF extraction engine is not started. Call start() first.")
+        session = active_session()
+        self._queued_tasks += 1
+        try:
+            if session is None:
+                return await asyncio.wrap_future(self._pool.submit(fn, *args))
+            result, stacks = await asyncio.wrap_future(self._pool.submit(sampled_call, session.interval, fn, *args))
+            session.add_worker_stacks(stacks)
+            return result
+        except Exception:
+            ERRORS.labels("pdf").inc()
+            raise
+        finally:
+            self._queued_tasks -= 1
+
+    async def extract(self, pdf: bytes | Path) -> list[PageData]:
+        """
+        Extract text from every page of a PDF in parallel.
+
+        Args:
+            pdf: Raw bytes of the uploaded PDF, or the path of a spooled upload
+                 (workers then read the file directly — nothing is buffered here).
+
+        Returns:
+            Ordered list of ``PageData`` (1-indexed page numbers).
+
+        Raises:
+            InvalidPdfError: If the PDF has zero pages or cannot be parsed.
+        """
+        if isinstance(pdf, bytes) and not pdf:
+            raise InvalidPdfError("PDF is empty.")
+
+        began = time.perf_counter()
+        self._in_flight_documents += 1
+        try:
+            if isinstance(pdf, Path):
+                chunks = await self._extract_source(str(pdf))
+            elif self.transport == "shared_memory":
+                with _shared_pdf(pdf) as handle:
+                    chunks = await self._extract_source(handle)
+            else:
+                chunks = await self._extract_source(pdf)
+        finally:
+            self._in_flight_documents -= 1
+
+        ended = time.perf_counter()
+        PDF_EXTRACT_SECONDS.labels("extract").observe(ended - began)
+        record_stage("pdf_parse", began, ended)
+        pages = [page for chunk in chunks for page in self._record(chunk)]
+        self._documents += 1
+        return pages
+
+    async def stream(self, pdf: bytes | Path, range_pages: int = settings.PDF_STREAM_RANGE_PAGES) -> AsyncIterator[list[PageData]]:
+        """
+        Extract a PDF as a stream of page batches, in page order.
+
+        The document is cut into ranges of about *range_pages* pages (at
+        least one per worker), all submitted at once; each range is yielded
+        as soon as it and every range before it are done, so callers can
+        start on the first pages while later ones are still being parsed.
+
+        The page count is read before this returns, so an unreadable PDF
+        raises ``InvalidPdfError`` here rather than mid-iteration; a page
+        that fails to parse raises it from the iteration.  Closing the
+        iterator early cancels the ranges not yet started.
+        """
+        batches = self._stream(pdf, range_pages)
+        try:
+            first = await anext(batches)
+        except BaseException:
+            await batches.aclose()
+            raise
+        return _prepend(first, batches)
+
+    async def _stream(self, pdf: bytes | Path, range_pages: int) -> AsyncIterator[list[PageData]]:
+        if isinstance(pdf, bytes) and not pdf:
+            raise InvalidPdfError("PDF is empty.")
+
+        self._in_flight_documents += 1
+        try:
+            if isinstance(pdf, Path):
+                async for batch in self._stream_source(str(pdf), range_pages):
+                    yield batch
+            elif self.transport == "shared_memory":
+                with _shared_pdf(pdf) as handle:
+                    async for batch in self._stream_source(handle, range_pages):
+                        yield batch
+            else:
+                async for batch in self._stream_source(pdf, range_pages):
+                    yield batch
+        finally:
+            self._in_flight_documents -= 1
+        self._documents += 1
+
+    async def _stream_source(self, source: PdfSource, range_pages: int) -> AsyncIterator[list[PageData]]:
+        total_pages = await self._page_count(source)
+        parts = max(self.max_workers, -(-total_pages // max(1, range_pages)))
+        ranges = _page_ranges(total_pages, parts)
+        logger.info("Streaming text from %d page(s) in %d range(s)", total_pages, len(ranges))
+
+        began = time.perf_counter()
+        tasks = [asyncio.ensure_future(self._extract_range(source, start, stop)) for start, stop in ranges]
+        # Parse time of the whole document, however slowly the batches are consumed.
+        asyncio.gather(*tasks).add_done_callback(lambda done: _observe_stream(done, began))
+        try:
+            for task in tasks:
+                yield self._record(await task)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _record(self, chunk: list[tuple[PageData, float]]) -> list[PageData]:
+        """Record the per-page timings of one extracted range and return its pages."""
+        for _, seconds in chunk:
+            self._page_seconds.append(seconds)
+            PDF_PAGE_SECONDS.observe(seconds)
+        self._pages += len(chunk)
+        return [page for page, _ in chunk]
+
+    async def _page_count(self, source: PdfSource) -> int:
+        try:
+            total_pages = await self._run(_count_pages, source, self.backend)
+        except Exception as exc:
+            if not self._is_parse_error(exc):
+                raise
+            raise InvalidPdfError(f"Could not parse PDF: {exc}") from exc
+
+        if total_pages == 0:
+            ERRORS.labels("pdf").inc()
+            raise InvalidPdfError("PDF contains no pages.")
+        return total_pages
+
+    async def _extract_source(self, source: PdfSource) -> list[list[tuple[PageData, float]]]:
+        total_pages = await self._page_count(source)
+        ranges = _page_ranges(total_pages, self.max_workers)
+        via = "path" if isinstance(source, str) else self.transport
+        logger.info("Extracting text from %d page(s) in %d range(s) via %s with %s", total_pages, len(ranges), via, self.backend)
+
+        return await asyncio.gather(*(self._extract_range(source, start, stop) for start, stop in ranges))
+
+    async def _extract_range(self, source: PdfSource, start: int, stop: int) -> list[tuple[PageData, float]]:
+        try:
+            return await self._run(_extract_page_range, source, start, stop, self.backend)
+        except Exception as exc:
+            if not self._is_parse_error(exc):
+                raise
+            raise InvalidPdfError(f"Could not parse pages {start + 1}-{stop}: {exc}") from exc
+
+    def _is_parse_error(self, exc: Exception) -> bool:
+        """Whether a failed task failed on the document, rather than on a stopped or broken pool."""
+        return self._pool is not None and not isinstance(exc, BrokenExecutor)
+
+    def stats(self) -> dict:
+        """Queue depth and per-page timing over the most recent pages."""
+        timings = sorted(self._page_seconds)
+        page_ms: dict[str, float] = {}
+        if timings:
+            page_ms = {
+                "mean": round(statistics.fmean(timings) * 1000, 3),
+                "p50": round(timings[len(timings) // 2] * 1000, 3),
+                "p95": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+                "max": round(timings[-1] * 1000, 3),
+            }
+        return {
+            "workers": self.max_workers,
+            "transport": self.transport,
+            "backend": self.backend,
+            "running": self._pool is not None,
+            "queue_depth": self._queued_tasks,
+            "in_flight_documents": self._in_flight_documents,
+            "documents_extracted": self._documents,
+            "pages_extracted": self._pages,
+            "page_ms": page_ms,
+        }
+
+
+def _observe_stream(done: asyncio.Future, began: float) -> None:
+    if not done.cancelled() and done.exception() is None:
+        ended = time.perf_counter()
+        PDF_EXTRACT_SECONDS.labels("stream").observe(ended - began)
+        record_stage("pdf_parse", began, ended)
+
+
+async def _prepend(first: list[PageData], rest: AsyncIterator[list[PageData]]) -> AsyncIterator[list[PageData]]:
+    try:
+        yield first
+        async for batch in rest:
+            yield batch
+    finally:
+        await rest.aclose()
+
+
+# Process-wide engine, owned by the FastAPI lifespan
+_engine: PdfExtractionEngine | None = None
+
+
+def init_extraction_engine() -> None:
+    global _engine
+    if _engine is not None:
+        return
+    _engine = PdfExtractionEngine()
+    _engine.start()
+
+
+def close_extraction_engine() -> None:
+    global _engine
+    if _engine is not None:
+        _engine.shutdown()
+        _engine = None
+
+
+PDF_QUEUE_DEPTH.set_function(lambda: _engine._queued_tasks if _engine is not None else 0)
+
+
+def get_extraction_engine() -> PdfExtractionEngine:
+    if _engine is None:
+        raise RuntimeError("PDF extraction engine is not initialised. Call init_extraction_engine() first.")
+    return _engine
+
+
+# Public API
+def extract_pages(pdf: bytes | Path) -> list[PageData]:
+    """
+    Blocking, self-contained extraction for scripts and benchmarks.
+
+    Runs a short-lived :class:`PdfExtractionEngine`; the API uses the shared
+    engine from :func:`get_extraction_engine` instead.
+    """
+    with PdfExtractionEngine() as engine:
+        return asyncio.run(engine.extract(pdf))
+
+
 def get_page_subset(pages: list[PageData], indices: list[int]) -> list[PageData]:
     """
     Return only the pages whose 1-indexed page_number is in *indices*.
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: services/processing.py
+# description: PDF → LangGraph pipeline → ProcessResponse, shared by the HTTP routes and the job workers.
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from collections.abc import AsyncIterator
+from contextlib import aclosing, asynccontextmanager
+from datetime import date
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.metrics import CLAIMS_IN_FLIGHT, node_scope
+from app.graph.nodes.segregator import segregate_stream
+from app.graph.workflow import pipeline
+from app.models.schema import PageData, ProcessResponse
+from app.services.compaction import compaction_stats, prepare_prompt_pages
+from app.services.pdf import get_extraction_engine
+
+logger = logging.getLogger(__name__)
+
+# All pages of a document, or a stream of page batches still being extracted.
+PageSource = list[PageData] | AsyncIterator[list[PageData]]
+
+# Claims allowed through the LangGraph pipeline at once; the rest wait here.
+_pipeline_slots = asyncio.Semaphore(settings.PIPELINE_MAX_CONCURRENCY)
+
+
+def generate_claim_id() -> str:
+    """Generate ``claim-YYYYMMDD-<6 random digits>``."""
+    today = date.today().strftime("%Y%m%d")
+    suffix = random.randint(100_000, 999_999)
+    return f"claim-{today}-{suffix}"
+
+
+async def open_document(pdf: bytes | Path) -> PageSource:
+    """
+    Start extracting *pdf* on the shared extraction pool.
+
+    Returns every page, or — with ``PDF_PIPELINED_EXTRACTION`` — a stream
+    of page batches for the pipeline to consume while parsing continues.
+    A file path must stay on disk until that stream is consumed.
+
+    Raises:
+        InvalidPdfError: If the PDF is empty or cannot be parsed.
+    """
+    engine = get_extraction_engine()
+    if settings.PDF_PIPELINED_EXTRACTION:
+        return await engine.stream(pdf)
+    return await engine.extract(pdf)
+
+
+async def _initial_state(claim_id: str, source: PageSource) -> dict:
+    """
+    Pipeline input, with the page text compacted for prompts.
+
+    A page stream is classified as it arrives (``segregate_stream``), so
+    the state already carries ``page_classifications``.
+    """
+    state = {"claim_id": claim_id, "page_classifications": [], "extraction_results": {}, "final_output": None, "token_usage": {}}
+    if isinstance(source, list):
+        prompt_pages, raw_page_tokens = await asyncio.to_thread(prepare_prompt_pages, source, settings.PROMPT_COMPACTION_ENABLED)
+        return {**state, "pages": source, "prompt_pages": prompt_pages, "raw_page_tokens": raw_page_tokens}
+    # Classification overlapping extraction happens before the graph's segregator node (which then passes through).
+    async with aclosing(source):
+        with node_scope("segregator_stream"):
+            return {**state, **await segregate_stream(source, settings.PROMPT_COMPACTION_ENABLED)}
+
+
+def _record_token_usage(claim_id: str, usage: dict[str, dict[str, int]]) -> None:
+    raw, sent = compaction_stats.record(usage)
+    if raw:
+        logger.info("Prompt page text for claim_id=%s: %d → %d tokens (%.0f%% saved)", claim_id, raw, sent, 100 * (raw - sent) / raw)
+
+
+@asynccontextmanager
+async def _pipeline_slot() -> AsyncIterator[None]:
+    """Hold one of the ``PIPELINE_MAX_CONCURRENCY`` slots, counting the claims waiting for and holding one."""
+    with CLAIMS_IN_FLIGHT.labels("waiting").track_inprogress():
+        await _pipeline_slots.acquire()
+    try:
+        with CLAIMS_IN_FLIGHT.labels("running").track_inprogress():
+            yield
+    finally:
+        _pipeline_slots.release()
+
+
+async def run_pipeline(claim_id: str, pages: PageSource) -> ProcessResponse:
+    """Compact the page text for prompts, then run segregation + extraction over *pages* (a list or a page stream)."""
+    async with _pipeline_slot():
+        state = await _initial_state(claim_id, pages)
+        result = await pipeline.ainvoke(state, {"recursion_limit": settings.LANGGRAPH_RECURSION_LIMIT})
+
+    _record_token_usage(claim_id, result.get("token_usage", {}))
+    return result["final_output"]
+
+
+async def stream_pipeline(claim_id: str, pages: PageSource) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Run the pipeline and yield ``(node name, state update)`` as each node finishes.
+
+    Uses LangGraph's ``updates`` stream mode, so the segregator's
+    classifications arrive long before the slowest extraction agent.
+    """
+    usage: dict[str, dict[str, int]] = {}
+    async with _pipeline_slot():
+        state = await _initial_state(claim_id, pages)
+        usage.update(state["token_usage"])
+        async for chunk in pipeline.astream(state, {"recursion_limit": settings.LANGGRAPH_RECURSION_LIMIT}, stream_mode="updates"):
+            for node, update in chunk.items():
+                update = update or {}
+                for name, counters in update.get("token_usage", {}).items():
+                    totals = usage.setdefault(name, {})
+                    for key, value in counters.items():
+                        totals[key] = totals.get(key, 0) + value
+                yield node, update
+
+    _record_token_usage(claim_id, usage)
+
+
+async def process_document(claim_id: str, pdf: bytes | Path) -> ProcessResponse:
+    """Extract *pdf* on the shared extraction pool and run the pipeline; ``InvalidPdfError`` for unreadable PDFs."""
+    return await run_pipeline(claim_id, await open_document(pdf))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: services/result_cache.py
+# description: Content-addressed cache of whole-document pipeline results.
+"""
+Whole-document result cache.
+
+A processed claim is keyed by the SHA-256 of the uploaded PDF plus the
+LLM provider/model and the prompt version, so a resubmitted document is
+answered without running the pipeline again — and a prompt or model
+change naturally invalidates old answers.  The prompt version also
+covers the settings that change results (PDF backend, compaction and
+token budgets, pre-classifier), see ``app.graph.workflow._prompt_version``.
+
+Lookups go to an in-process LRU first and fall back to the claim tables
+(rows written by ``save_claim_result`` with the same ``cache_key``); DB
+hits are promoted into the LRU.  Entries older than the TTL are ignored
+at both levels.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from app.core.config import settings
+from app.db.repository import fetch_result_by_cache_key
+from app.graph.workflow import PROMPT_VERSION
+from app.models.schema import ProcessResponse
+from app.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def result_cache_key(pdf_sha256: str) -> str:
+    """``<sha256>:<provider>/<model>:<prompt version>``."""
+    return f"{pdf_sha256}:{settings.LLM_PROVIDER}/{settings.LLM_MODEL}:{PROMPT_VERSION}"
+
+
+class ResultCache:
+    """In-process LRU in front of the Postgres claim tables."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._memory: TTLCache[ProcessResponse] = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.db_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    async def get(self, key: str) -> ProcessResponse | None:
+        """Return the cached response for *key*, or ``None`` on a miss."""
+        if not self.enabled:
+            return None
+
+        cached = self._memory.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            cached = await fetch_result_by_cache_key(key, self.ttl_seconds)
+        except Exception:
+            logger.warning("Result cache DB lookup failed — treating as a miss", exc_info=True)
+            return None
+
+        if cached is not None:
+            # Undo the miss counted by the memory tier: this lookup was a hit.
+            self._memory.misses -= 1
+            self.db_hits += 1
+            self._memory.set(key, cached)
+        return cached
+
+    def put(self, key: str, response: ProcessResponse) -> None:
+        """Remember a freshly computed response (the DB copy is written by ``save_claim_result``)."""
+        if self.enabled:
+            self._memory.set(key, response)
+
+    def stats(self) -> dict:
+        memory = self._memory.stats()
+        hits = memory["hits"] + self.db_hits
+        lookups = hits + memory["misses"]
+        return {
+            "enabled": self.enabled,
+            "entries": memory["entries"],
+            "max_entries": memory["max_entries"],
+            "ttl_seconds": self.ttl_seconds,
+            "memory_hits": memory["hits"],
+            "db_hits": self.db_hits,
+            "misses": memory["misses"],
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+result_cache = ResultCache(ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS, max_entries=settings.RESULT_CACHE_MAX_ENTRIES)
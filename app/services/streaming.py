@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: services/streaming.py
+# description: Server-Sent Events for POST /api/process/stream — partial results as each pipeline node finishes.
+"""
+Server-Sent Events for ``POST /api/process/stream``.
+
+The pipeline runs in LangGraph's ``updates`` stream mode and every node
+that finishes becomes one event:
+
+- ``segregation``       — page classifications, as soon as the segregator is done
+- ``identity``          — ``IdentityInfo`` or ``null``
+- ``discharge_summary`` — ``DischargeSummaryInfo`` or ``null``
+- ``itemized_bill``     — ``ItemizedBillInfo`` or ``null``
+- ``result``            — the complete ``ProcessResponse``, last
+- ``error``             — ``{"claim_id", "detail"}``; ends the stream
+
+The extraction events arrive in completion order; a part whose agent was
+not routed to (no pages of its type) is sent as ``null`` before ``result``.  Persistence follows the
+stream: the claim row is inserted as ``running`` with its segregation, each
+extraction part is written when it arrives, and the row becomes
+``processed`` with the ``result`` event (``failed`` on error or when the
+client goes away).  Only processed claims are served by the read endpoints
+and the result cache.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+
+from pydantic_core import to_json
+
+from app.db.repository import save_claim_parts, set_claim_status, start_claim
+from app.models.schema import PageClassification, PageData, ProcessResponse
+from app.services.pdf import InvalidPdfError
+from app.services.processing import stream_pipeline
+from app.services.result_cache import result_cache
+
+logger = logging.getLogger(__name__)
+
+_PARTS = ("identity", "discharge_summary", "itemized_bill")
+
+# Status writes for streams the client abandoned; kept referenced until they finish.
+_detached: set[asyncio.Task] = set()
+
+
+def sse(event: str, data) -> str:
+    """One SSE frame; *data* (models included) is serialized as single-line JSON in one pass."""
+    return f"event: {event}\ndata: {to_json(data).decode()}\n\n"
+
+
+def _part_event(claim_id: str, name: str, value) -> str:
+    return sse(name, {"claim_id": claim_id, name: value})
+
+
+def _error_event(claim_id: str, detail: str) -> str:
+    return sse("error", {"claim_id": claim_id, "detail": detail})
+
+
+async def cached_events(response: ProcessResponse) -> AsyncIterator[str]:
+    """The same event sequence for a result that is already known."""
+    yield sse("segregation", {"claim_id": response.claim_id, "segregation": response.segregation})
+    for name in _PARTS:
+        yield _part_event(response.claim_id, name, getattr(response, name))
+    yield sse("result", response)
+
+
+def _mark_failed(claim_pk: int) -> None:
+    task = asyncio.create_task(set_claim_status(claim_pk, "failed"))
+    _detached.add(task)
+    task.add_done_callback(_detached.discard)
+
+
+async def pipeline_events(claim_id: str, pages: list[PageData], cache_key: str | None = None) -> AsyncIterator[str]:
+    """Run the pipeline over *pages*, persisting and yielding one SSE frame per finished node."""
+    claim_pk: int | None = None
+    sent: set[str] = set()
+    done = False
+    try:
+        async for node, update in stream_pipeline(claim_id, pages):
+            if "page_classifications" in update:
+                classifications: list[PageClassification] = update["page_classifications"]
+                claim_pk = await start_claim(ProcessResponse(claim_id=claim_id, segregation=classifications), cache_key)
+                yield sse("segregation", {"claim_id": claim_id, "segregation": classifications})
+
+            for name, value in update.get("extraction_results", {}).items():
+                if name not in _PARTS:
+                    continue
+                if value is not None and claim_pk is not None:
+                    await save_claim_parts(claim_pk, ProcessResponse(claim_id=claim_id, segregation=[], **{name: value}))
+                sent.add(name)
+                yield _part_event(claim_id, name, value)
+
+            if update.get("final_output") is not None:
+                response: ProcessResponse = update["final_output"]
+                # Agents with no pages to read are not routed to; report their part as null.
+                for name in [n for n in _PARTS if n not in sent]:
+                    yield _part_event(claim_id, name, None)
+                if claim_pk is not None:
+                    await set_claim_status(claim_pk, "processed")
+                done = True
+                if cache_key is not None:
+                    result_cache.put(cache_key, response)
+                yield sse("result", response)
+    except Exception as exc:
+        logger.exception("Streaming pipeline failed for claim_id=%s (at pk=%s)", claim_id, claim_pk)
+        if claim_pk is not None:
+            _mark_failed(claim_pk)
+            claim_pk = None
+        # A page that fails to parse mid-stream is reported like an unreadable upload.
+        yield _error_event(claim_id, f"Invalid PDF: {exc}" if isinstance(exc, InvalidPdfError) else f"Processing error: {exc}")
+    finally:
+        if not done and claim_pk is not None:
+            # Client disconnected mid-stream: the request scope is being cancelled, so write detached.
+            logger.info("Stream for claim_id=%s closed before completion — marking failed", claim_id)
+            _mark_failed(claim_pk)
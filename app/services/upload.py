@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: services/upload.py
+# description: Stream uploads to a disk spool file with the size limit enforced on the fly.
+"""
+Disk-spooled upload handling.
+
+Uploads are copied in fixed-size chunks into a named temporary file, so a
+request never holds more than one chunk of the PDF in memory no matter
+how large the file is.  The size limit is checked after every chunk and
+the copy stops as soon as it is exceeded.  The resulting path is handed
+to the extraction engine, whose workers read the file directly.
+
+ZIP archives (batch ingestion) are spooled the same way and their PDF
+members are then streamed out to spool files of their own, each member
+subject to the per-PDF limit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import zipfile
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_PDF_BYTES = settings.MAX_PDF_SIZE_MB * 1024 * 1024
+MAX_BATCH_BYTES = settings.BATCH_MAX_SIZE_MB * 1024 * 1024
+
+ZIP_CONTENT_TYPES = frozenset({"application/zip", "application/x-zip-compressed", "application/x-zip"})
+
+# Read size per chunk — the per-request memory ceiling for the PDF body.
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+@dataclass(frozen=True)
+class SpooledUpload:
+    path: Path
+    size: int
+    sha256: str
+
+
+def _new_spool_file(suffix: str) -> tuple[int, Path]:
+    # An empty UPLOAD_SPOOL_DIR (as in .env.example) means the system temp dir, not the working directory.
+    fd, name = tempfile.mkstemp(suffix=suffix, prefix="upload-", dir=settings.UPLOAD_SPOOL_DIR or None)
+    return fd, Path(name)
+
+
+@asynccontextmanager
+async def spool_upload(file: UploadFile, max_bytes: int = MAX_PDF_BYTES) -> AsyncIterator[SpooledUpload]:
+    """
+    Stream *file* to a temporary file on disk, hashing it on the way.
+
+    The file is deleted when the block exits.
+
+    Raises:
+        UploadTooLargeError: As soon as more than *max_bytes* have been read.
+        ValueError:          If the upload is empty.
+    """
+    fd, path = _new_spool_file(".pdf")
+    try:
+        size = 0
+        digest = hashlib.sha256()
+        with os.fdopen(fd, "wb") as spool:
+            while chunk := await file.read(SPOOL_CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"PDF exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+                digest.update(chunk)
+                spool.write(chunk)
+
+        if size == 0:
+            raise ValueError("Uploaded PDF is empty.")
+
+        logger.debug("Spooled %d byte upload to %s", size, path)
+        yield SpooledUpload(path=path, size=size, sha256=digest.hexdigest())
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def is_zip_upload(file: UploadFile) -> bool:
+    return file.content_type in ZIP_CONTENT_TYPES or (file.filename or "").lower().endswith(".zip")
+
+
+# Compression methods zipfile can read (anything else would raise NotImplementedError on open).
+_ZIP_METHODS = (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA)
+
+
+def _is_pdf_member(info: zipfile.ZipInfo) -> bool:
+    name = info.filename
+    base = name.rsplit("/", 1)[-1]
+    return not info.is_dir() and name.lower().endswith(".pdf") and not name.startswith("__MACOSX/") and not base.startswith(".")
+
+
+def _spool_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, max_bytes: int) -> SpooledUpload:
+    # The header's file_size can lie, so the limit is enforced on the decompressed stream too.
+    if info.file_size > max_bytes:
+        raise UploadTooLargeError(f"PDF exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+    if info.compress_type not in _ZIP_METHODS:
+        raise ValueError(f"Unsupported ZIP compression method {info.compress_type}.")
+    fd, path = _new_spool_file(".pdf")
+    try:
+        size = 0
+        digest = hashlib.sha256()
+        with os.fdopen(fd, "wb") as spool, archive.open(info) as member:
+            while chunk := member.read(SPOOL_CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"PDF exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+                digest.update(chunk)
+                spool.write(chunk)
+        if size == 0:
+            raise ValueError("PDF is empty.")
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return SpooledUpload(path=path, size=size, sha256=digest.hexdigest())
+
+
+def _expand_zip_into(archive_path: Path, max_members: int, max_member_bytes: int, members: list[tuple[str, SpooledUpload | Exception]]) -> None:
+    try:
+        archive = zipfile.ZipFile(archive_path)
+    except zipfile.BadZipFile as exc:
+        raise ValueError("Upload is not a valid ZIP archive.") from exc
+    with archive:
+        infos = [info for info in archive.infolist() if _is_pdf_member(info)]
+        if len(infos) > max_members:
+            raise ValueError(f"ZIP archive holds {len(infos)} PDFs; at most {max_members} are accepted.")
+        for info in infos:
+            try:
+                members.append((info.filename, _spool_member(archive, info, max_member_bytes)))
+            except (ValueError, zipfile.BadZipFile, RuntimeError) as exc:
+                members.append((info.filename, exc))
+
+
+@asynccontextmanager
+async def expand_zip(
+    archive_path: Path, max_members: int, max_member_bytes: int = MAX_PDF_BYTES
+) -> AsyncIterator[list[tuple[str, SpooledUpload | Exception]]]:
+    """
+    Spool every PDF member of the archive at *archive_path* to its own file.
+
+    Yields ``(member name, upload or per-member error)`` pairs; non-PDF
+    members are skipped.  Decompression runs in a worker thread.  The
+    spooled members are deleted when the block exits.
+
+    Raises:
+        ValueError: If the file is not a ZIP archive or holds more than *max_members* PDFs.
+    """
+    members: list[tuple[str, SpooledUpload | Exception]] = []
+    try:
+        await asyncio.to_thread(_expand_zip_into, archive_path, max_members, max_member_bytes, members)
+        yield members
+    finally:
+        for _, member in members:
+            if isinstance(member, SpooledUpload):
+                member.path.unlink(missing_ok=True)
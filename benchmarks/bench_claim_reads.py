@@ -0,0 +1,148 @@
+"""
+Benchmark ``GET /api/claims/{claim_id}`` reads against a live Postgres (settings from ``.env``).
+
+Seeds ``--claims`` claims of ``--line-items`` bill rows each (20 classified
+pages, an identity and a discharge summary) and reads them back, round
+robin, through:
+
+- ``aggregate``  the read path before migration 008: ``json_agg`` over the
+                 five child tables, hydrating a ``ProcessResponse`` and
+                 serializing it for the response;
+- ``snapshot``   ``fetch_claim_json``: the stored ``result_snapshot``, as
+                 bytes, in one index lookup.
+
+Each path is measured one read at a time (latency) and with
+``--concurrency`` reads in flight (throughput).  Rows written are deleted
+afterwards.
+
+    python -m benchmarks.bench_claim_reads --claims 32 --reads 2000 --line-items 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import time
+
+from app.db.connection import close_pool, get_pool, init_pool
+from app.db.repository import _FETCH_SELECT_SQL, fetch_claim_json, save_claim_results
+from app.models.schema import BillLineItem, DischargeSummaryInfo, DocumentType, IdentityInfo, ItemizedBillInfo, PageClassification, ProcessResponse
+from benchmarks.synthetic import synthetic_claim
+
+_PREFIX = "bench-read-"
+
+_FETCH_ONE_SQL = _FETCH_SELECT_SQL + """
+WHERE c.claim_id = $1
+  AND c.status = 'processed'
+ORDER BY c.created_at DESC
+LIMIT 1;
+"""
+
+
+def _loads(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _parse_row(row) -> ProcessResponse:
+    """Hydrate a ProcessResponse from a single aggregated DB row (the pre-snapshot read path)."""
+    segregation = [
+        PageClassification(page_number=s["page_number"], document_type=DocumentType(s["document_type"]), confidence=float(s["confidence"]))
+        for s in _loads(row["segregation"])
+    ]
+    id_raw = _loads(row["identity"])
+    ds_raw = _loads(row["discharge_summary"])
+    bill_raw = _loads(row["itemized_bill"])
+    itemized_bill = None
+    if bill_raw:
+        itemized_bill = ItemizedBillInfo(
+            total_amount=float(bill_raw["total_amount"]) if bill_raw["total_amount"] is not None else None,
+            items=[BillLineItem(**it) for it in bill_raw.get("items", [])],
+        )
+    return ProcessResponse(
+        claim_id=row["claim_id"],
+        segregation=segregation,
+        identity=IdentityInfo(**id_raw) if id_raw else None,
+        discharge_summary=DischargeSummaryInfo(**ds_raw) if ds_raw else None,
+        itemized_bill=itemized_bill,
+    )
+
+
+async def _read_aggregate(claim_id: str) -> bytes | None:
+    async with get_pool().acquire() as conn:
+        row = await conn.fetchrow(_FETCH_ONE_SQL, claim_id)
+    return _parse_row(row).model_dump_json().encode() if row is not None else None
+
+
+async def _timed(read, claim_ids: list[str], reads: int, concurrency: int) -> tuple[float, list[float]]:
+    """Wall time for *reads* reads over *claim_ids*, and the latency of each."""
+    slots = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    ids = itertools.cycle(claim_ids)
+
+    async def one(claim_id: str) -> None:
+        async with slots:
+            began = time.perf_counter()
+            if await read(claim_id) is None:
+                raise RuntimeError(f"{claim_id} not found")
+            latencies.append(time.perf_counter() - began)
+
+    began = time.perf_counter()
+    await asyncio.gather(*(one(next(ids)) for _ in range(reads)))
+    return time.perf_counter() - began, latencies
+
+
+async def _run(args: argparse.Namespace) -> list[dict]:
+    await init_pool()
+    rows = []
+    try:
+        claims = [synthetic_claim(f"{_PREFIX}{i}", line_items=args.line_items, seed=i) for i in range(args.claims)]
+        await save_claim_results([(claim, None) for claim in claims])
+        claim_ids = [claim.claim_id for claim in claims]
+
+        for concurrency in (1, args.concurrency):
+            for name, read in (("aggregate", _read_aggregate), ("snapshot", fetch_claim_json)):
+                await _timed(read, claim_ids, len(claim_ids), concurrency)  # warm up connections and buffers
+                wall, latencies = await _timed(read, claim_ids, args.reads, concurrency)
+                latencies.sort()
+                rows.append(
+                    {
+                        "path": name,
+                        "concurrency": concurrency,
+                        "line_items": args.line_items,
+                        "reads": args.reads,
+                        "reads_per_s": round(args.reads / wall, 1),
+                        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+                        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 2),
+                    }
+                )
+    finally:
+        async with get_pool().acquire() as conn:
+            await conn.execute("DELETE FROM claims WHERE claim_id LIKE $1", f"{_PREFIX}%")
+        await close_pool()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claims", type=int, default=32)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--line-items", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args()
+
+    for row in asyncio.run(_run(args)):
+        if args.json:
+            print(json.dumps(row))
+        else:
+            print(
+                f"{row['path']:<9} x{row['concurrency']:<3} {row['line_items']:>4} items  {row['reads_per_s']:>8.1f} reads/s"
+                f"  p50 {row['p50_ms']:>7.2f} ms  p95 {row['p95_ms']:>7.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
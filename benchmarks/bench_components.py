@@ -0,0 +1,240 @@
+"""
+Micro-benchmarks of the claim path, component by component, on synthetic claims.
+
+Every case runs offline on PDFs from :func:`benchmarks.synthetic.claim_pdf`
+(``--pages``, ``--lines-per-page`` and ``--mix`` set their size, text
+density and document-type mix):
+
+- ``extract_pages``     the standalone helper, process pool start included;
+- ``engine.extract``    the same PDF on an already running extraction engine;
+- ``get_page_subset``   picking the bill pages out of the extracted pages;
+- ``aggregator_node``   assembling a response of ``--line-items`` bill rows;
+- ``run_pipeline``      the compiled LangGraph ``pipeline`` (compaction,
+                        segregator, agents, aggregator) with the deterministic
+                        fake chat model from :mod:`benchmarks.fake_llm`, so
+                        only graph and application overhead is timed
+                        (``--llm-latency-ms`` adds a fixed per-call delay).
+
+With ``--db`` (a local Postgres, settings from ``.env``) also:
+
+- ``save_claim_result`` one claim of ``--line-items`` rows (COPY path);
+- ``_parse_row``        hydrating a claim from the aggregated row (the
+                        pre-snapshot read path, see bench_claim_reads);
+- ``fetch_all_claims``  one page of summaries, first page and deep keyset page.
+
+Rows written are deleted afterwards.  The page-classification cache is
+switched off so every run does the same work.
+
+Results are JSON lines with the commit they were measured on; keep them
+and pass one as ``--baseline`` to print the change per case::
+
+    python -m benchmarks.bench_components --json > before.jsonl
+    python -m benchmarks.bench_components --baseline before.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.core.config import settings
+from app.graph.nodes import segregator
+from app.graph.nodes.aggregator import aggregator_node
+from app.models.schema import DocumentType
+from app.services.pdf import PdfExtractionEngine, extract_pages, get_page_subset
+from app.services.processing import run_pipeline
+from benchmarks import fake_llm
+from benchmarks.synthetic import DEFAULT_MIX, build_pdf, claim_pages, parse_mix, synthetic_claim
+
+_PREFIX = "bench-components-"
+
+
+def _commit() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent, capture_output=True, text=True, check=True)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _time(fn: Callable[[], Awaitable[object] | object], repeat: int) -> list[float]:
+    """Seconds per call of *fn* (sync or async), after one warm-up call."""
+    timings = []
+    for i in range(repeat + 1):
+        began = time.perf_counter()
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await result
+        if i:
+            timings.append(time.perf_counter() - began)
+    return timings
+
+
+def _row(component: str, case: str, timings: list[float], **extra) -> dict:
+    timings = sorted(timings)
+    return {
+        "component": component,
+        "case": case,
+        "n": len(timings),
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+        "min_ms": round(timings[0] * 1000, 3),
+        **extra,
+    }
+
+
+async def _offline(args: argparse.Namespace, mix: dict[DocumentType, float]) -> list[dict]:
+    rows = []
+    with PdfExtractionEngine() as engine:
+        for pages in args.pages:
+            case = f"{pages}p x {args.lines_per_page}l"
+            typed = claim_pages(pages, args.lines_per_page, mix, seed=pages)
+            pdf = build_pdf([text for _, text in typed])
+            kib = round(len(pdf) / 1024, 1)
+            extracted = await engine.extract(pdf)
+            bill_pages = [n for n, (doc_type, _) in enumerate(typed, start=1) if doc_type == DocumentType.ITEMIZED_BILL]
+
+            if "extract_pages" in args.only:
+                timings = await _time(lambda: asyncio.to_thread(extract_pages, pdf), max(1, args.repeat // 5))
+                rows.append(_row("extract_pages", case, timings, pages=pages, kib=kib))
+            if "engine.extract" in args.only:
+                rows.append(_row("engine.extract", case, await _time(lambda: engine.extract(pdf), args.repeat), pages=pages, kib=kib))
+            if "get_page_subset" in args.only:
+                timings = await _time(lambda: get_page_subset(extracted, bill_pages), args.repeat * 20)
+                rows.append(_row("get_page_subset", case, timings, pages=pages, selected=len(bill_pages)))
+            if "run_pipeline" in args.only:
+                result = await run_pipeline(f"{_PREFIX}{pages}", extracted)
+                timings = await _time(lambda: run_pipeline(f"{_PREFIX}{pages}", extracted), args.repeat)
+                rows.append(
+                    _row(
+                        "run_pipeline",
+                        case,
+                        timings,
+                        pages=pages,
+                        llm_latency_ms=args.llm_latency_ms,
+                        line_items=len(result.itemized_bill.items) if result.itemized_bill else 0,
+                    )
+                )
+
+    if "aggregator_node" in args.only:
+        for line_items in args.line_items:
+            claim = synthetic_claim(f"{_PREFIX}aggregate", line_items=line_items)
+            state = {
+                "claim_id": claim.claim_id,
+                "page_classifications": claim.segregation,
+                "extraction_results": {
+                    "identity": claim.identity,
+                    "discharge_summary": claim.discharge_summary,
+                    "itemized_bill": claim.itemized_bill,
+                },
+            }
+            timings = await _time(lambda: aggregator_node(state), args.repeat * 20)
+            rows.append(_row("aggregator_node", f"{line_items} items", timings, line_items=line_items))
+    return rows
+
+
+async def _database(args: argparse.Namespace) -> list[dict]:
+    from app.db.connection import close_pool, get_pool, init_pool
+    from app.db.repository import fetch_all_claims, save_claim_result, save_claim_results
+    from benchmarks.bench_claim_reads import _FETCH_ONE_SQL, _parse_row
+
+    await init_pool()
+    rows = []
+    try:
+        for line_items in args.line_items:
+            case = f"{line_items} items"
+            claim = synthetic_claim(f"{_PREFIX}save", line_items=line_items)
+            if "save_claim_result" in args.only:
+                rows.append(_row("save_claim_result", case, await _time(lambda: save_claim_result(claim), args.repeat), line_items=line_items))
+            if "_parse_row" in args.only:
+                await save_claim_results([(claim.model_copy(update={"claim_id": f"{_PREFIX}parse-{line_items}"}), None)])
+                async with get_pool().acquire() as conn:
+                    row = await conn.fetchrow(_FETCH_ONE_SQL, f"{_PREFIX}parse-{line_items}")
+                rows.append(_row("_parse_row", case, await _time(lambda: _parse_row(row), args.repeat * 5), line_items=line_items))
+
+        if "fetch_all_claims" in args.only:
+            await save_claim_results([(synthetic_claim(f"{_PREFIX}list-{i}", line_items=5, pages=2, seed=i), None) for i in range(args.claims)])
+            _, _, cursor = await fetch_all_claims(limit=args.claims // 2)
+            rows.append(_row("fetch_all_claims", "first page", await _time(lambda: fetch_all_claims(limit=20), args.repeat * 5), claims=args.claims))
+            timings = await _time(lambda: fetch_all_claims(limit=20, cursor=cursor), args.repeat * 5)
+            rows.append(_row("fetch_all_claims", "keyset page", timings, claims=args.claims))
+    finally:
+        async with get_pool().acquire() as conn:
+            await conn.execute("DELETE FROM claims WHERE claim_id LIKE $1", f"{_PREFIX}%")
+        await close_pool()
+    return rows
+
+
+async def _run(args: argparse.Namespace) -> list[dict]:
+    fake_llm.install(args.llm_latency_ms / 1000)
+    segregator.page_cache.ttl_seconds = 0
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    rows = await _offline(args, mix)
+    if args.db:
+        rows += await _database(args)
+
+    meta = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "pdf_workers": settings.PDF_EXTRACTION_WORKERS,
+        "pdf_backend": settings.PDF_BACKEND,
+        "measured_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    return [{**row, **meta} for row in rows]
+
+
+def _load_baseline(path: str) -> dict[tuple[str, str], float]:
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return {(row["component"], row["case"]): row["median_ms"] for row in rows}
+
+
+COMPONENTS = (
+    "extract_pages",
+    "engine.extract",
+    "get_page_subset",
+    "aggregator_node",
+    "run_pipeline",
+    "save_claim_result",
+    "_parse_row",
+    "fetch_all_claims",
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--lines-per-page", type=int, default=40, help="text density; at most 63 lines fit on a synthetic page")
+    parser.add_argument("--mix", help="document-type weights, e.g. itemized_bill=8,discharge_summary=2,identity_document=1")
+    parser.add_argument("--line-items", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--claims", type=int, default=1000, help="claims listed by fetch_all_claims")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--only", nargs="+", choices=COMPONENTS, default=list(COMPONENTS))
+    parser.add_argument("--db", action="store_true", help="also run the Postgres cases")
+    parser.add_argument("--baseline", help="JSON lines from an earlier run to compare medians against")
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args()
+
+    baseline = _load_baseline(args.baseline) if args.baseline else {}
+    for row in asyncio.run(_run(args)):
+        if args.json:
+            print(json.dumps(row))
+            continue
+        line = f"{row['component']:<18} {row['case']:<14} median {row['median_ms']:>10.3f} ms  p95 {row['p95_ms']:>10.3f} ms"
+        before = baseline.get((row["component"], row["case"]))
+        if before:
+            line += f"  {100 * (row['median_ms'] - before) / before:+6.1f}% vs {before:.3f} ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
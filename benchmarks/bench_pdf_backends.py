@@ -0,0 +1,115 @@
+"""
+Compare the PDF text-extraction backends on speed and text fidelity.
+
+Runs every backend in :data:`app.services.pdf.BACKENDS` in this process
+(no pool, so only the library is timed) over synthetic claims of one
+document type at a time, and reports per backend and document type:
+
+- ``page_ms``      median extraction time per page;
+- ``similarity``   ``difflib`` ratio between the extracted text and the
+                   text drawn on the page (whitespace-normalised);
+- ``line_recall``  share of the drawn lines found verbatim, which is what
+                   the bill agent's row parsing depends on.
+
+``--pdf`` adds real documents: they have no ground truth, so fidelity is
+measured against pdfplumber's output (the previous default).
+
+    python -m benchmarks.bench_pdf_backends --pages 20 --lines-per-page 40
+    python -m benchmarks.bench_pdf_backends --pdf samples/*.pdf
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import json
+import statistics
+from pathlib import Path
+
+from app.models.schema import DocumentType
+from app.services.pdf import BACKENDS, _count_pages, _extract_page_range
+from benchmarks.synthetic import build_pdf, claim_pages
+
+_TYPES = (DocumentType.ITEMIZED_BILL, DocumentType.DISCHARGE_SUMMARY, DocumentType.IDENTITY, DocumentType.INVESTIGATION_REPORT)
+
+
+def _lines(text: str) -> list[str]:
+    return [" ".join(line.split()) for line in text.splitlines() if line.strip()]
+
+
+def _fidelity(expected: list[str], extracted: list[str]) -> tuple[float, float]:
+    ratios, recalls = [], []
+    for want, got in zip(expected, extracted):
+        want_lines, got_lines = _lines(want), _lines(got)
+        ratios.append(difflib.SequenceMatcher(None, "\n".join(want_lines), "\n".join(got_lines), autojunk=False).ratio())
+        found = set(got_lines)
+        recalls.append(sum(line in found for line in want_lines) / len(want_lines) if want_lines else 1.0)
+    return statistics.fmean(ratios), statistics.fmean(recalls)
+
+
+def _extract(pdf: bytes, pages: int, backend: str, repeat: int) -> tuple[list[str], float]:
+    """Page texts and the median seconds per page over *repeat* runs."""
+    per_page = []
+    for _ in range(repeat):
+        chunk = _extract_page_range(pdf, 0, pages, backend)
+        per_page.extend(seconds for _, seconds in chunk)
+    return [page.text for page, _ in chunk], statistics.median(per_page)
+
+
+def _documents(args: argparse.Namespace) -> list[tuple[str, bytes, int, list[str] | None]]:
+    """``(label, pdf, pages, expected page texts or None)``."""
+    documents = []
+    for doc_type in _TYPES:
+        typed = claim_pages(args.pages, args.lines_per_page, {doc_type: 1}, seed=args.pages)
+        documents.append((doc_type.value, build_pdf([text for _, text in typed]), args.pages, [text for _, text in typed]))
+    for path in args.pdf or []:
+        pdf = Path(path).read_bytes()
+        documents.append((Path(path).name, pdf, _count_pages(pdf, "pdfplumber"), None))
+    return documents
+
+
+def _run(args: argparse.Namespace) -> list[dict]:
+    rows = []
+    for label, pdf, pages, expected in _documents(args):
+        reference = expected
+        if reference is None:
+            reference, _ = _extract(pdf, pages, "pdfplumber", 1)
+        for backend in args.backends:
+            texts, seconds = _extract(pdf, pages, backend, args.repeat)
+            similarity, recall = _fidelity(reference, texts)
+            rows.append(
+                {
+                    "backend": backend,
+                    "document": label,
+                    "pages": pages,
+                    "page_ms": round(seconds * 1000, 3),
+                    "similarity": round(similarity, 4),
+                    "line_recall": round(recall, 4),
+                    "reference": "drawn text" if expected is not None else "pdfplumber",
+                }
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--lines-per-page", type=int, default=40)
+    parser.add_argument("--backends", nargs="+", choices=tuple(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--pdf", nargs="*", help="real PDFs to include (fidelity relative to pdfplumber)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args()
+
+    for row in _run(args):
+        if args.json:
+            print(json.dumps(row))
+        else:
+            print(
+                f"{row['backend']:<11} {row['document']:<22} {row['pages']:>4} pages  {row['page_ms']:>8.3f} ms/page  "
+                f"similarity {row['similarity']:.4f}  line recall {row['line_recall']:.4f}  (vs {row['reference']})"
+            )
+
+
+if __name__ == "__main__":
+    main()
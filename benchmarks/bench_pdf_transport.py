@@ -0,0 +1,102 @@
+"""
+Benchmark how PDF bytes reach the extraction workers.
+
+Compares, for several file sizes and page counts:
+
+- ``legacy``         the original path: a fresh pool per upload and the
+                     full PDF pickled into one task per page;
+- ``pickle``         the persistent engine pickling the PDF into every
+                     page-range task;
+- ``shared_memory``  the persistent engine copying the PDF once into
+                     shared memory and sending workers only a handle.
+
+Run from the repository root (a ``.env`` is needed for settings)::
+
+    python -m benchmarks.bench_pdf_transport --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pdfplumber
+
+from app.models.schema import PageData
+from app.services.pdf import PdfExtractionEngine, _page_ranges
+from benchmarks.synthetic import simple_pdf
+
+CASES = [(10, 1), (10, 20), (50, 1), (50, 20)]  # (pages, size MB)
+
+
+def _legacy_single_page(pdf_bytes: bytes, page_index: int) -> PageData:
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        text = pdf.pages[page_index].extract_text() or ""
+    return PageData(page_number=page_index + 1, text=text)
+
+
+def _legacy_extract(pdf_bytes: bytes, workers: int) -> list[PageData]:
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        total_pages = len(pdf.pages)
+    with ProcessPoolExecutor(max_workers=min(workers, total_pages)) as pool:
+        return list(pool.map(partial(_legacy_single_page, pdf_bytes), range(total_pages)))
+
+
+def _median_seconds(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - began)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args()
+
+    engines = {name: PdfExtractionEngine(max_workers=args.workers, transport=name) for name in ("pickle", "shared_memory")}
+    for engine in engines.values():
+        engine.start()
+
+    try:
+        for pages, size_mb in CASES:
+            pdf_bytes = simple_pdf(pages, size_mb=size_mb)
+            ranges = len(_page_ranges(pages, args.workers))
+            shipped = {"legacy": len(pdf_bytes) * pages, "pickle": len(pdf_bytes) * (ranges + 1), "shared_memory": 0}
+
+            results = {"legacy": _median_seconds(lambda: _legacy_extract(pdf_bytes, args.workers), args.repeat)}
+            for name, engine in engines.items():
+                results[name] = _median_seconds(lambda: asyncio.run(engine.extract(pdf_bytes)), args.repeat)
+
+            for name, seconds in results.items():
+                row = {
+                    "pages": pages,
+                    "size_mb": round(len(pdf_bytes) / 1024 / 1024, 2),
+                    "transport": name,
+                    "median_ms": round(seconds * 1000, 1),
+                    "pdf_bytes_through_pipes_mb": round(shipped[name] / 1024 / 1024, 1),
+                }
+                if args.json:
+                    print(json.dumps(row))
+                else:
+                    print(
+                        f"{row['pages']:>4} pages {row['size_mb']:>6.1f} MB  {name:<14} {row['median_ms']:>9.1f} ms"
+                        f"  {row['pdf_bytes_through_pipes_mb']:>8.1f} MB piped"
+                    )
+    finally:
+        for engine in engines.values():
+            engine.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark claim persistence against a live Postgres (settings from ``.env``).
+
+Every claim has 20 classified pages, an identity, a discharge summary and
+a bill of ``--line-items`` rows (500 by default).  Compares:
+
+- ``rows``      the original write path: one INSERT per parent row and
+                ``executemany`` for classifications and line items, one
+                transaction per claim;
+- ``copy``      ``save_claim_result``: reserved ids and one COPY per child
+                table, one transaction per claim;
+- ``buffered``  ``ClaimWriteBuffer``: concurrent claims grouped into one
+                COPY transaction per flush.
+
+``rows`` and ``copy`` are measured both one claim at a time (latency) and
+with ``--concurrency`` claims in flight (throughput); ``buffered`` only
+makes sense concurrently.  Rows written are deleted afterwards.
+
+    python -m benchmarks.bench_persistence --claims 64 --concurrency 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.db.connection import close_pool, get_pool, init_pool
+from app.db.repository import save_claim_result
+from app.db.write_buffer import ClaimWriteBuffer
+from app.models.schema import ProcessResponse
+from benchmarks.synthetic import synthetic_claim
+
+_PREFIX = "bench-persist-"
+
+
+async def _save_rows(response: ProcessResponse, cache_key: str | None = None) -> int:
+    """The write path before COPY: one statement per parent row, executemany for the rest."""
+    async with get_pool().acquire() as conn:
+        async with conn.transaction():
+            claim_pk = await conn.fetchval("INSERT INTO claims (claim_id, cache_key) VALUES ($1, $2) RETURNING id", response.claim_id, cache_key)
+            await conn.executemany(
+                "INSERT INTO page_classifications (claim_fk, page_number, document_type, confidence) VALUES ($1, $2, $3, $4)",
+                [(claim_pk, c.page_number, c.document_type.value, c.confidence) for c in response.segregation],
+            )
+            ident = response.identity
+            await conn.execute(
+                """INSERT INTO identity_extractions (claim_fk, patient_name, date_of_birth, id_numbers, policy_number, policy_details)
+                   VALUES ($1, $2, $3, $4::jsonb, $5, $6::jsonb)""",
+                claim_pk,
+                ident.patient_name,
+                ident.date_of_birth,
+                json.dumps(ident.id_numbers),
+                ident.policy_number,
+                json.dumps(ident.policy_details),
+            )
+            ds = response.discharge_summary
+            await conn.execute(
+                """INSERT INTO discharge_summaries (claim_fk, diagnosis, admission_date, discharge_date, physician_name, physician_details, summary)
+                   VALUES ($1, $2::jsonb, $3, $4, $5, $6::jsonb, $7)""",
+                claim_pk,
+                json.dumps(ds.diagnosis),
+                ds.admission_date,
+                ds.discharge_date,
+                ds.physician_name,
+                json.dumps(ds.physician_details),
+                ds.summary,
+            )
+            bill = response.itemized_bill
+            bill_pk = await conn.fetchval(
+                "INSERT INTO itemized_bills (claim_fk, total_amount) VALUES ($1, $2) RETURNING id", claim_pk, bill.total_amount
+            )
+            await conn.executemany(
+                "INSERT INTO bill_line_items (bill_fk, description, quantity, unit_price, amount) VALUES ($1, $2, $3, $4, $5)",
+                [(bill_pk, it.description, it.quantity, it.unit_price, it.amount) for it in bill.items],
+            )
+    return claim_pk
+
+
+async def _timed(save, claims: list[ProcessResponse], concurrency: int) -> tuple[float, list[float]]:
+    """Wall time for *claims*, and the latency of each save."""
+    slots = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(claim: ProcessResponse) -> None:
+        async with slots:
+            began = time.perf_counter()
+            await save(claim)
+            latencies.append(time.perf_counter() - began)
+
+    began = time.perf_counter()
+    await asyncio.gather(*(one(c) for c in claims))
+    return time.perf_counter() - began, latencies
+
+
+async def _run(args: argparse.Namespace) -> list[dict]:
+    await init_pool()
+    rows = []
+    try:
+        counter = 0
+
+        def claims() -> list[ProcessResponse]:
+            nonlocal counter
+            counter += args.claims
+            return [synthetic_claim(f"{_PREFIX}{counter + i}", line_items=args.line_items, seed=i) for i in range(args.claims)]
+
+        buffer = ClaimWriteBuffer(max_claims=args.buffer_claims, flush_ms=args.buffer_ms)
+        buffer.start()
+        cases = [
+            ("rows", 1, _save_rows),
+            ("copy", 1, save_claim_result),
+            ("rows", args.concurrency, _save_rows),
+            ("copy", args.concurrency, save_claim_result),
+            ("buffered", args.concurrency, buffer.save),
+        ]
+        for name, concurrency, save in cases:
+            await _timed(save, claims()[:2], 1)  # warm up connections and statement caches
+            wall, latencies = await _timed(save, claims(), concurrency)
+            latencies.sort()
+            rows.append(
+                {
+                    "path": name,
+                    "concurrency": concurrency,
+                    "claims": args.claims,
+                    "line_items": args.line_items,
+                    "claims_per_s": round(args.claims / wall, 1),
+                    "p50_ms": round(statistics.median(latencies) * 1000, 1),
+                    "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+                }
+            )
+        await buffer.close()
+        rows[-1]["claims_per_flush"] = buffer.stats()["claims_per_flush"]
+    finally:
+        async with get_pool().acquire() as conn:
+            await conn.execute("DELETE FROM claims WHERE claim_id LIKE $1", f"{_PREFIX}%")
+        await close_pool()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claims", type=int, default=64)
+    parser.add_argument("--line-items", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--buffer-claims", type=int, default=64)
+    parser.add_argument("--buffer-ms", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args()
+
+    for row in asyncio.run(_run(args)):
+        if args.json:
+            print(json.dumps(row))
+        else:
+            print(
+                f"{row['path']:<9} x{row['concurrency']:<3} {row['line_items']:>4} items  {row['claims_per_s']:>8.1f} claims/s"
+                f"  p50 {row['p50_ms']:>8.1f} ms  p95 {row['p95_ms']:>8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
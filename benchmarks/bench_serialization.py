@@ -0,0 +1,128 @@
+"""
+Benchmark the aggregate-to-response path for large bills (no LLM, no database).
+
+Starts from the validated models the extraction agents produce and ends
+with the HTTP response body of ``POST /api/process``:
+
+- ``dicts``   the path before typed graph state: each agent ``model_dump()``s
+              its result, the aggregator re-validates and dumps every part,
+              ``run_pipeline`` builds ``ProcessResponse(**final_output)``,
+              and FastAPI validates against ``response_model``, dumps to a
+              JSON-able dict and encodes it with stdlib ``json``;
+- ``models``  the agents' models carried through the state,
+              ``aggregator_node`` assembling them as they are, and
+              ``ModelResponse`` serializing once with pydantic's encoder;
+- ``orjson``  for reference, the same models dumped to a dict and encoded
+              with orjson (only when it is installed).
+
+Run from the repository root (a ``.env`` is needed for settings)::
+
+    python -m benchmarks.bench_serialization --line-items 1000 5000 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.api.routes import ModelResponse
+from app.graph.nodes.aggregator import aggregator_node
+from app.models.schema import DischargeSummaryInfo, IdentityInfo, ItemizedBillInfo, ProcessResponse
+from benchmarks.synthetic import synthetic_claim
+
+try:
+    import orjson
+except ImportError:  # optional, reference only
+    orjson = None
+
+_RESPONSE = TypeAdapter(ProcessResponse)
+
+
+async def _dicts(claim: ProcessResponse) -> bytes:
+    results = {
+        "identity": claim.identity.model_dump(),
+        "discharge_summary": claim.discharge_summary.model_dump(),
+        "itemized_bill": claim.itemized_bill.model_dump(),
+    }
+    final = {
+        "claim_id": claim.claim_id,
+        "segregation": [c.model_dump() for c in claim.segregation],
+        "identity": IdentityInfo(**results["identity"]).model_dump(),
+        "discharge_summary": DischargeSummaryInfo(**results["discharge_summary"]).model_dump(),
+        "itemized_bill": ItemizedBillInfo(**results["itemized_bill"]).model_dump(),
+    }
+    response = ProcessResponse(**final)
+    # fastapi.routing.serialize_response + JSONResponse
+    content = _RESPONSE.dump_python(_RESPONSE.validate_python(response), mode="json")
+    return JSONResponse(content).body
+
+
+def _state(claim: ProcessResponse) -> dict:
+    return {
+        "claim_id": claim.claim_id,
+        "page_classifications": claim.segregation,
+        "extraction_results": {"identity": claim.identity, "discharge_summary": claim.discharge_summary, "itemized_bill": claim.itemized_bill},
+    }
+
+
+async def _models(claim: ProcessResponse) -> bytes:
+    update = await aggregator_node(_state(claim))
+    return ModelResponse(update["final_output"]).body
+
+
+async def _orjson(claim: ProcessResponse) -> bytes:
+    update = await aggregator_node(_state(claim))
+    return orjson.dumps(update["final_output"].model_dump(mode="json"))
+
+
+async def _run(args: argparse.Namespace) -> list[dict]:
+    paths = [("dicts", _dicts), ("models", _models)] + ([("orjson", _orjson)] if orjson is not None else [])
+    rows = []
+    for line_items in args.line_items:
+        claim = synthetic_claim("bench-serialize", line_items=line_items)
+        for name, path in paths:
+            body = await path(claim)  # warm up
+            if json.loads(body)["itemized_bill"]["items"][-1] != claim.itemized_bill.items[-1].model_dump():
+                raise RuntimeError(f"{name} produced a different response")
+            timings = []
+            for _ in range(args.repeat):
+                began = time.perf_counter()
+                await path(claim)
+                timings.append(time.perf_counter() - began)
+            rows.append(
+                {
+                    "path": name,
+                    "line_items": line_items,
+                    "kib": round(len(body) / 1024, 1),
+                    "median_ms": round(statistics.median(timings) * 1000, 3),
+                    "min_ms": round(min(timings) * 1000, 3),
+                }
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--line-items", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args()
+
+    for row in asyncio.run(_run(args)):
+        if args.json:
+            print(json.dumps(row))
+        else:
+            print(
+                f"{row['path']:<7} {row['line_items']:>6} items  {row['kib']:>8.1f} KiB  "
+                f"median {row['median_ms']:>8.3f} ms  min {row['min_ms']:>8.3f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Accuracy / latency report for the local page pre-classifier.
+
+Compares the keyword/regex rules, and rules + TF-IDF, against the LLM
+labels stored in ``page_classification_cache`` (rows written while
+``PAGE_CACHE_STORE_TEXT`` was on).  For each confidence threshold it
+reports coverage (share of pages that would bypass the LLM) and
+accuracy on those pages, plus per-type precision/recall at the
+configured ``HEURISTIC_MIN_CONFIDENCE`` and per-page latency.
+
+The TF-IDF model is trained on a deterministic 80% split and evaluated
+on the rest; ``--save-model`` retrains on everything and writes the
+``.npz`` file that ``HEURISTIC_TFIDF_MODEL_PATH`` points at.
+
+    python -m benchmarks.classifier_report --limit 50000 --save-model page_model.npz
+    python -m benchmarks.classifier_report --from-jsonl labelled.jsonl --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import statistics
+import time
+
+from app.core.config import settings
+from app.models.schema import DocumentType, PageData
+from app.services.classifier import PagePreClassifier, TfidfCentroidModel
+
+THRESHOLDS = (0.7, 0.8, 0.9, 0.95)
+
+
+async def _load_from_db(limit: int) -> list[tuple[str, DocumentType]]:
+    from app.db.connection import close_pool, init_pool
+    from app.db.repository import fetch_labelled_pages
+
+    await init_pool()
+    try:
+        rows = await fetch_labelled_pages(limit)
+    finally:
+        await close_pool()
+    return [(text, DocumentType(doc_type)) for text, doc_type, _ in rows]
+
+
+def _load_from_jsonl(path: str) -> list[tuple[str, DocumentType]]:
+    with open(path, encoding="utf-8") as fh:
+        return [(row["text"], DocumentType(row["document_type"])) for row in map(json.loads, fh) if row.get("text")]
+
+
+def _is_test(text: str) -> bool:
+    return hashlib.sha256(text.encode()).digest()[0] < 52  # ~20%
+
+
+def _evaluate(name: str, classifier: PagePreClassifier, samples: list[tuple[str, DocumentType]]) -> dict:
+    pages = [PageData(page_number=i + 1, text=text) for i, (text, _) in enumerate(samples)]
+    truth = [label for _, label in samples]
+
+    timings = []
+    predictions = []
+    for page in pages:
+        began = time.perf_counter()
+        predictions.append(classifier.predict([page])[0])
+        timings.append(time.perf_counter() - began)
+
+    by_threshold = {}
+    for threshold in THRESHOLDS:
+        covered = [(p[0], t) for p, t in zip(predictions, truth) if p is not None and p[1] >= threshold]
+        correct = sum(1 for pred, t in covered if pred == t)
+        by_threshold[str(threshold)] = {
+            "coverage": round(len(covered) / len(samples), 4) if samples else 0.0,
+            "accuracy": round(correct / len(covered), 4) if covered else None,
+        }
+
+    per_type = {}
+    threshold = settings.HEURISTIC_MIN_CONFIDENCE
+    for doc_type in DocumentType:
+        predicted = [t for p, t in zip(predictions, truth) if p is not None and p[1] >= threshold and p[0] == doc_type]
+        actual = sum(1 for t in truth if t == doc_type)
+        if not predicted and not actual:
+            continue
+        per_type[doc_type.value] = {
+            "support": actual,
+            "precision": round(sum(1 for t in predicted if t == doc_type) / len(predicted), 4) if predicted else None,
+            "recall": round(sum(1 for t in predicted if t == doc_type) / actual, 4) if actual else None,
+        }
+
+    ordered = sorted(timings)
+    return {
+        "classifier": name,
+        "pages": len(samples),
+        "thresholds": by_threshold,
+        "per_type_at_configured_threshold": per_type,
+        "latency_us": {
+            "mean": round(statistics.fmean(timings) * 1e6, 1) if timings else None,
+            "p95": round(ordered[int(len(ordered) * 0.95)] * 1e6, 1) if ordered else None,
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=50_000, help="max labelled pages to read from the database")
+    parser.add_argument("--from-jsonl", help="read {text, document_type} lines from a file instead of the database")
+    parser.add_argument("--save-model", help="train TF-IDF on all samples and write it to this .npz path")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    samples = _load_from_jsonl(args.from_jsonl) if args.from_jsonl else asyncio.run(_load_from_db(args.limit))
+    if not samples:
+        raise SystemExit("No labelled pages found (is PAGE_CACHE_STORE_TEXT enabled?)")
+
+    train = [s for s in samples if not _is_test(s[0])]
+    test = [s for s in samples if _is_test(s[0])] or samples
+
+    reports = [_evaluate("rules", PagePreClassifier(min_confidence=settings.HEURISTIC_MIN_CONFIDENCE), test)]
+    if len({label for _, label in train}) > 1:
+        model = TfidfCentroidModel.fit([t for t, _ in train], [label for _, label in train])
+        reports.append(_evaluate("rules+tfidf", PagePreClassifier(min_confidence=settings.HEURISTIC_MIN_CONFIDENCE, model=model), test))
+
+    if args.save_model:
+        TfidfCentroidModel.fit([t for t, _ in samples], [label for _, label in samples]).save(args.save_model)
+
+    if args.json:
+        print(json.dumps({"train_pages": len(train), "test_pages": len(test), "reports": reports}, indent=2))
+        return
+
+    print(f"train={len(train)} test={len(test)} configured threshold={settings.HEURISTIC_MIN_CONFIDENCE}")
+    for report in reports:
+        print(f"\n{report['classifier']}  latency mean={report['latency_us']['mean']}us p95={report['latency_us']['p95']}us")
+        for threshold, row in report["thresholds"].items():
+            print(f"  >= {threshold:<5} coverage={row['coverage']:.1%}  accuracy={row['accuracy']}")
+        for doc_type, row in report["per_type_at_configured_threshold"].items():
+            print(f"  {doc_type:<24} support={row['support']:<6} precision={row['precision']}  recall={row['recall']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+A deterministic stand-in for the chat model, for benchmarks without network access.
+
+:func:`install` puts :class:`FakeChatModel` behind ``get_llm()``, so
+``ainvoke_structured`` and every graph node run unchanged — rate limiter,
+retries, metrics and all — while the "LLM" answers from the prompt text:
+
+- the segregator gets each page classified by its synthetic title
+  (:data:`benchmarks.synthetic.PAGE_TITLES`);
+- the bill agent gets one row per filler line item on its pages;
+- the identity and discharge agents get fixed records.
+
+The provider's request and token rate limits are lifted too (concurrency
+stays capped at ``LLM_MAX_CONCURRENCY``): they model a remote quota the
+fake does not have, and would otherwise dominate repeated runs.
+
+Replies are a pure function of the prompt, so two runs over the same PDF
+give the same response, and only graph and application overhead is
+measured (plus ``latency`` seconds per call, if given).  The same
+replies (:func:`answer`) back the OpenAI-compatible mock server in
+:mod:`benchmarks.mock_openai`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel
+
+from app.graph.nodes.bill_agent import BillChunkOutput, BillChunkRow
+from app.graph.nodes.segregator import SegregatorOutput
+from app.core.config import settings
+from app.llm import provider as llm_provider
+from app.llm.provider import LLMProvider, LLMRateLimiter
+from app.llm.tokens import estimate_tokens
+from app.models.schema import BillLineItem, DischargeSummaryInfo, DocumentType, IdentityInfo, ItemizedBillInfo, PageClassification
+from benchmarks.synthetic import PAGE_TITLES
+
+_SECTION = re.compile(r"^--- PAGE (\d+) ---$", re.MULTILINE)
+_BILL_LINE = re.compile(r"^\s*\d+\s+(.+?)\s+(\d+) x (\d+\.\d\d)\s+(\d+\.\d\d)\s*$", re.MULTILINE)
+
+
+def _sections(prompt: str) -> tuple[str, list[tuple[int, str]]]:
+    """The folded-lines header and ``(page number, body)`` for every ``--- PAGE n ---`` section."""
+    matches = list(_SECTION.finditer(prompt))
+    header = prompt[: matches[0].start()] if matches else prompt
+    bodies = [(int(m.group(1)), prompt[m.end() : nxt.start() if nxt else len(prompt)]) for m, nxt in zip(matches, [*matches[1:], None])]
+    return header, bodies
+
+
+def _document_type(body: str, header: str) -> DocumentType:
+    # Titles shared by every page of a window are folded into the header by compaction.
+    for text in (body, header):
+        for doc_type, title in PAGE_TITLES.items():
+            if title in text:
+                return doc_type
+    return DocumentType.OTHER
+
+
+def _classify(prompt: str) -> SegregatorOutput:
+    header, sections = _sections(prompt)
+    return SegregatorOutput(
+        classifications=[PageClassification(page_number=n, document_type=_document_type(body, header), confidence=0.95) for n, body in sections]
+    )
+
+
+def _bill_rows(prompt: str) -> BillChunkOutput:
+    _, sections = _sections(prompt)
+    rows = [
+        BillChunkRow(page_number=n, description=m.group(1), quantity=float(m.group(2)), unit_price=float(m.group(3)), amount=float(m.group(4)))
+        for n, body in sections
+        for m in _BILL_LINE.finditer(body)
+    ]
+    return BillChunkOutput(rows=rows)
+
+
+_FIXED = {
+    IdentityInfo: IdentityInfo(patient_name="A Patient", date_of_birth="1980-01-01", id_numbers=["1234 5678 9012"]),
+    DischargeSummaryInfo: DischargeSummaryInfo(
+        diagnosis=["Dengue fever"], admission_date="2024-01-01", discharge_date="2024-01-05", physician_name="Dr. B", summary="Recovered."
+    ),
+}
+
+# Schemas the app asks for, by the name they carry in an OpenAI request (see benchmarks.mock_openai).
+SCHEMAS: dict[str, type[BaseModel]] = {
+    schema.__name__: schema for schema in (SegregatorOutput, BillChunkOutput, ItemizedBillInfo, IdentityInfo, DischargeSummaryInfo)
+}
+
+
+def answer(schema: type[BaseModel], prompt: str) -> BaseModel:
+    """The fake model's reply to *prompt* (every message's text) as an instance of *schema*."""
+    if schema is SegregatorOutput:
+        return _classify(prompt)
+    if schema is BillChunkOutput:
+        return _bill_rows(prompt)
+    if schema is ItemizedBillInfo:
+        items = [BillLineItem(**row.model_dump(include={"description", "quantity", "unit_price", "amount"})) for row in _bill_rows(prompt).rows]
+        return ItemizedBillInfo(items=items, total_amount=sum(item.amount for item in items))
+    if schema in _FIXED:
+        return _FIXED[schema].model_copy(deep=True)
+    return schema()
+
+
+class _StructuredFake:
+    def __init__(self, schema: type[BaseModel], include_raw: bool, latency: float) -> None:
+        self.schema = schema
+        self.include_raw = include_raw
+        self.latency = latency
+
+    async def ainvoke(self, messages: list[dict]):
+        await asyncio.sleep(self.latency)
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        parsed = answer(self.schema, prompt)
+        if not self.include_raw:
+            return parsed
+        input_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(parsed.model_dump_json())
+        raw = AIMessage(
+            content="",
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens},
+        )
+        return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+
+class FakeChatModel:
+    """Implements the one chat-model method the app uses, ``with_structured_output``."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+
+    def with_structured_output(self, schema: type[BaseModel], include_raw: bool = False) -> _StructuredFake:
+        return _StructuredFake(schema, include_raw, self.latency)
+
+
+def install(latency: float = 0.0) -> FakeChatModel:
+    """Make :class:`FakeChatModel` the process-wide client returned by ``get_llm()``, with no rate limits."""
+    model = FakeChatModel(latency)
+    llm_provider.rate_limiter = LLMRateLimiter(settings.LLM_MAX_CONCURRENCY, 0, 0)
+    provider = LLMProvider.__new__(LLMProvider)
+    provider.provider, provider.model = "fake", "fake-chat"
+    provider.temperature, provider.max_tokens, provider.base_url = 0.0, 0, None
+    provider.client = model
+    provider._initialized = True
+    return model
@@ -0,0 +1,220 @@
+"""
+Drive a running API with concurrent ``POST /api/process`` requests and report how it scales.
+
+For each ``--concurrency`` level, that many clients send ``--requests``
+synthetic claims in total (every PDF is distinct, so the result cache
+never answers) back to back.  Per level it reports throughput, p50 / p95
+/ p99 latency and status codes, and resource usage:
+
+- from the API's ``/metrics``: CPU used by the API process, its peak
+  RSS, and the peak number of claims waiting for a pipeline slot, LLM
+  retries (``vantage_errors_total{stage="llm"}``) and extraction queue depth;
+- with ``--pid`` (Linux, same host): CPU and peak RSS of that process and
+  all its children, i.e. the extraction workers too.
+
+Pair it with the mock LLM (:mod:`benchmarks.mock_openai`) to size a
+deployment without spending tokens::
+
+    python -m benchmarks.mock_openai --latency lognormal:900,0.6 &
+    BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=mock uvicorn app.main:app --port 8000 &
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 1 4 16 64 --pid $!
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+from benchmarks.synthetic import claim_pdf, parse_mix
+
+_seeds = itertools.count(int(time.time()))
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))] if sorted_values else 0.0
+
+
+def _proc_tree(pid: int) -> tuple[float, int]:
+    """CPU seconds and RSS bytes of *pid* and its descendants, from /proc."""
+    children: dict[int, list[int]] = {}
+    for entry in Path("/proc").iterdir():
+        if entry.name.isdigit():
+            try:
+                ppid = int((entry / "stat").read_text().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry.name))
+
+    tick, page = os.sysconf("SC_CLK_TCK"), os.sysconf("SC_PAGE_SIZE")
+    cpu, rss, pending = 0.0, 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            fields = Path(f"/proc/{current}/stat").read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        cpu += (int(fields[11]) + int(fields[12])) / tick  # utime, stime
+        rss += int(fields[21]) * page
+        pending.extend(children.get(current, []))
+    return cpu, rss
+
+
+async def _scrape(client: httpx.AsyncClient) -> dict[str, float]:
+    """The API's process and pipeline metrics, summed over labels."""
+    wanted = {"process_cpu_seconds", "process_resident_memory_bytes", "vantage_claims_in_flight", "vantage_pdf_queue_depth", "vantage_errors"}
+    try:
+        text = (await client.get("/metrics")).text
+    except httpx.HTTPError:
+        return {}
+    values: dict[str, float] = {}
+    for family in text_string_to_metric_families(text):
+        if family.name not in wanted:
+            continue
+        for sample in family.samples:
+            if family.name == "vantage_claims_in_flight":
+                key = f"claims_{sample.labels['state']}"
+            elif family.name == "vantage_errors":
+                if sample.name != "vantage_errors_total" or sample.labels.get("stage") != "llm":
+                    continue
+                key = "llm_errors"
+            else:
+                key = family.name
+            values[key] = values.get(key, 0.0) + sample.value
+    return values
+
+
+class _Monitor:
+    """Samples /metrics (and the process tree, with a pid) once a second while a level runs."""
+
+    def __init__(self, client: httpx.AsyncClient, pid: int | None) -> None:
+        self.client = client
+        self.pid = pid
+        self.peaks: dict[str, float] = {}
+        self.first: dict[str, float] = {}
+        self.last: dict[str, float] = {}
+
+    async def sample(self) -> None:
+        values = await _scrape(self.client)
+        if self.pid is not None:
+            values["tree_cpu_seconds"], values["tree_rss_bytes"] = _proc_tree(self.pid)
+        self.first = self.first or values
+        self.last = values
+        for key, value in values.items():
+            self.peaks[key] = max(self.peaks.get(key, 0.0), value)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            await self.sample()
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+        await self.sample()
+
+    def cpu_percent(self, key: str, wall: float) -> float | None:
+        if key not in self.first or key not in self.last:
+            return None
+        return round(100 * (self.last[key] - self.first[key]) / wall, 1)
+
+    def delta(self, key: str) -> float | None:
+        # Labelled counters only appear once they are first incremented.
+        return self.last.get(key, 0.0) - self.first.get(key, 0.0) if self.last else None
+
+
+async def _level(client: httpx.AsyncClient, args: argparse.Namespace, concurrency: int, mix) -> dict:
+    pdfs = await asyncio.to_thread(lambda: [claim_pdf(args.pages, args.lines_per_page, mix, seed=next(_seeds)) for _ in range(args.requests)])
+    queue = iter(pdfs)
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+
+    async def worker() -> None:
+        for pdf in queue:
+            began = time.perf_counter()
+            try:
+                response = await client.post("/api/process", files={"file": ("claim.pdf", pdf, "application/pdf")}, timeout=args.timeout)
+                status = str(response.status_code)
+            except httpx.HTTPError as exc:
+                status = exc.__class__.__name__
+            elapsed = time.perf_counter() - began
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == "200":
+                latencies.append(elapsed)
+
+    monitor = _Monitor(client, args.pid)
+    stop = asyncio.Event()
+    sampling = asyncio.create_task(monitor.run(stop))
+    began = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - began
+    stop.set()
+    await sampling
+
+    latencies.sort()
+    row = {
+        "concurrency": concurrency,
+        "requests": args.requests,
+        "pages": args.pages,
+        "statuses": statuses,
+        "throughput_rps": round(len(latencies) / wall, 3),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+        "api_cpu_pct": monitor.cpu_percent("process_cpu_seconds", wall),
+        "api_peak_rss_mib": (
+            round(monitor.peaks["process_resident_memory_bytes"] / 2**20, 1) if "process_resident_memory_bytes" in monitor.peaks else None
+        ),
+        "peak_claims_waiting": monitor.peaks.get("claims_waiting"),
+        "peak_pdf_queue": monitor.peaks.get("vantage_pdf_queue_depth"),
+        "llm_errors": monitor.delta("llm_errors"),
+    }
+    if args.pid is not None:
+        row["tree_cpu_pct"] = monitor.cpu_percent("tree_cpu_seconds", wall)
+        row["tree_peak_rss_mib"] = round(monitor.peaks.get("tree_rss_bytes", 0) / 2**20, 1)
+    return row
+
+
+async def _run(args: argparse.Namespace) -> None:
+    mix = parse_mix(args.mix) if args.mix else None
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 4, max_keepalive_connections=max(args.concurrency) + 4)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits) as client:
+        (await client.get("/health")).raise_for_status()
+        for concurrency in args.concurrency:
+            row = await _level(client, args, concurrency, mix)
+            if args.json:
+                print(json.dumps(row), flush=True)
+            else:
+                resources = f"api cpu {row['api_cpu_pct']}%  rss {row['api_peak_rss_mib']} MiB"
+                if args.pid is not None:
+                    resources += f"  tree cpu {row['tree_cpu_pct']}%  rss {row['tree_peak_rss_mib']} MiB"
+                print(
+                    f"c={concurrency:<4} {row['throughput_rps']:>7.2f} req/s  "
+                    f"p50 {row['p50_ms']:>8.0f}  p95 {row['p95_ms']:>8.0f}  p99 {row['p99_ms']:>8.0f} ms  "
+                    f"{resources}  waiting<={row['peak_claims_waiting']}  llm errors {row['llm_errors']}  {row['statuses']}",
+                    flush=True,
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--requests", type=int, default=50, help="requests per concurrency level")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--lines-per-page", type=int, default=40)
+    parser.add_argument("--mix", help="document-type weights, e.g. itemized_bill=8,discharge_summary=2,identity_document=1")
+    parser.add_argument("--timeout", type=float, default=300.0, help="per-request timeout in seconds")
+    parser.add_argument("--pid", type=int, help="API process id, to include its extraction workers in CPU / RSS (Linux)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+A local OpenAI-compatible chat-completions server for load tests.
+
+Point the API at it (``LLM_PROVIDER=openai``, ``BASE_URL=http://localhost:8100/v1``,
+any ``OPENAI_API_KEY``) and every structured-output call the graph makes is
+answered with a schema-valid reply from :func:`benchmarks.fake_llm.answer`
+— ``SegregatorOutput``, ``BillChunkOutput``, ``ItemizedBillInfo``,
+``IdentityInfo`` and ``DischargeSummaryInfo`` — after a sampled delay.
+Both ways langchain asks for structured output are understood:
+``response_format`` JSON schema (the ``ChatOpenAI`` default) and
+function calling.
+
+Latency is drawn per request from ``--latency``:
+
+- ``fixed:MS``
+- ``uniform:LOW_MS,HIGH_MS``
+- ``normal:MEAN_MS,SD_MS``
+- ``lognormal:MEDIAN_MS,SIGMA`` (default ``lognormal:800,0.5`` — a long right tail, like real providers)
+
+plus ``--ms-per-output-token`` for generation time.  ``--rate-429`` and
+``--rate-500`` fail that share of requests (429s carry ``Retry-After:
+--retry-after``) to exercise the rate limiter and retries.  ``GET /stats``
+returns the counters.
+
+Run from the repository root (a ``.env`` is needed for settings)::
+
+    python -m benchmarks.mock_openai --port 8100 --latency lognormal:900,0.6 --rate-429 0.02
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter
+from collections.abc import Callable
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.llm.tokens import estimate_tokens
+from benchmarks.fake_llm import SCHEMAS, answer
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Seconds-per-request sampler for a ``--latency`` spec."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    samplers = {
+        "fixed": (1, lambda rng, ms: ms),
+        "uniform": (2, lambda rng, low, high: rng.uniform(low, high)),
+        "normal": (2, lambda rng, mean, sd: rng.gauss(mean, sd)),
+        "lognormal": (2, lambda rng, median, sigma: median * rng.lognormvariate(0, sigma)),
+    }
+    if kind not in samplers or len(values) != samplers[kind][0]:
+        raise argparse.ArgumentTypeError(f"bad latency spec {spec!r} (fixed:MS, uniform:LOW,HIGH, normal:MEAN,SD, lognormal:MEDIAN,SIGMA)")
+    sample = samplers[kind][1]
+    return lambda rng: max(0.0, sample(rng, *values)) / 1000
+
+
+def _prompt(messages: list[dict]) -> str:
+    parts = []
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):  # content parts
+            content = "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(content)
+    return "\n".join(parts)
+
+
+def _schema_name(body: dict) -> str | None:
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return response_format["json_schema"]["name"]
+    tools = body.get("tools") or []
+    return tools[0]["function"]["name"] if tools else None
+
+
+def _error(status: int, message: str, kind: str, headers: dict | None = None) -> JSONResponse:
+    return JSONResponse({"error": {"message": message, "type": kind, "code": None}}, status_code=status, headers=headers)
+
+
+def build_app(args: argparse.Namespace) -> FastAPI:
+    app = FastAPI(title="mock-openai")
+    rng = random.Random(args.seed)
+    latency = parse_latency(args.latency)
+    stats: Counter[str] = Counter()
+    in_flight = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> JSONResponse:
+        nonlocal in_flight
+        body = await request.json()
+        stats["requests"] += 1
+        roll = rng.random()
+        if roll < args.rate_429:
+            stats["429"] += 1
+            return _error(429, "Rate limit reached (injected).", "requests", {"Retry-After": str(args.retry_after)})
+        if roll < args.rate_429 + args.rate_500:
+            stats["500"] += 1
+            return _error(500, "Server error (injected).", "server_error")
+
+        name = _schema_name(body)
+        schema = SCHEMAS.get(name)
+        if schema is None:
+            stats["400"] += 1
+            return _error(400, f"mock server has no reply for schema {name!r}", "invalid_request_error")
+
+        prompt = _prompt(body.get("messages", []))
+        content = answer(schema, prompt).model_dump_json()
+        prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(content)
+
+        in_flight += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], in_flight)
+        try:
+            await asyncio.sleep(latency(rng) + completion_tokens * args.ms_per_output_token / 1000)
+        finally:
+            in_flight -= 1
+        stats[name] += 1
+
+        message: dict = {"role": "assistant", "content": content, "refusal": None}
+        finish_reason = "stop"
+        if body.get("tools"):
+            call = {"id": f"call_{uuid.uuid4().hex[:24]}", "type": "function", "function": {"name": name, "arguments": content}}
+            message, finish_reason = {"role": "assistant", "content": None, "refusal": None, "tool_calls": [call]}, "tool_calls"
+        return JSONResponse(
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+            }
+        )
+
+    @app.get("/stats")
+    async def get_stats() -> dict:
+        return {"latency": args.latency, "rate_429": args.rate_429, "rate_500": args.rate_500, **stats}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", default="lognormal:800,0.5", type=lambda spec: parse_latency(spec) and spec)
+    parser.add_argument("--ms-per-output-token", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--rate-500", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on injected 429s")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    uvicorn.run(build_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
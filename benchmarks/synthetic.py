@@ -0,0 +1,220 @@
+"""
+Offline synthetic PDF generation for benchmarks.
+
+Writes minimal, valid PDF files by hand (Helvetica text pages plus an
+optional incompressible payload stream) so benchmarks need no extra
+dependencies and no sample claims on disk.  :func:`claim_pdf` mixes
+typed pages (identity, discharge summary, bill, ...) for pipeline
+benchmarks; :func:`synthetic_claim` builds a matching pipeline result for
+the persistence benchmarks.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+
+from app.models.schema import (
+    BillLineItem,
+    DischargeSummaryInfo,
+    DocumentType,
+    IdentityInfo,
+    ItemizedBillInfo,
+    PageClassification,
+    ProcessResponse,
+)
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _content_stream(text: str) -> bytes:
+    lines = ["BT", "/F1 10 Tf", "12 TL", "50 800 Td"]
+    for line in text.splitlines()[:64]:
+        lines.append(f"({_escape(line)}) Tj T*")
+    lines.append("ET")
+    return "\n".join(lines).encode("latin-1", errors="replace")
+
+
+def build_pdf(page_texts: list[str], padding_bytes: int = 0) -> bytes:
+    """
+    Build a PDF with one text page per entry in *page_texts*.
+
+    Args:
+        page_texts:    Text drawn on each page, one line per ``\\n``.
+        padding_bytes: Size of a random, unreferenced binary stream appended
+                       to the file — stands in for embedded scans so file
+                       size can be varied independently of page count.
+
+    Returns:
+        Raw PDF bytes.
+    """
+    objects: list[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # patched below
+    pages_obj = add(b"")  # patched below
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    page_ids: list[int] = []
+    for text in page_texts:
+        stream = _content_stream(text)
+        content = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(
+            add(
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+                % (pages_obj, font, content)
+            )
+        )
+
+    if padding_bytes > 0:
+        payload = os.urandom(padding_bytes)
+        add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(payload), payload))
+
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+    objects[pages_obj - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets: list[int] = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out)
+
+
+def filler_text(lines: int, seed: int = 0) -> str:
+    """Deterministic pseudo-bill text, *lines* lines long."""
+    rng = random.Random(seed)
+    words = ["Room", "Charges", "Consultation", "Pharmacy", "Injection", "Saline", "Ward", "Nursing", "Lab", "Test", "Fee", "Tablet"]
+    return "\n".join(
+        f"{i + 1:>3}  {' '.join(rng.choices(words, k=4))}  {rng.randint(1, 9)} x {rng.randint(10, 999)}.00  {rng.randint(100, 9999)}.00"
+        for i in range(lines)
+    )
+
+
+def simple_pdf(pages: int, size_mb: float = 0.0, lines_per_page: int = 40) -> bytes:
+    """Convenience wrapper: *pages* filler pages padded to roughly *size_mb* megabytes."""
+    pdf = build_pdf([filler_text(lines_per_page, seed=i) for i in range(pages)])
+    padding = max(0, int(size_mb * 1024 * 1024) - len(pdf))
+    return build_pdf([filler_text(lines_per_page, seed=i) for i in range(pages)], padding_bytes=padding) if padding else pdf
+
+
+# First line of each synthetic page; the fake LLM (benchmarks.fake_llm) classifies pages by it.
+PAGE_TITLES: dict[DocumentType, str] = {
+    DocumentType.CLAIM_FORM: "CLAIM FORM - REIMBURSEMENT REQUEST",
+    DocumentType.CHEQUE_OR_BANK: "CANCELLED CHEQUE - BANK ACCOUNT DETAILS",
+    DocumentType.IDENTITY: "GOVERNMENT IDENTITY CARD",
+    DocumentType.ITEMIZED_BILL: "ITEMIZED BILL - FINAL BILL",
+    DocumentType.DISCHARGE_SUMMARY: "DISCHARGE SUMMARY",
+    DocumentType.PRESCRIPTION: "PRESCRIPTION",
+    DocumentType.INVESTIGATION_REPORT: "INVESTIGATION REPORT - LABORATORY",
+    DocumentType.CASH_RECEIPT: "CASH RECEIPT",
+    DocumentType.OTHER: "CORRESPONDENCE",
+}
+
+# A typical claim: mostly bill pages, a few of everything else.
+DEFAULT_MIX: dict[DocumentType, float] = {
+    DocumentType.CLAIM_FORM: 1,
+    DocumentType.IDENTITY: 1,
+    DocumentType.DISCHARGE_SUMMARY: 2,
+    DocumentType.ITEMIZED_BILL: 10,
+    DocumentType.INVESTIGATION_REPORT: 3,
+    DocumentType.PRESCRIPTION: 1,
+    DocumentType.OTHER: 1,
+}
+
+_PROSE = ["patient", "admitted", "with", "fever", "and", "treated", "under", "observation", "advised", "rest", "review", "after", "days", "stable"]
+
+
+def _typed_page_text(doc_type: DocumentType, lines: int, rng: random.Random) -> str:
+    if doc_type == DocumentType.ITEMIZED_BILL:
+        body = filler_text(lines, seed=rng.randrange(1 << 30))
+    elif doc_type == DocumentType.IDENTITY:
+        id_number = " ".join(str(rng.randint(1000, 9999)) for _ in range(3))
+        body = "\n".join(["Name: A Patient", "Date of Birth: 01/01/1980", f"ID No: {id_number}"][:lines])
+    elif doc_type == DocumentType.DISCHARGE_SUMMARY:
+        head = ["Date of Admission: 01/01/2024", "Date of Discharge: 05/01/2024", "Diagnosis: Dengue fever", "Consultant: Dr. B"]
+        body = "\n".join(head + [" ".join(rng.choices(_PROSE, k=10)) for _ in range(max(0, lines - len(head)))])
+    else:
+        body = "\n".join(" ".join(rng.choices(_PROSE, k=10)) for _ in range(lines))
+    return f"{PAGE_TITLES[doc_type]}\n{body}"
+
+
+def claim_pages(pages: int, lines_per_page: int = 40, mix: dict[DocumentType, float] | None = None, seed: int = 0) -> list[tuple[DocumentType, str]]:
+    """
+    Typed page texts for a synthetic claim.
+
+    Args:
+        pages:          Number of pages.
+        lines_per_page: Text density (bill pages get this many line items).
+        mix:            Relative weight of each document type (default :data:`DEFAULT_MIX`).
+        seed:           Seed for the page order and content.
+
+    Returns:
+        ``(document type, page text)`` per page, in page order.
+    """
+    rng = random.Random(seed)
+    weights = mix or DEFAULT_MIX
+    types = rng.choices(list(weights), weights=list(weights.values()), k=pages)
+    return [(doc_type, _typed_page_text(doc_type, lines_per_page, rng)) for doc_type in types]
+
+
+def claim_pdf(pages: int, lines_per_page: int = 40, mix: dict[DocumentType, float] | None = None, seed: int = 0) -> bytes:
+    """A synthetic claim PDF built from :func:`claim_pages`."""
+    return build_pdf([text for _, text in claim_pages(pages, lines_per_page, mix, seed)])
+
+
+def parse_mix(spec: str) -> dict[DocumentType, float]:
+    """Parse a ``--mix`` argument such as ``itemized_bill=8,discharge_summary=2,identity_document=1``."""
+    mix = {}
+    for part in filter(None, spec.split(",")):
+        name, _, weight = part.partition("=")
+        mix[DocumentType(name.strip())] = float(weight or 1)
+    return mix
+
+
+def synthetic_claim(claim_id: str, line_items: int = 500, pages: int = 20, seed: int = 0) -> ProcessResponse:
+    """A fully populated pipeline result: every page classified, identity, discharge summary and a bill of *line_items* rows."""
+    rng = random.Random(seed)
+    types = list(DocumentType)
+    items = [
+        BillLineItem(
+            description=f"Item {i + 1} {rng.choice(['Pharmacy', 'Lab', 'Ward', 'Nursing'])}",
+            quantity=rng.randint(1, 9),
+            unit_price=rng.randint(10, 999),
+            amount=0,
+        )
+        for i in range(line_items)
+    ]
+    for item in items:
+        item.amount = item.quantity * item.unit_price
+    return ProcessResponse(
+        claim_id=claim_id,
+        segregation=[PageClassification(page_number=n, document_type=types[n % len(types)], confidence=0.9) for n in range(1, pages + 1)],
+        identity=IdentityInfo(
+            patient_name="A Patient",
+            date_of_birth="1980-01-01",
+            id_numbers=["1234 5678 9012"],
+            policy_number="POL-1",
+            policy_details={"insurer": "X"},
+        ),
+        discharge_summary=DischargeSummaryInfo(
+            diagnosis=["Dengue fever"],
+            admission_date="2024-01-01",
+            discharge_date="2024-01-05",
+            physician_name="Dr. B",
+            summary="Recovered.",
+        ),
+        itemized_bill=ItemizedBillInfo(items=items, total_amount=sum(item.amount for item in items)),
+    )
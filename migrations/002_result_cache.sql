@@ -0,0 +1,12 @@
+-- 002_result_cache.sql — Content-addressed lookup of previously processed documents
+
+BEGIN;
+
+-- sha256(pdf) + model + prompt version, set by save_claim_result
+ALTER TABLE claims ADD COLUMN IF NOT EXISTS cache_key TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_claims_cache_key
+    ON claims (cache_key, created_at DESC)
+    WHERE cache_key IS NOT NULL;
+
+COMMIT;
@@ -0,0 +1,17 @@
+-- 003_page_cache.sql — Segregator results keyed by normalised page-text fingerprint
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS page_classification_cache (
+    fingerprint    TEXT         PRIMARY KEY,
+    document_type  TEXT         NOT NULL,
+    confidence     NUMERIC(4,3) NOT NULL,
+    created_at     TIMESTAMPTZ  NOT NULL DEFAULT now(),
+    last_hit_at    TIMESTAMPTZ  NOT NULL DEFAULT now()
+);
+
+-- Age- and LRU-based pruning
+CREATE INDEX IF NOT EXISTS idx_page_cache_created_at ON page_classification_cache (created_at);
+CREATE INDEX IF NOT EXISTS idx_page_cache_last_hit_at ON page_classification_cache (last_hit_at DESC);
+
+COMMIT;
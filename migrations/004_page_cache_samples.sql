@@ -0,0 +1,8 @@
+-- 004_page_cache_samples.sql — Optional page text kept with LLM labels (PAGE_CACHE_STORE_TEXT)
+-- Used to train and evaluate the local pre-classifier.
+
+BEGIN;
+
+ALTER TABLE page_classification_cache ADD COLUMN IF NOT EXISTS sample_text TEXT;
+
+COMMIT;
@@ -0,0 +1,28 @@
+-- 005_claim_jobs.sql — Postgres-backed work queue for POST /api/jobs
+-- The job lifecycle (queued → running → processed | failed) lives in claims.status;
+-- claim_jobs holds the payload and scheduling state until the job finishes.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS claim_jobs (
+    id                BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    claim_fk          BIGINT      NOT NULL UNIQUE REFERENCES claims(id) ON DELETE CASCADE,
+    pdf               BYTEA,                          -- cleared once the job finishes
+    attempts          INT         NOT NULL DEFAULT 0,
+    max_attempts      INT         NOT NULL,
+    run_after         TIMESTAMPTZ NOT NULL DEFAULT now(),
+    lease_expires_at  TIMESTAMPTZ,
+    last_error        TEXT,
+    finished_at       TIMESTAMPTZ,
+    created_at        TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at        TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Workers only ever scan unfinished jobs
+CREATE INDEX IF NOT EXISTS idx_claim_jobs_pending
+    ON claim_jobs (run_after)
+    WHERE finished_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_claims_status ON claims (status);
+
+COMMIT;
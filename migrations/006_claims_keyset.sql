@@ -0,0 +1,18 @@
+-- 006_claims_keyset.sql — keyset pagination for GET /api/claims
+-- Rows are listed newest first on (created_at, id); id breaks ties between
+-- claims created in the same transaction.  Both indexes also serve exact
+-- counts as index-only scans.
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS idx_claims_created_id
+    ON claims (created_at DESC, id DESC);
+
+-- status filter + date range + cursor, all from one index
+CREATE INDEX IF NOT EXISTS idx_claims_status_created_id
+    ON claims (status, created_at DESC, id DESC);
+
+-- Covered by the leading column of idx_claims_status_created_id
+DROP INDEX IF EXISTS idx_claims_status;
+
+COMMIT;
@@ -0,0 +1,25 @@
+-- 007_claim_notify.sql — tell every replica when a claim row changes
+-- Payload is the claim_id; replicas LISTEN on claim_changed and drop their
+-- cached GET /api/claims/{claim_id} response.  NOTIFY is transactional: it is
+-- delivered on commit, and repeats of the same payload in one transaction
+-- are folded into one.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION notify_claim_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('claim_changed', OLD.claim_id);
+    ELSE
+        PERFORM pg_notify('claim_changed', NEW.claim_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS claims_notify_changed ON claims;
+CREATE TRIGGER claims_notify_changed
+    AFTER INSERT OR UPDATE OR DELETE ON claims
+    FOR EACH ROW EXECUTE FUNCTION notify_claim_changed();
+
+COMMIT;
@@ -0,0 +1,71 @@
+-- 008_claim_snapshot.sql — materialised ProcessResponse per claim
+-- Claims are immutable once processed, so the response is built from the
+-- child tables once, when the claim is completed, and GET /api/claims/{id}
+-- reads it back in one index lookup instead of aggregating five tables.
+-- The snapshot is written in the transaction that marks the claim
+-- processed; running and failed claims have none.
+
+BEGIN;
+
+ALTER TABLE claims ADD COLUMN IF NOT EXISTS result_snapshot JSONB;
+
+-- claim_id lookup + newest first, one index
+CREATE INDEX IF NOT EXISTS idx_claims_claim_id_created
+    ON claims (claim_id, created_at DESC);
+
+-- Covered by the leading column of idx_claims_claim_id_created
+DROP INDEX IF EXISTS idx_claims_claim_id;
+
+-- Backfill.  The content of the claims does not change, so the caches need
+-- no invalidation: keep the notify trigger (007) quiet for the duration.
+ALTER TABLE claims DISABLE TRIGGER claims_notify_changed;
+
+UPDATE claims u
+SET result_snapshot = (
+    SELECT to_jsonb(s) FROM (
+        SELECT
+            c.claim_id,
+            COALESCE(
+                (SELECT json_agg(json_build_object(
+                    'page_number', pc.page_number,
+                    'document_type', pc.document_type,
+                    'confidence', pc.confidence
+                ) ORDER BY pc.page_number)
+                FROM page_classifications pc WHERE pc.claim_fk = c.id),
+                '[]'::json
+            ) AS segregation,
+
+            (SELECT row_to_json(t) FROM (
+                SELECT patient_name, date_of_birth, id_numbers, policy_number, policy_details
+                FROM identity_extractions WHERE claim_fk = c.id
+            ) t) AS identity,
+
+            (SELECT row_to_json(t) FROM (
+                SELECT diagnosis, admission_date, discharge_date,
+                       physician_name, physician_details, summary
+                FROM discharge_summaries WHERE claim_fk = c.id
+            ) t) AS discharge_summary,
+
+            (SELECT json_build_object(
+                'total_amount', ib.total_amount,
+                'items', COALESCE(
+                    (SELECT json_agg(json_build_object(
+                        'description', bli.description,
+                        'quantity', bli.quantity,
+                        'unit_price', bli.unit_price,
+                        'amount', bli.amount
+                    ) ORDER BY bli.id)
+                    FROM bill_line_items bli WHERE bli.bill_fk = ib.id),
+                    '[]'::json
+                )
+            ) FROM itemized_bills ib WHERE ib.claim_fk = c.id) AS itemized_bill
+        FROM claims c
+        WHERE c.id = u.id
+    ) s
+)
+WHERE u.status = 'processed'
+  AND u.result_snapshot IS NULL;
+
+ALTER TABLE claims ENABLE TRIGGER claims_notify_changed;
+
+COMMIT;
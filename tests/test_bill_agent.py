@@ -0,0 +1,80 @@
+from app.graph.nodes.bill_agent import BillChunkOutput, BillChunkRow, BillRowKind, merge_chunks
+
+
+def _row(page: int, description: str, amount: float, kind: BillRowKind = BillRowKind.ITEM, **fields) -> BillChunkRow:
+    return BillChunkRow(page_number=page, description=description, amount=amount, kind=kind, **fields)
+
+
+def test_rows_are_ordered_by_page_then_position():
+    outputs = [
+        BillChunkOutput(rows=[_row(2, "X-ray", 800)]),
+        BillChunkOutput(rows=[_row(1, "Room rent", 2000), _row(1, "Nursing", 500)]),
+    ]
+    bill, stated = merge_chunks(outputs)
+    assert [item.description for item in bill.items] == ["Room rent", "Nursing", "X-ray"]
+    assert bill.total_amount == 3300
+    assert stated is None
+
+
+def test_identical_rows_across_a_page_break_are_separate_charges():
+    outputs = [
+        BillChunkOutput(rows=[_row(1, "Consultation", 500), _row(1, "Room rent", 2000, quantity=1, unit_price=2000)]),
+        BillChunkOutput(rows=[_row(2, "Room rent", 2000, quantity=1, unit_price=2000), _row(2, "Pharmacy", 350)]),
+    ]
+    bill, _ = merge_chunks(outputs)
+    assert [item.description for item in bill.items] == ["Consultation", "Room rent", "Room rent", "Pharmacy"]
+    assert bill.total_amount == 4850
+
+
+def test_row_marked_continued_after_a_page_break_is_kept_once():
+    outputs = [
+        BillChunkOutput(rows=[_row(1, "Consultation", 500), _row(1, "Pharmacy", 350)]),
+        BillChunkOutput(rows=[_row(2, "Pharmacy (contd.)", 350), _row(2, "X-ray", 800)]),
+    ]
+    bill, _ = merge_chunks(outputs)
+    assert [item.description for item in bill.items] == ["Consultation", "Pharmacy", "X-ray"]
+
+
+def test_continued_marker_without_a_matching_row_is_kept():
+    outputs = [
+        BillChunkOutput(rows=[_row(1, "Pharmacy", 350)]),
+        BillChunkOutput(rows=[_row(2, "Pharmacy contd.", 120)]),
+    ]
+    bill, _ = merge_chunks(outputs)
+    assert [item.amount for item in bill.items] == [350, 120]
+
+
+def test_carry_over_subtotal_and_total_rows_are_not_items():
+    outputs = [
+        BillChunkOutput(rows=[_row(1, "Room rent", 2000), _row(1, "Page total", 2000, BillRowKind.SUBTOTAL)]),
+        BillChunkOutput(
+            rows=[
+                _row(2, "Balance brought forward", 2000, BillRowKind.CARRY_OVER),
+                _row(2, "B/F", 2000),
+                _row(2, "Pharmacy", 350),
+                _row(2, "Grand total", 2350, BillRowKind.TOTAL),
+            ]
+        ),
+    ]
+    bill, stated = merge_chunks(outputs)
+    assert [item.description for item in bill.items] == ["Room rent", "Pharmacy"]
+    assert stated == 2350
+    assert bill.total_amount == 2350
+
+
+def test_discounts_are_negative_and_the_last_stated_total_wins():
+    outputs = [
+        BillChunkOutput(rows=[_row(1, "Surgery", 10000)], stated_total=9999),
+        BillChunkOutput(rows=[_row(2, "Discount", 1000, BillRowKind.DISCOUNT), _row(2, "GST", 450, BillRowKind.TAX)], stated_total=9450),
+    ]
+    bill, stated = merge_chunks(outputs)
+    assert [item.amount for item in bill.items] == [10000, -1000, 450]
+    assert stated == 9450
+    assert bill.total_amount == 9450
+
+
+def test_empty_bill_has_no_total():
+    bill, stated = merge_chunks([BillChunkOutput()])
+    assert bill.items == []
+    assert bill.total_amount is None
+    assert stated is None
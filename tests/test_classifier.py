@@ -0,0 +1,74 @@
+import pytest
+
+from app.models.schema import DocumentType, PageData
+from app.services.classifier import PagePreClassifier, score_page
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("DISCHARGE SUMMARY\nDate of admission: 01/02/2026\nFinal diagnosis: dengue", DocumentType.DISCHARGE_SUMMARY),
+        ("Government of India\nAadhaar\n1234 5678 9012\nDOB: 01/01/1980", DocumentType.IDENTITY),
+        ("INCOME TAX DEPARTMENT\nGOVT. OF INDIA\nABCDE1234F\nDate of Birth 01/01/1980", DocumentType.IDENTITY),
+        ("CANCELLED CHEQUE\nIFSC: HDFC0001234\nA/c No 000123456789", DocumentType.CHEQUE_OR_BANK),
+        ("ITEMIZED BILL\nBill No: 123\nDescription  Qty  Rate  Amount\nRoom rent  2  1500  3000\nGrand total 3000", DocumentType.ITEMIZED_BILL),
+        ("CLAIM FORM - PART A\nTo be filled in by the insured\nDeclaration by the insured", DocumentType.CLAIM_FORM),
+        ("Rx\nTab. Paracetamol 650 mg twice daily x 5 days", DocumentType.PRESCRIPTION),
+        ("PATHOLOGY LAB REPORT\nHaemoglobin 13.2 g/dL  Reference range 12-16\nSample collected 01/02", DocumentType.INVESTIGATION_REPORT),
+        ("MONEY RECEIPT\nReceived with thanks from Mr. A\nRupees five thousand only", DocumentType.CASH_RECEIPT),
+    ],
+)
+def test_obvious_pages_are_classified(text, expected):
+    classified = PagePreClassifier(min_confidence=0.8).classify([PageData(page_number=1, text=text)])
+    assert classified[1].document_type == expected
+
+
+def test_unmatched_and_blank_pages_are_left_to_the_llm():
+    classifier = PagePreClassifier(min_confidence=0.8)
+    pages = [PageData(page_number=1, text="Lorem ipsum dolor sit amet"), PageData(page_number=2, text="   ")]
+    assert classifier.predict(pages) == [None, None]
+    assert classifier.classify(pages) == {}
+
+
+def test_mixed_evidence_lowers_confidence():
+    single = PagePreClassifier(min_confidence=0).predict([PageData(page_number=1, text="ITEMIZED BILL\nGrand total 3000")])[0]
+    mixed = PagePreClassifier(min_confidence=0).predict([PageData(page_number=1, text="ITEMIZED BILL\nGrand total 3000\nMONEY RECEIPT")])[0]
+    assert single[0] == DocumentType.ITEMIZED_BILL
+    assert mixed[1] < single[1]
+
+
+def test_pan_pattern_is_case_sensitive():
+    assert DocumentType.IDENTITY not in score_page("abcde1234f")
+    assert score_page("ABCDE1234F")[DocumentType.IDENTITY] == 1.5
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "FINAL BILL\nTDS deducted  0.00\nNet payable  45,000.00",
+        "Received from: H S Sharma\nBD Diagnostics",
+        "Hospital: SOS Medical Centre\nTDS @ 10%",
+    ],
+)
+def test_dosing_abbreviations_alone_are_not_prescription_evidence(text):
+    assert DocumentType.PRESCRIPTION not in score_page(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Tab Pan 40 BD",
+        "Paracetamol 650 mg tds x 5 days",
+        "Syp. Cremaffin 10 ml HS",
+        "Inj. Tramadol 50mg IV SOS",
+    ],
+)
+def test_dosing_abbreviations_after_a_dose_count(text):
+    assert score_page(text)[DocumentType.PRESCRIPTION] >= 1.0
+
+
+def test_bill_with_tds_line_is_not_pulled_towards_prescription():
+    text = "ITEMIZED BILL\nBill No: 991\nRoom rent  3  1500  4500\nTDS  0.00\nGrand total  4500"
+    prediction = PagePreClassifier(min_confidence=0).predict([PageData(page_number=1, text=text)])[0]
+    assert prediction[0] == DocumentType.ITEMIZED_BILL
+    assert DocumentType.PRESCRIPTION not in score_page(text)
@@ -0,0 +1,66 @@
+from app.llm.tokens import count_tokens
+from app.models.schema import PageData
+from app.services.compaction import compact_text, page_block, prepare_prompt_pages, repeated_lines
+
+
+def _page(page_number: int, *lines: str) -> PageData:
+    return PageData(page_number=page_number, text="\n".join(lines))
+
+
+def test_compact_text_collapses_leaders_spaces_and_page_furniture():
+    text = "Room rent ............ 1500.00\n\n\tNursing      charges     300.00\nPage 3 of 12\n- 4 -\n"
+    assert compact_text(text) == "Room rent  1500.00\nNursing  charges  300.00"
+
+
+def test_prepare_prompt_pages_keeps_raw_token_counts():
+    pages = [_page(1, "Room rent ............ 1500.00", "Page 1 of 2")]
+    compacted, raw_tokens = prepare_prompt_pages(pages)
+    assert compacted[0].text == "Room rent  1500.00"
+    assert raw_tokens == {1: count_tokens(pages[0].text)}
+
+    untouched, _ = prepare_prompt_pages(pages, enabled=False)
+    assert untouched is pages
+
+
+def test_repeated_header_lines_are_found_but_amount_rows_are_not():
+    pages = [_page(n, "CITY HOSPITAL", "Itemized bill", f"Line {n}", "Room rent 1500.00") for n in range(1, 5)]
+    assert repeated_lines(pages, 0.5) == ["CITY HOSPITAL", "Itemized bill"]
+    assert repeated_lines(pages[:1], 0.5) == []
+
+
+def test_page_block_folds_repeated_lines_once():
+    pages = [_page(n, "CITY HOSPITAL", f"Consultation day {n}  500.00") for n in range(1, 4)]
+    block = page_block(pages, token_budget=10_000)
+
+    assert block.text.count("CITY HOSPITAL") == 1
+    assert block.text.startswith("--- LINES REPEATED ACROSS THESE PAGES")
+    for n in range(1, 4):
+        assert f"--- PAGE {n} ---\nConsultation day {n}  500.00" in block.text
+    assert not block.truncated
+
+
+def test_single_page_is_not_folded():
+    block = page_block([_page(1, "CITY HOSPITAL", "Room rent 1500.00")], token_budget=10_000)
+    assert block.text == "--- PAGE 1 ---\nCITY HOSPITAL\nRoom rent 1500.00"
+
+
+def test_page_block_is_cut_to_the_token_budget():
+    pages = [_page(n, *(f"Pharmacy item {n}-{i} tablet strip 10s  {i}.50" for i in range(200))) for n in range(1, 4)]
+    block = page_block(pages, token_budget=300)
+
+    assert block.truncated
+    assert block.tokens <= 300
+    assert block.text.count("[… truncated to fit the token budget]") == 3
+    assert all(f"--- PAGE {n} ---" in block.text for n in range(1, 4))
+
+
+def test_page_block_reports_raw_tokens():
+    pages = [_page(1, "Room rent 1500.00"), _page(2, "Nursing 300.00")]
+    block = page_block(pages, token_budget=0, raw_tokens={1: 100, 2: 50})
+    assert block.raw_tokens == 150
+    assert not block.truncated
+
+
+def test_empty_page_gets_the_marker():
+    block = page_block([_page(1, "")], token_budget=1_000, empty_marker="[no text]")
+    assert block.text == "--- PAGE 1 ---\n[no text]"
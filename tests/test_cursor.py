@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.db.repository import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+    cursor = encode_cursor(created_at, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(datetime(2026, 1, 1, tzinfo=timezone.utc), 2**40)
+    assert all(c.isalnum() or c in "-_" for c in cursor)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "not base64 at all!",
+        encode_cursor(datetime(2026, 1, 1, tzinfo=timezone.utc), 1)[:-3],
+        "MjAyNi0wMS0wMVQwMDowMDowMA",  # naive timestamp, no pk
+    ],
+)
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_naive_timestamp_is_rejected():
+    cursor = encode_cursor(datetime(2026, 1, 1), 7)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
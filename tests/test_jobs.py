@@ -0,0 +1,72 @@
+import asyncio
+
+from app.db.repository import ClaimJob
+from app.models.schema import ProcessResponse
+from app.services import jobs
+from app.services.jobs import JobWorkerPool, retry_delay
+
+
+def _pool(lease_seconds: float = 0.03) -> JobWorkerPool:
+    return JobWorkerPool(concurrency=1, lease_seconds=lease_seconds, poll_interval_seconds=0.01, retry_base_seconds=1, retry_max_seconds=8)
+
+
+def _job() -> ClaimJob:
+    return ClaimJob(job_pk=1, claim_pk=1, claim_id="CLM-1", cache_key=None, pdf=b"%PDF", attempts=1, max_attempts=3)
+
+
+def test_retry_delay_doubles_up_to_the_cap():
+    assert [retry_delay(n, 1, 8) for n in range(1, 6)] == [1, 2, 4, 8, 8]
+
+
+async def test_heartbeat_survives_a_failed_lease_renewal(monkeypatch):
+    renewals: list[str] = []
+
+    async def renew_job_lease(job, lease_seconds):
+        renewals.append("error" if not renewals else "ok")
+        if len(renewals) == 1:
+            raise OSError("connection reset")
+        return True
+
+    monkeypatch.setattr(jobs, "renew_job_lease", renew_job_lease)
+    heartbeat = asyncio.create_task(_pool()._heartbeat(_job()))
+    await asyncio.sleep(0.05)
+    assert not heartbeat.done()
+    heartbeat.cancel()
+    await asyncio.gather(heartbeat, return_exceptions=True)
+    assert renewals[:2] == ["error", "ok"]
+
+
+async def test_heartbeat_stops_when_the_lease_is_lost(monkeypatch):
+    async def renew_job_lease(job, lease_seconds):
+        return False
+
+    monkeypatch.setattr(jobs, "renew_job_lease", renew_job_lease)
+    await asyncio.wait_for(_pool()._heartbeat(_job()), timeout=1)
+
+
+async def test_run_waits_for_the_cancelled_heartbeat(monkeypatch):
+    stopped: list[bool] = []
+    pool = _pool(lease_seconds=60)
+
+    async def heartbeat(job):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0)
+            stopped.append(True)
+            raise
+
+    async def process_document(claim_id, pdf):
+        await asyncio.sleep(0)
+        return ProcessResponse(claim_id=claim_id, segregation=[])
+
+    async def complete_claim_job(job, response):
+        return True
+
+    monkeypatch.setattr(pool, "_heartbeat", heartbeat)
+    monkeypatch.setattr(jobs, "process_document", process_document)
+    monkeypatch.setattr(jobs, "complete_claim_job", complete_claim_job)
+    await pool._run(_job())
+
+    assert pool.completed == 1
+    assert stopped == [True]
@@ -0,0 +1,58 @@
+import pytest
+
+from app.services import pdf
+from app.services.pdf import InvalidPdfError, PdfExtractionEngine
+from benchmarks.synthetic import build_pdf
+
+
+@pytest.fixture(scope="module")
+def engine():
+    with PdfExtractionEngine(max_workers=2) as engine:
+        yield engine
+
+
+def _fail_after_first_range(engine: PdfExtractionEngine, monkeypatch) -> None:
+    """Make every page range but the first fail in the worker, as a malformed page would."""
+    run = engine._run
+
+    async def failing_run(fn, *args):
+        if fn is pdf._extract_page_range and args[1] > 0:
+            raise RuntimeError("Failed to load page")
+        return await run(fn, *args)
+
+    monkeypatch.setattr(engine, "_run", failing_run)
+
+
+async def test_pages_are_extracted_in_order(engine):
+    pages = await engine.extract(build_pdf(["first page", "second page", "third page"]))
+    assert [p.page_number for p in pages] == [1, 2, 3]
+    assert "second page" in pages[1].text
+
+
+@pytest.mark.parametrize(("data", "message"), [(b"", "PDF is empty"), (b"not a pdf", "Could not parse PDF")])
+async def test_unreadable_pdf_raises_before_extraction(engine, data, message):
+    with pytest.raises(InvalidPdfError, match=message):
+        await engine.extract(data)
+    with pytest.raises(InvalidPdfError, match=message):
+        await engine.stream(data)
+
+
+async def test_page_failing_mid_stream_raises_invalid_pdf(engine, monkeypatch):
+    _fail_after_first_range(engine, monkeypatch)
+    batches = await engine.stream(build_pdf([f"page {n}" for n in range(1, 5)]), range_pages=1)
+    first = await anext(batches)
+    assert first[0].page_number == 1
+    with pytest.raises(InvalidPdfError, match="Could not parse pages 2-2"):
+        async for _ in batches:
+            pass
+
+
+async def test_page_failing_during_extract_raises_invalid_pdf(engine, monkeypatch):
+    _fail_after_first_range(engine, monkeypatch)
+    with pytest.raises(InvalidPdfError, match="Could not parse pages"):
+        await engine.extract(build_pdf([f"page {n}" for n in range(1, 5)]))
+
+
+async def test_stopped_engine_is_not_blamed_on_the_pdf():
+    with pytest.raises(RuntimeError, match="not started"):
+        await PdfExtractionEngine(max_workers=1).extract(build_pdf(["page"]))
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from pydantic import SecretStr
+
+from app.api import routes
+from app.core.config import settings
+
+
+@pytest.fixture
+def profile_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILE_ADMIN_TOKEN", SecretStr("secret"))
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _fail_with(monkeypatch, exc: BaseException) -> None:
+    async def process_claim(file, claim_id, use_cache=True):
+        raise exc
+
+    monkeypatch.setattr(routes, "_process_claim", process_claim)
+
+
+async def test_http_error_keeps_the_profile_and_its_id(monkeypatch, profile_dir):
+    _fail_with(monkeypatch, HTTPException(status_code=422, detail="PDF contains no pages."))
+    with pytest.raises(HTTPException) as raised:
+        await routes.process_claim(SimpleNamespace(content_type="application/pdf"), x_profile_token="secret")
+
+    profile_id = raised.value.headers["X-Profile-Id"]
+    assert (profile_dir / f"{profile_id}.json").is_file()
+    assert (profile_dir / f"{profile_id}.folded").is_file()
+
+
+async def test_unexpected_error_still_saves_the_profile(monkeypatch, profile_dir):
+    _fail_with(monkeypatch, OSError("No space left on device"))
+    with pytest.raises(OSError):
+        await routes.process_claim(SimpleNamespace(content_type="application/pdf"), x_profile_token="secret")
+
+    assert len(list(profile_dir.glob("*.json"))) == 1
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+
+from app.llm.provider import LLMPriority, LLMRateLimiter
+
+
+async def _hold(limiter: LLMRateLimiter, admitted: list[str], name: str, release: asyncio.Event, priority: LLMPriority = LLMPriority.NORMAL) -> None:
+    async with limiter.slot(priority, tokens=1):
+        admitted.append(name)
+        await release.wait()
+
+
+async def test_concurrency_limit_queues_extra_calls():
+    limiter = LLMRateLimiter(max_concurrency=2, requests_per_minute=0, tokens_per_minute=0)
+    release, admitted = asyncio.Event(), []
+    tasks = [asyncio.create_task(_hold(limiter, admitted, str(i), release)) for i in range(3)]
+    await asyncio.sleep(0.01)
+    assert admitted == ["0", "1"]
+    assert limiter.stats()["queued"]["normal"] == 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert admitted == ["0", "1", "2"]
+    assert limiter.in_flight == 0
+
+
+async def test_high_priority_waiters_are_served_first():
+    limiter = LLMRateLimiter(max_concurrency=1, requests_per_minute=0, tokens_per_minute=0)
+    first, rest, admitted = asyncio.Event(), asyncio.Event(), []
+    holder = asyncio.create_task(_hold(limiter, admitted, "holder", first))
+    await asyncio.sleep(0)
+    normal = asyncio.create_task(_hold(limiter, admitted, "normal", rest, LLMPriority.NORMAL))
+    high = asyncio.create_task(_hold(limiter, admitted, "high", rest, LLMPriority.HIGH))
+    await asyncio.sleep(0.01)
+
+    rest.set()
+    first.set()
+    await asyncio.gather(holder, normal, high)
+    assert admitted == ["holder", "high", "normal"]
+
+
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    limiter = LLMRateLimiter(max_concurrency=1, requests_per_minute=0, tokens_per_minute=0)
+    release, admitted = asyncio.Event(), []
+    holder = asyncio.create_task(_hold(limiter, admitted, "holder", release))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(_hold(limiter, admitted, "cancelled", release))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    release.set()
+    await holder
+    await asyncio.gather(waiter, return_exceptions=True)
+
+    assert admitted == ["holder"]
+    assert limiter.in_flight == 0
+    async with limiter.slot(LLMPriority.NORMAL, tokens=1):
+        assert limiter.in_flight == 1
+
+
+async def test_throttle_halves_limits_and_successes_grow_them_back():
+    limiter = LLMRateLimiter(max_concurrency=8, requests_per_minute=0, tokens_per_minute=0)
+    limiter.record_throttle(retry_after=60)
+    assert limiter.concurrency_limit == 4
+    assert limiter.rate_factor == 0.5
+
+    # More 429s inside the same cool-down window do not halve again.
+    limiter.record_throttle(retry_after=None)
+    limiter.record_throttle(retry_after=1)
+    assert limiter.concurrency_limit == 4
+    assert limiter.throttled == 3
+
+    # Additive increase: one slot per concurrency_limit successes.
+    for _ in range(4):
+        limiter.record_success(reserved_tokens=1, used_tokens=1)
+    assert limiter.concurrency_limit == 5
+    assert limiter.rate_factor == pytest.approx(0.58)
+    for _ in range(200):
+        limiter.record_success(reserved_tokens=1, used_tokens=1)
+    assert limiter.concurrency_limit == 8
+    assert limiter.rate_factor == 1.0
+
+
+async def test_retry_after_pauses_admissions():
+    limiter = LLMRateLimiter(max_concurrency=4, requests_per_minute=0, tokens_per_minute=0)
+    limiter.record_throttle(retry_after=0.1)
+    began = time.monotonic()
+    async with limiter.slot(LLMPriority.NORMAL, tokens=1):
+        waited = time.monotonic() - began
+    assert waited >= 0.09
+
+
+async def test_token_bucket_delays_calls_over_the_budget():
+    # 60 000 tokens per minute refill at 1 000 tokens per second.
+    limiter = LLMRateLimiter(max_concurrency=4, requests_per_minute=0, tokens_per_minute=60_000)
+    async with limiter.slot(LLMPriority.NORMAL, tokens=60_000):
+        pass
+    began = time.monotonic()
+    async with limiter.slot(LLMPriority.NORMAL, tokens=100):
+        waited = time.monotonic() - began
+    assert 0.08 <= waited < 1.0
+
+
+async def test_success_reconciles_the_token_budget_with_actual_usage():
+    limiter = LLMRateLimiter(max_concurrency=1, requests_per_minute=0, tokens_per_minute=60_000)
+    async with limiter.slot(LLMPriority.NORMAL, tokens=1_000):
+        pass
+    limiter.record_success(reserved_tokens=1_000, used_tokens=3_000)
+    assert limiter.tokens_used == 3_000
+    assert limiter.stats()["token_budget"] <= 57_100
@@ -0,0 +1,46 @@
+import pytest
+
+from app.core.config import settings
+from app.graph.workflow import PROMPT_VERSION, _prompt_version
+from app.services.result_cache import result_cache_key
+
+_SHA = "ab" * 32
+
+
+def test_key_holds_digest_model_and_prompt_version():
+    assert result_cache_key(_SHA) == f"{_SHA}:{settings.LLM_PROVIDER}/{settings.LLM_MODEL}:{PROMPT_VERSION}"
+
+
+def test_key_changes_with_the_document_and_the_model(monkeypatch):
+    key = result_cache_key(_SHA)
+    assert result_cache_key("cd" * 32) != key
+
+    monkeypatch.setattr(settings, "LLM_MODEL", "another-model")
+    assert result_cache_key(_SHA) != key
+
+
+def test_key_is_stable():
+    assert result_cache_key(_SHA) == result_cache_key(_SHA)
+
+
+@pytest.mark.parametrize(
+    ("name", "value"),
+    [
+        ("PDF_BACKEND", "pdfplumber"),
+        ("PROMPT_COMPACTION_ENABLED", False),
+        ("BILL_AGENT_TOKEN_BUDGET", 1_000),
+        ("BILL_AGENT_CHUNK_PAGES", 4),
+        ("HEURISTIC_CLASSIFIER_ENABLED", False),
+        ("HEURISTIC_MIN_CONFIDENCE", 0.5),
+    ],
+)
+def test_prompt_version_covers_output_affecting_settings(monkeypatch, name, value):
+    before = _prompt_version()
+    monkeypatch.setattr(settings, name, value)
+    assert _prompt_version() != before
+
+
+def test_prompt_version_ignores_unrelated_settings(monkeypatch):
+    before = _prompt_version()
+    monkeypatch.setattr(settings, "PDF_EXTRACTION_WORKERS", settings.PDF_EXTRACTION_WORKERS + 1)
+    assert _prompt_version() == before
@@ -0,0 +1,52 @@
+import pytest
+
+from app.core.config import settings
+from app.graph.nodes import segregator
+from app.models.schema import DocumentType, PageClassification, PageData
+from app.services.compaction import PromptBlock
+
+
+@pytest.fixture
+def pages(monkeypatch) -> list[PageData]:
+    monkeypatch.setattr(settings, "SEGREGATOR_WINDOW_MAX_PAGES", 1)
+    return [PageData(page_number=n, text=f"page {n}") for n in range(1, 4)]
+
+
+def _fake_llm(monkeypatch, fails) -> list[int]:
+    """Answer every window with ``itemized_bill`` unless ``fails(page_number, call_no)``; returns the pages asked, in order."""
+    asked: list[int] = []
+
+    async def classify_window(window, raw_tokens):
+        page_number = window[0].page_number
+        asked.append(page_number)
+        if fails(page_number, asked.count(page_number)):
+            raise TimeoutError("LLM timed out")
+        classification = PageClassification(page_number=page_number, document_type=DocumentType.ITEMIZED_BILL, confidence=0.9)
+        return {page_number: classification}, PromptBlock(text="", tokens=1, raw_tokens=1, truncated=False)
+
+    monkeypatch.setattr(segregator, "_classify_window", classify_window)
+    return asked
+
+
+async def test_failed_window_is_retried_once(monkeypatch, pages):
+    asked = _fake_llm(monkeypatch, lambda page, call: page == 2 and call == 1)
+    classified, blocks = await segregator._classify_windowed(pages, {})
+    assert [c.document_type for c in classified] == [DocumentType.ITEMIZED_BILL] * 3
+    assert asked == [1, 2, 3, 2]
+    assert len(blocks) == 3
+
+
+async def test_window_failing_twice_falls_back_to_other(monkeypatch, pages):
+    _fake_llm(monkeypatch, lambda page, call: page == 2)
+    classified, _ = await segregator._classify_windowed(pages, {})
+    assert [(c.document_type, c.confidence) for c in classified] == [
+        (DocumentType.ITEMIZED_BILL, 0.9),
+        (DocumentType.OTHER, 0.0),
+        (DocumentType.ITEMIZED_BILL, 0.9),
+    ]
+
+
+async def test_every_window_failing_raises(monkeypatch, pages):
+    _fake_llm(monkeypatch, lambda page, call: True)
+    with pytest.raises(TimeoutError):
+        await segregator._classify_windowed(pages, {})
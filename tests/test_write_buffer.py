@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from app.db import write_buffer
+from app.db.write_buffer import ClaimWriteBuffer
+from app.models.schema import ProcessResponse
+
+
+def _claim(claim_id: str) -> ProcessResponse:
+    return ProcessResponse(claim_id=claim_id, segregation=[])
+
+
+@pytest.fixture
+def transactions(monkeypatch) -> list[list[str]]:
+    """Claim ids per ``save_claim_results`` call; claims whose id starts with "bad" fail their transaction."""
+    calls: list[list[str]] = []
+
+    async def save_claim_results(results):
+        ids = [response.claim_id for response, _ in results]
+        calls.append(ids)
+        await asyncio.sleep(0)
+        if any(claim_id.startswith("bad") for claim_id in ids):
+            raise RuntimeError("constraint violation")
+        return [int(claim_id.rsplit("-", 1)[1]) for claim_id in ids]
+
+    monkeypatch.setattr(write_buffer, "save_claim_results", save_claim_results)
+    return calls
+
+
+async def test_full_buffer_flushes_in_one_transaction(transactions):
+    buffer = ClaimWriteBuffer(max_claims=3, flush_ms=10_000)
+    buffer.start()
+    pks = await asyncio.wait_for(asyncio.gather(*(buffer.save(_claim(f"c-{i}")) for i in range(3))), timeout=1)
+    await buffer.close()
+
+    assert pks == [0, 1, 2]
+    assert transactions == [["c-0", "c-1", "c-2"]]
+    assert buffer.stats()["claims_per_flush"] == 3
+
+
+async def test_partial_buffer_flushes_after_the_interval(transactions):
+    buffer = ClaimWriteBuffer(max_claims=100, flush_ms=20)
+    buffer.start()
+    pks = await asyncio.wait_for(asyncio.gather(buffer.save(_claim("c-1")), buffer.save(_claim("c-2"))), timeout=1)
+    await buffer.close()
+
+    assert pks == [1, 2]
+    assert transactions == [["c-1", "c-2"]]
+
+
+async def test_overflow_is_split_into_groups_of_max_claims(transactions):
+    buffer = ClaimWriteBuffer(max_claims=2, flush_ms=20)
+    buffer.start()
+    pks = await asyncio.wait_for(asyncio.gather(*(buffer.save(_claim(f"c-{i}")) for i in range(5))), timeout=1)
+    await buffer.close()
+
+    assert pks == [0, 1, 2, 3, 4]
+    assert [len(group) for group in transactions] == [2, 2, 1]
+
+
+async def test_failed_group_is_retried_claim_by_claim(transactions):
+    buffer = ClaimWriteBuffer(max_claims=3, flush_ms=10_000)
+    buffer.start()
+    results = await asyncio.wait_for(
+        asyncio.gather(buffer.save(_claim("c-1")), buffer.save(_claim("bad-2")), buffer.save(_claim("c-3")), return_exceptions=True),
+        timeout=1,
+    )
+    await buffer.close()
+
+    assert results[0] == 1 and results[2] == 3
+    assert isinstance(results[1], RuntimeError)
+    assert transactions == [["c-1", "bad-2", "c-3"], ["c-1"], ["bad-2"], ["c-3"]]
+    assert buffer.stats()["failed_claims"] == 1
+    assert buffer.stats()["fallback_flushes"] == 1
+
+
+async def test_close_flushes_pending_claims_and_rejects_new_ones(transactions):
+    buffer = ClaimWriteBuffer(max_claims=100, flush_ms=60_000)
+    buffer.start()
+    pending = asyncio.create_task(buffer.save(_claim("c-7")))
+    await asyncio.sleep(0)
+    await asyncio.wait_for(buffer.close(), timeout=1)
+
+    assert await pending == 7
+    assert transactions == [["c-7"]]
+    with pytest.raises(RuntimeError):
+        await buffer.save(_claim("c-8"))